@@ -10,7 +10,13 @@ unalias -a
 unset BASH_COMPAT
 declare -F ___in_portage_iuse >/dev/null && export -n -f ___in_portage_iuse
 
-source "${PORTAGE_BIN_PATH:?}/isolated-functions.sh" || exit
+if [[ ! -v __ebuild_server ]]; then
+	source "${PORTAGE_BIN_PATH:?}/isolated-functions.sh" || exit
+elif [[ -v PORTAGE_EBUILD_EXTRA_SOURCE ]]; then
+	# The ebuild server (see below) has sourced the libraries already,
+	# but this file is specific to the phase.
+	source "${PORTAGE_EBUILD_EXTRA_SOURCE}" || exit 1
+fi
 
 __check_bash_version() {
 	local IFS compat_maj compat_min dependent maj min
@@ -75,10 +81,12 @@ __check_bash_version() {
 __check_bash_version
 
 if [[ ${EBUILD_PHASE} != depend ]] ; then
-	source "${PORTAGE_BIN_PATH}/phase-functions.sh" || die
-	source "${PORTAGE_BIN_PATH}/save-ebuild-env.sh" || die
-	source "${PORTAGE_BIN_PATH}/phase-helpers.sh" || die
-	source "${PORTAGE_BIN_PATH}/bashrc-functions.sh" || die
+	if [[ ! -v __ebuild_server ]]; then
+		source "${PORTAGE_BIN_PATH}/phase-functions.sh" || die
+		source "${PORTAGE_BIN_PATH}/save-ebuild-env.sh" || die
+		source "${PORTAGE_BIN_PATH}/phase-helpers.sh" || die
+		source "${PORTAGE_BIN_PATH}/bashrc-functions.sh" || die
+	fi
 else
 	# These dummy functions are for things that are likely to be called
 	# in global scope, even though they are completely useless during
@@ -150,6 +158,47 @@ __qa_call() {
 	return ${retval}
 }
 
+# With FEATURES=ebuild-server, portage starts this process with the
+# arguments "__server <command fifo> <reply fifo>", in order to run
+# consecutive phases of a package without starting bash and sourcing the
+# above libraries for each phase. Each command line consists of a file
+# that updates the environment for the phase, the terminal for its
+# output, and the usual arguments. The phase runs in a subshell which
+# sources this file again and thereby behaves like a separate ebuild.sh
+# process.
+if [[ $1 == __server ]]; then
+	exec {__ebuild_server_in}<"$2" {__ebuild_server_out}>"$3" || exit
+	__ebuild_server=1
+	while read -r -u ${__ebuild_server_in} __ebuild_server_cmd; do
+		eval "__ebuild_server_cmd=( ${__ebuild_server_cmd} )" || break
+		(
+			exec </dev/null >"${__ebuild_server_cmd[1]}" 2>&1 || exit 1
+			echo "started ${BASHPID}" >&${__ebuild_server_out}
+			exec {__ebuild_server_in}<&- {__ebuild_server_out}>&-
+			# Like the sandbox command, print a summary of violations,
+			# and fail if there are any.
+			trap '__ebuild_server_status=$?
+			if [[ -s ${SANDBOX_LOG} ]]; then
+				echo " * ------------------------- ACCESS VIOLATION SUMMARY -------------------------"
+				echo " * LOG FILE: \"${SANDBOX_LOG}\""
+				echo " *"
+				cat "${SANDBOX_LOG}"
+				echo " * ----------------------------------------------------------------------------"
+				(( __ebuild_server_status )) || exit 1
+			fi' EXIT
+			source "${__ebuild_server_cmd[0]}" || exit 1
+			set -- "${__ebuild_server_cmd[@]:2}"
+			unset __ebuild_server_cmd __ebuild_server_in __ebuild_server_out
+			source "${BASH_SOURCE[0]}" "$@"
+		)
+		echo "exited $?" >&${__ebuild_server_out}
+		# Exit after sandbox violations, so that sandbox reports them.
+		[[ -s ${SANDBOX_LOG} ]] && exit 1
+	done
+	exit 0
+fi
+unset __ebuild_server
+
 EBUILD_SH_ARGS="$*"
 
 shift $#
@@ -156,90 +156,42 @@ install_qa_check() {
 		# Restore all the file flags that were saved earlier on.
 		mtree -U -e -p "${ED}" -k flags < "${T}/bsdflags.mtree" &> /dev/null
 	fi
+}
 
-	# Create NEEDED.ELF.2 regardless of RESTRICT=binchecks, since this info is
-	# too useful not to have (it's required for things like preserve-libs), and
-	# it's tempting for ebuild authors to set RESTRICT=binchecks for packages
-	# containing pre-built binaries.
-	if type -P scanelf > /dev/null ; then
-		# Save NEEDED information after removing self-contained providers
-		rm -f "${PORTAGE_BUILDDIR}"/build-info/NEEDED{,.ELF.2}
-
-		# We don't use scanelf -q, since that would omit libraries like
-		# musl's /usr/lib/libc.so which do not have any DT_NEEDED or
-		# DT_SONAME settings. Since we don't use scanelf -q, we have to
-		# handle the special rpath value "  -  " below.
-		scanelf_output=$(scanelf -yRBF '%a;%p;%S;%r;%n' "${D%/}/")
-
-		case $? in
-			0)
-				# Proceed
-				;;
-			159)
-				# Unknown syscall
-				eerror "Failed to run scanelf (unknown syscall)"
-
-				if [[ -z ${PORTAGE_NO_SCANELF_CHECK} ]]; then
-					# Abort only if the special recovery variable isn't set
-					eerror "Please upgrade pax-utils with:"
-					eerror " PORTAGE_NO_SCANELF_CHECK=1 emerge -v1 app-misc/pax-utils"
-					eerror "Aborting to avoid corrupting metadata"
-					die "${0##*/}: Failed to run scanelf! Update pax-utils?"
-				fi
-				;;
-			*)
-				# Failed in another way
-				eerror "Failed to run scanelf (returned: $?)!"
-
-				if [[ -z ${PORTAGE_NO_SCANELF_CHECK} ]]; then
-					# Abort only if the special recovery variable isn't set
-					eerror "Please report this bug at https://bugs.gentoo.org/!"
-					eerror "It may be possible to re-emerge pax-utils with:"
-					eerror " PORTAGE_NO_SCANELF_CHECK=1 emerge -v1 app-misc/pax-utils"
-					eerror "Aborting to avoid corrupting metadata"
-					die "${0##*/}: Failed to run scanelf!"
-				fi
-				;;
-		esac
-
-		if [[ -n ${scanelf_output} ]]; then
-			while IFS= read -r l; do
-				arch=${l%%;*}; l=${l#*;}
-				obj="/${l%%;*}"; l=${l#*;}
-				soname=${l%%;*}; l=${l#*;}
-				rpath=${l%%;*}; l=${l#*;}; [[ "${rpath}" = "  -  " ]] && rpath=""
-				needed=${l%%;*}; l=${l#*;}
-
-				# Infer implicit soname from basename (bug 715162).
-				if [[ -z ${soname} && $(file -S "${D%/}${obj}") == *"SB shared object"* ]]; then
-					soname=${obj##*/}
-				fi
+# @FUNCTION: install_qa_check_elf
+# @DESCRIPTION:
+# The part of the post-install QA checks that runs after portage has written
+# build-info/NEEDED.ELF.2, which it does regardless of RESTRICT=binchecks,
+# since this info is too useful not to have (it's required for things like
+# preserve-libs), and it's tempting for ebuild authors to set
+# RESTRICT=binchecks for packages containing pre-built binaries.
+install_qa_check_elf() {
+	if ! ___eapi_has_prefix_variables; then
+		local EPREFIX= ED=${D}
+	fi
 
-				echo "${obj} ${needed}"	>> "${PORTAGE_BUILDDIR}"/build-info/NEEDED
-				echo "${arch#EM_};${obj};${soname};${rpath};${needed}" >> "${PORTAGE_BUILDDIR}"/build-info/NEEDED.ELF.2
-			done <<< ${scanelf_output}
-		fi
+	cd "${D}" || die "cd failed"
 
-		[[ -n "${QA_SONAME_NO_SYMLINK}" ]] && \
-			echo "${QA_SONAME_NO_SYMLINK}" > \
-			"${PORTAGE_BUILDDIR}"/build-info/QA_SONAME_NO_SYMLINK
+	[[ -n "${QA_SONAME_NO_SYMLINK}" ]] && \
+		echo "${QA_SONAME_NO_SYMLINK}" > \
+		"${PORTAGE_BUILDDIR}"/build-info/QA_SONAME_NO_SYMLINK
 
-		if [[ -s ${PORTAGE_BUILDDIR}/build-info/NEEDED.ELF.2 ]]; then
-			if grep -qs '<stabilize-allarches/>' "${EBUILD%/*}/metadata.xml"; then
-				eqawarn "QA Notice: <stabilize-allarches/> found on package installing ELF files"
-			fi
+	if [[ -s ${PORTAGE_BUILDDIR}/build-info/NEEDED.ELF.2 ]]; then
+		if grep -qs '<stabilize-allarches/>' "${EBUILD%/*}/metadata.xml"; then
+			eqawarn "QA Notice: <stabilize-allarches/> found on package installing ELF files"
+		fi
 
-			if contains_word binchecks "${PORTAGE_RESTRICT}"; then
-				eqawarn "QA Notice: RESTRICT=binchecks prevented checks on these ELF files:"
-				eqawarn "$(while read -r x; do x=${x#*;} ; x=${x%%;*} ; echo "${x#${EPREFIX}}" ; done < "${PORTAGE_BUILDDIR}"/build-info/NEEDED.ELF.2)"
-			fi
+		if contains_word binchecks "${PORTAGE_RESTRICT}"; then
+			eqawarn "QA Notice: RESTRICT=binchecks prevented checks on these ELF files:"
+			eqawarn "$(while read -r x; do x=${x#*;} ; x=${x%%;*} ; echo "${x#${EPREFIX}}" ; done < "${PORTAGE_BUILDDIR}"/build-info/NEEDED.ELF.2)"
 		fi
 	fi
 
 	# If binpkg-dostrip is enabled, apply stripping before creating
 	# the binary package.
 	# Note: disabling it won't help with packages calling prepstrip directly.
-	# We do this after the scanelf bits so that we can reuse the data. bug #749624.
+	# We do this after NEEDED.ELF.2 has been written so that we can reuse the
+	# data. bug #749624.
 	if contains_word binpkg-dostrip "${FEATURES}"; then
 		export STRIP_MASK
 		if ___eapi_has_dostrip; then
@@ -46,7 +46,7 @@ portage_saved_readonly_vars=(
 portage_mutable_filtered_vars=( AA HOSTNAME )
 
 # @FUNCTION: __filter_readonly_variables
-# @DESCRIPTION: [--filter-sandbox] [--allow-extra-vars]
+# @DESCRIPTION: [--filter-sandbox] [--allow-extra-vars] [--print-pattern]
 # Read an environment from stdin and echo to stdout while filtering variables
 # with names that are known to cause interference:
 #
@@ -78,6 +78,10 @@ portage_mutable_filtered_vars=( AA HOSTNAME )
 # However, old settings should be overridden when loading the
 # environment from a binary or installed package.
 #
+# --print-pattern causes the list of variable names to be printed instead
+# of filtering stdin, so that the environment can be filtered by portage
+# itself (see filter_saved_environment in portage.package.ebuild).
+#
 # --allow-extra-vars inhibits the filtering of the variables whose names are
 # specified by the PORTAGE_SAVED_READONLY_VARS and PORTAGE_MUTABLE_FILTERED_VARS
 # variables. However, in the absence of the option, only the CATEGORY, P, PF,
@@ -176,7 +180,13 @@ __filter_readonly_variables() {
 		)
 	fi
 
-	"${PORTAGE_PYTHON:-/usr/bin/python}" "${PORTAGE_BIN_PATH}"/filter-bash-environment.py "${filtered_vars[*]}" \
+	if has --print-pattern "$@"; then
+		printf '%s\n' "${filtered_vars[*]}"
+		return
+	fi
+
+	PYTHONPATH=${PORTAGE_PYTHONPATH:-${PORTAGE_PYM_PATH}} \
+		"${PORTAGE_PYTHON:-/usr/bin/python}" "${PORTAGE_BIN_PATH}"/filter-bash-environment.py "${filtered_vars[*]}" \
 	|| die "filter-bash-environment.py failed"
 }
 
@@ -1164,12 +1174,24 @@ __ebuild_main() {
 
 		# Use safe cwd, avoiding unsafe import for bug #469338.
 		cd "${PORTAGE_PYM_PATH}"
-		__save_ebuild_env | __filter_readonly_variables \
-			--filter-features > "${T}/environment"
-		__pipestatus || die "__save_ebuild_env failed"
+		local env_file
+		if [[ -n ${PORTAGE_IPC_DAEMON} ]]; then
+			# The IPC daemon filters the environment when the exit
+			# command is received, which saves a python process.
+			__filter_readonly_variables --filter-features --print-pattern \
+				> "${T}/environment.filter"
+			__save_ebuild_env > "${T}/environment.unfiltered" \
+				|| die "__save_ebuild_env failed"
+			env_file=${T}/environment.unfiltered
+		else
+			__save_ebuild_env | __filter_readonly_variables \
+				--filter-features > "${T}/environment"
+			__pipestatus || die "__save_ebuild_env failed"
+			env_file=${T}/environment
+		fi
 
-		chgrp "${PORTAGE_GRPNAME:-portage}" "${T}/environment"
-		chmod g+w "${T}/environment"
+		chgrp "${PORTAGE_GRPNAME:-portage}" "${env_file}"
+		chmod g+w "${env_file}"
 	fi
 
 	[[ -n ${PORTAGE_EBUILD_EXIT_FILE} ]] && : > "${PORTAGE_EBUILD_EXIT_FILE}"
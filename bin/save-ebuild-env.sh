@@ -116,6 +116,7 @@ __save_ebuild_env() (
 		PORTAGE_BASHRC_FILES
 		PORTAGE_COMPRESS
 		PORTAGE_COMPRESS_EXCLUDE_SUFFIXES
+		PORTAGE_CONCURRENT_MERGES
 		PORTAGE_DOHTML_UNWARNED_SKIPPED_EXTENSIONS
 		PORTAGE_DOHTML_UNWARNED_SKIPPED_FILES
 		PORTAGE_DOHTML_WARN_ON_SKIPPED_FILES
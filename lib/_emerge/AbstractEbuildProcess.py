@@ -1,4 +1,4 @@
-# Copyright 1999-2025 Gentoo Authors
+# Copyright 1999-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 import functools
@@ -13,6 +13,7 @@ from portage.elog import messages as elog_messages
 from portage import installation
 from portage.package.ebuild._ipc.ExitCommand import ExitCommand
 from portage.package.ebuild._ipc.QueryCommand import QueryCommand
+from portage.package.ebuild._filter_bash_env import filter_saved_environment
 from portage import os
 from portage.util.futures import asyncio
 from portage.util import apply_secpass_permissions, no_color
@@ -314,6 +315,7 @@ class AbstractEbuildProcess(SpawnProcess):
             self._ipc_daemon.cancel()
             if self._exit_command.exitcode is not None:
                 self.returncode = self._exit_command.exitcode
+                self._filter_saved_environment()
             else:
                 if self.returncode < 0:
                     if not self.cancelled:
@@ -334,6 +336,20 @@ class AbstractEbuildProcess(SpawnProcess):
                     if not self.cancelled:
                         self._unexpected_exit()
 
+    def _filter_saved_environment(self):
+        """
+        Filter the environment that ebuild.sh saved at the end of the
+        phase, which it leaves to the IPC daemon instead of spawning
+        filter-bash-environment.py.
+        """
+        if not self.settings.get("T"):
+            return
+        try:
+            filter_saved_environment(os.path.join(self.settings["T"], "environment"))
+        except OSError as e:
+            self._eerror([f"failed to save the environment: {e}"])
+            self.returncode = 1
+
     def _async_wait(self):
         """
         Override _async_wait to asynchronously unlock self._build_dir
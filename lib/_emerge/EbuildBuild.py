@@ -2,6 +2,7 @@
 # Distributed under the terms of the GNU General Public License v2
 
 import functools
+import logging
 
 import _emerge.emergelog
 from _emerge.AsynchronousTask import AsynchronousTask
@@ -21,6 +22,10 @@ from portage import _encodings, _unicode_encode, os
 from portage.package.ebuild.digestcheck import digestcheck
 from portage.package.ebuild.doebuild import _check_temp_dir
 from portage.package.ebuild._spawn_nofetch import SpawnNofetchWithoutBuilddir
+from portage.util import writemsg_level
+from portage.util.build_stats import BuildStats, dir_usage
+from portage.util.human_readable import human_to_bytes
+from portage.util._cgroup import JobCgroup, format_accounting
 from portage.util._async.AsyncTaskFuture import AsyncTaskFuture
 from portage.util.futures.executor.fork import ForkExecutor
 from portage.util.path import first_existing
@@ -39,7 +44,15 @@ class EbuildBuild(CompositeTask):
         "prefetcher",
         "settings",
         "world_atom",
-    ) + ("_build_dir", "_buildpkg", "_ebuild_path", "_issyspkg", "_tree")
+    ) + (
+        "_build_dir",
+        "_build_stats",
+        "_buildpkg",
+        "_cgroup",
+        "_ebuild_path",
+        "_issyspkg",
+        "_tree",
+    )
 
     def _start(self):
         if not self.opts.fetchonly:
@@ -390,8 +403,14 @@ class EbuildBuild(CompositeTask):
             )
             logger.log(msg, short_msg=short_msg)
 
+        self._build_stats = {}
+        self._create_cgroup()
         build = EbuildExecuter(
-            background=self.background, pkg=pkg, scheduler=scheduler, settings=settings
+            background=self.background,
+            pkg=pkg,
+            scheduler=scheduler,
+            settings=settings,
+            stats=self._build_stats,
         )
         self._start_task(build, self._build_exit)
 
@@ -448,15 +467,110 @@ class EbuildBuild(CompositeTask):
             self.returncode = returncode
             self._async_wait()
 
+    def _create_cgroup(self):
+        """
+        With FEATURES=cgroup, create a cgroup that all processes of
+        the ebuild phases join, for resource controls and accounting.
+        """
+        settings = self.settings
+        if "cgroup" not in settings.features:
+            return
+
+        memory_high = settings.get("PORTAGE_CGROUP_MEMORY_HIGH") or None
+        if memory_high is not None and memory_high != "max":
+            try:
+                memory_high = str(human_to_bytes(memory_high))
+            except ValueError:
+                writemsg_level(
+                    f"!!! Invalid PORTAGE_CGROUP_MEMORY_HIGH value: '{memory_high}'\n",
+                    level=logging.ERROR,
+                    noiselevel=-1,
+                )
+                memory_high = None
+
+        self._cgroup = JobCgroup.create(
+            str(self.pkg.cpv),
+            cpu_weight=settings.get("PORTAGE_CGROUP_CPU_WEIGHT") or None,
+            io_weight=settings.get("PORTAGE_CGROUP_IO_WEIGHT") or None,
+            memory_high=memory_high,
+        )
+        if self._cgroup is not None:
+            settings["PORTAGE_CGROUP"] = self._cgroup.path
+
+    def _destroy_cgroup(self):
+        """
+        Log the resource usage of the build, record it in the build
+        statistics, and kill any processes that remain in the cgroup.
+        """
+        cgroup = self._cgroup
+        if cgroup is None:
+            return
+        self._cgroup = None
+        self.settings.pop("PORTAGE_CGROUP", None)
+
+        usage = cgroup.accounting()
+        cgroup.destroy()
+        for key in ("cpu_time", "memory_peak", "io_read", "io_write"):
+            if key in usage:
+                self._build_stats[key] = round(usage[key], 1)
+        msg = format_accounting(usage)
+        if msg is not None:
+            self.scheduler.output(
+                f">>> {msg}\n",
+                log_path=self.settings.get("PORTAGE_LOG_FILE"),
+                background=self.background,
+            )
+
     def _build_exit(self, build):
+        self._destroy_cgroup()
         if self._default_exit(build) != os.EX_OK:
             self._async_unlock_builddir(returncode=self.returncode)
             return
 
+        if "tmpdir-usage" not in self.settings.features:
+            self._record_build_stats()
+            self._record_build_stats_exit(None)
+            return
+
+        # Measure disk usage in a subprocess, since it can take a while
+        # for large build directories.
+        self._start_task(
+            AsyncTaskFuture(
+                future=self.scheduler.run_in_executor(
+                    ForkExecutor(loop=self.scheduler), self._record_build_stats
+                )
+            ),
+            self._record_build_stats_exit,
+        )
+
+    def _record_build_stats(self):
+        settings = self.settings
+        stats = self._build_stats
+        if "tmpdir-usage" in settings.features:
+            stats["tmpdir_usage"] = dir_usage(settings["PORTAGE_BUILDDIR"])
+        log_path = settings.get("PORTAGE_LOG_FILE")
+        if log_path is not None:
+            try:
+                stats["log_size"] = os.stat(log_path).st_size
+            except OSError:
+                pass
+        BuildStats.for_root(settings["EROOT"]).add(self.pkg.cpv, stats)
+
+    def _record_build_stats_exit(self, task):
+        if task is not None:
+            self._assert_current(task)
+            if task.cancelled:
+                self._default_final_exit(task)
+                return
+
+        # Statistics are not essential, so failure to record them
+        # does not fail the build.
+        self._current_task = None
+
         buildpkg = self._buildpkg
 
         if not buildpkg:
-            self._final_exit(build)
+            self.returncode = os.EX_OK
             self.wait()
             return
 
@@ -499,7 +613,7 @@ class EbuildBuild(CompositeTask):
             self._start_task(binpkg_tasks, self._buildpkg_exit)
             return
 
-        self._final_exit(build)
+        self.returncode = os.EX_OK
         self.wait()
 
     class _RecordBinpkgInfo(AsynchronousTask):
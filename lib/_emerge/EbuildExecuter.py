@@ -1,7 +1,8 @@
-# Copyright 1999-2019 Gentoo Authors
+# Copyright 1999-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 from _emerge.EbuildPhase import EbuildPhase
+from _emerge.EbuildServer import EbuildServer
 from _emerge.TaskSequence import TaskSequence
 from _emerge.CompositeTask import CompositeTask
 import portage
@@ -13,7 +14,7 @@ from portage.eapi import (
 
 
 class EbuildExecuter(CompositeTask):
-    __slots__ = ("pkg", "settings")
+    __slots__ = ("pkg", "settings", "stats", "_ebuild_server")
 
     _phases = ("prepare", "configure", "compile", "test", "install")
 
@@ -38,6 +39,7 @@ class EbuildExecuter(CompositeTask):
             phase="setup",
             scheduler=scheduler,
             settings=settings,
+            stats=self.stats,
         )
 
         setup_phase.addExitListener(self._setup_exit)
@@ -49,11 +51,18 @@ class EbuildExecuter(CompositeTask):
             self.wait()
             return
 
+        if "ebuild-server" in self.settings.features:
+            self._ebuild_server = EbuildServer(
+                scheduler=self.scheduler, settings=self.settings
+            )
+
         unpack_phase = EbuildPhase(
             background=self.background,
+            ebuild_server=self._ebuild_server,
             phase="unpack",
             scheduler=self.scheduler,
             settings=self.settings,
+            stats=self.stats,
         )
 
         if "live" in self.settings.get("PROPERTIES", "").split():
@@ -85,10 +94,18 @@ class EbuildExecuter(CompositeTask):
             ebuild_phases.add(
                 EbuildPhase(
                     background=self.background,
+                    ebuild_server=self._ebuild_server,
                     phase=phase,
                     scheduler=self.scheduler,
                     settings=self.settings,
+                    stats=self.stats,
                 )
             )
 
         self._start_task(ebuild_phases, self._default_final_exit)
+
+    def _wait_hook(self):
+        if self.returncode is not None and self._ebuild_server is not None:
+            self._ebuild_server.stop()
+            self._ebuild_server = None
+        super()._wait_hook()
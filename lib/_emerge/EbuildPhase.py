@@ -1,4 +1,4 @@
-# Copyright 1999-2025 Gentoo Authors
+# Copyright 1999-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 import functools
@@ -7,6 +7,7 @@ import io
 import json
 import sys
 import tempfile
+import time
 
 from _emerge.AsynchronousLock import AsynchronousLock
 from _emerge.BinpkgEnvExtractor import BinpkgEnvExtractor
@@ -27,6 +28,8 @@ from portage.package.ebuild.prepare_build_dirs import (
 )
 from portage.eapi import _get_eapi_attrs
 from portage.util import writemsg, ensure_dirs
+from portage.util.build_stats import process_tree_rss
+from portage.util._async.AsyncFunction import AsyncFunction
 from portage.util._async.AsyncTaskFuture import AsyncTaskFuture
 from portage.util._async.BuildLogger import BuildLogger
 from portage.util.futures import asyncio
@@ -113,7 +116,18 @@ async def _setup_repo_revisions(settings):
 
 
 class EbuildPhase(CompositeTask):
-    __slots__ = ("actionmap", "fd_pipes", "phase", "settings") + ("_ebuild_lock",)
+    __slots__ = (
+        "actionmap",
+        "ebuild_server",
+        "fd_pipes",
+        "phase",
+        "settings",
+        "stats",
+    ) + (
+        "_ebuild_lock",
+        "_rss_sampler",
+        "_start_time",
+    )
 
     # FEATURES displayed prior to setup phase
     _features_display = (
@@ -143,6 +157,15 @@ class EbuildPhase(CompositeTask):
     # Locked phases
     _locked_phases = ("setup", "preinst", "postinst", "prerm", "postrm")
 
+    # Phases which are locked regardless of FEATURES=ebuild-locks when
+    # packages are merged concurrently, since they run on the live
+    # filesystem.
+    _concurrent_merge_locked_phases = ("preinst", "postinst", "prerm", "postrm")
+
+    # Interval for sampling the RSS of the phase process tree, when
+    # build statistics are collected.
+    _rss_sample_interval = 5  # seconds
+
     def _start(self):
         future = asyncio.ensure_future(self._async_start(), loop=self.scheduler)
         self._start_task(AsyncTaskFuture(future=future), self._async_start_exit)
@@ -274,6 +297,9 @@ class EbuildPhase(CompositeTask):
         if (
             self.phase in self._locked_phases
             and "ebuild-locks" in self.settings.features
+        ) or (
+            self.phase in self._concurrent_merge_locked_phases
+            and self.settings.get("PORTAGE_CONCURRENT_MERGES") == "1"
         ):
             eroot = self.settings["EROOT"]
             lock_path = os.path.join(eroot, portage.VDB_PATH + "-ebuild")
@@ -334,6 +360,7 @@ class EbuildPhase(CompositeTask):
         ebuild_process = EbuildProcess(
             actionmap=self.actionmap,
             background=self.background,
+            ebuild_server=self.ebuild_server,
             fd_pipes=fd_pipes,
             logfile=self._get_log_path(),
             phase=self.phase,
@@ -342,9 +369,38 @@ class EbuildPhase(CompositeTask):
         )
 
         self._start_task(ebuild_process, self._ebuild_exit)
+        if self.stats is not None:
+            self._start_time = time.monotonic()
+            self._rss_sampler = self.scheduler.call_later(
+                self._rss_sample_interval, self._sample_rss, ebuild_process
+            )
+
+    def _sample_rss(self, ebuild_process):
+        self._rss_sampler = None
+        if ebuild_process.returncode is not None or self.cancelled:
+            return
+        if ebuild_process.pid is not None:
+            rss = process_tree_rss(ebuild_process.pid)
+            if rss is not None and rss > self.stats.get("max_rss", 0):
+                self.stats["max_rss"] = rss
+        self._rss_sampler = self.scheduler.call_later(
+            self._rss_sample_interval, self._sample_rss, ebuild_process
+        )
+
+    def _record_stats(self):
+        if self._rss_sampler is not None:
+            self._rss_sampler.cancel()
+            self._rss_sampler = None
+        if self._start_time is not None:
+            self.stats.setdefault("phases", {})[self.phase] = round(
+                time.monotonic() - self._start_time, 1
+            )
+            self._start_time = None
 
     def _ebuild_exit(self, ebuild_process):
         self._assert_current(ebuild_process)
+        if self.stats is not None:
+            self._record_stats()
         if self._ebuild_lock is None:
             self._ebuild_exit_unlocked(ebuild_process)
         else:
@@ -611,6 +667,8 @@ class _PostPhaseCommands(CompositeTask):
     __slots__ = ("commands", "elog", "fd_pipes", "logfile", "phase", "settings")
 
     def _start(self):
+        from portage.package.ebuild.doebuild import _post_src_install_needed
+
         if isinstance(self.commands, list):
             cmds = [({}, self.commands)]
         else:
@@ -625,6 +683,14 @@ class _PostPhaseCommands(CompositeTask):
 
         tasks = TaskSequence()
         for kwargs, commands in cmds:
+            if kwargs.get("needed_elf"):
+                tasks.add(
+                    AsyncFunction(
+                        scheduler=self.scheduler,
+                        target=_post_src_install_needed,
+                        args=(self.settings,),
+                    )
+                )
             # Select args intended for MiscFunctionsProcess.
             kwargs = {k: v for k, v in kwargs.items() if k in ("ld_preload_sandbox",)}
             tasks.add(
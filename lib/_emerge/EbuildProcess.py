@@ -1,11 +1,11 @@
-# Copyright 1999-2025 Gentoo Authors
+# Copyright 1999-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 from _emerge.AbstractEbuildProcess import AbstractEbuildProcess
 
 
 class EbuildProcess(AbstractEbuildProcess):
-    __slots__ = ("actionmap",)
+    __slots__ = ("actionmap", "ebuild_server")
 
     def _spawn(self, args, **kwargs):
         from portage.package.ebuild.doebuild import _doebuild_spawn, _spawn_actionmap
@@ -19,7 +19,11 @@ class EbuildProcess(AbstractEbuildProcess):
 
         try:
             return _doebuild_spawn(
-                self.phase, self.settings, actionmap=actionmap, **kwargs
+                self.phase,
+                self.settings,
+                actionmap=actionmap,
+                ebuild_server=self.ebuild_server,
+                **kwargs,
             )
         finally:
             self.settings.pop("PORTAGE_PIPE_FD", None)
@@ -0,0 +1,372 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import logging
+import re
+import shlex
+import stat
+
+import portage
+from portage import os
+from portage.const import EBUILD_SH_BINARY
+from portage.localization import _
+from portage.process import AbstractProcess
+from portage.util import apply_secpass_permissions, writemsg_level
+from portage.util.futures import asyncio
+from portage.util.SlotObject import SlotObject
+
+
+class EbuildServer(SlotObject):
+    """
+    A long-lived ebuild.sh process which runs consecutive phases of one
+    package on command (FEATURES=ebuild-server), in order to avoid the
+    cost of starting bash, sandbox and sourcing the ebuild.sh libraries
+    for each phase.
+
+    The spawn method is called by doebuild.spawn in place of the spawn
+    function of a phase. It sends the phase to the server via a fifo in
+    PORTAGE_BUILDDIR/.ipc, together with the changes of its environment
+    relative to the environment of the server, and the path of the
+    terminal that SpawnProcess created for its output. The server runs
+    the phase in a subshell of its own, which behaves like a separate
+    ebuild.sh process, and the returned object represents that subshell.
+    A copy of the terminal is kept open until the subshell has opened
+    it, so that spawn does not have to wait for the server. Phase
+    completion is still reported via the exit command of the ebuild IPC
+    daemon.
+
+    Phases are only sent to the server if they would be spawned in the
+    same way as the server itself (user, sandbox, namespaces), and if
+    only variables that are known to differ between phases have changed.
+    Otherwise, the server is replaced by a new one, or the phase is
+    spawned normally.
+    """
+
+    __slots__ = (
+        "scheduler",
+        "settings",
+        "_env",
+        "_in_fd",
+        "_out_fd",
+        "_out_buf",
+        "_phase",
+        "_proc",
+        "_proc_waiter",
+        "_spawn_key",
+    )
+
+    _phases = frozenset(
+        ["unpack", "prepare", "configure", "compile", "test", "install"]
+    )
+
+    # Variables that may differ from the environment of the server. The
+    # ebuild.sh libraries do not refer to these at the top level, so it
+    # is safe to update them after the libraries have been sourced.
+    _phase_vars = frozenset(
+        [
+            "EBUILD_PHASE",
+            "EBUILD_PHASE_FUNC",
+            "PORTAGE_EBUILD_EXTRA_SOURCE",
+        ]
+    )
+
+    _start_timeout = 30  # seconds
+    _var_name_re = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+    def _ipc_path(self, name):
+        return os.path.join(self.settings["PORTAGE_BUILDDIR"], ".ipc", name)
+
+    def spawn(self, spawn_func, mycommand, env, keywords):
+        """
+        Run a phase in the server, or return None if the phase has to be
+        spawned normally. The parameters are those of the spawn function.
+
+        @rtype: AbstractProcess or None
+        """
+        # EBUILD_PHASE is not exported if PMS variables are not.
+        if self.settings.get("EBUILD_PHASE") not in self._phases:
+            return None
+
+        try:
+            args = shlex.split(mycommand)
+        except ValueError:
+            return None
+        ebuild_sh = os.path.join(
+            env["PORTAGE_BIN_PATH"], os.path.basename(EBUILD_SH_BINARY)
+        )
+        if len(args) < 2 or args[0] != ebuild_sh:
+            return None
+
+        tty = self._output_tty(keywords.get("fd_pipes"))
+        if tty is None:
+            return None
+
+        spawn_key = (
+            spawn_func,
+            {
+                k: v
+                for k, v in keywords.items()
+                if k not in ("fd_pipes", "opt_name", "returnproc")
+            },
+        )
+        if self._proc is not None and (
+            spawn_key != self._spawn_key or self._env_update(env) is None
+        ):
+            self.stop()
+
+        try:
+            if self._proc is None:
+                self._start(spawn_func, env, keywords)
+                self._spawn_key = spawn_key
+
+            env_file = self._ipc_path("server-env")
+            with open(env_file, "w") as f:
+                f.write(self._env_update(env))
+            apply_secpass_permissions(
+                env_file, gid=portage.data.portage_gid, mode=0o640
+            )
+
+            self._phase = _EbuildServerPhase(
+                self.scheduler.create_future(), self.scheduler.create_future()
+            )
+            if keywords.get("unshare_pid"):
+                # The pid that the server reports is only valid inside
+                # of its pid namespace, so signals for the phase are sent
+                # to pid-ns-init, which forwards them to the server.
+                self._phase.pid = self._proc.pid
+            os.write(
+                self._in_fd,
+                (shlex.join([env_file, tty] + args[1:]) + "\n").encode(),
+            )
+        except OSError as e:
+            writemsg_level(
+                f"!!! {_('ebuild server failed')}: {e}\n",
+                level=logging.ERROR,
+                noiselevel=-1,
+            )
+            self.stop()
+            return None
+
+        self._phase.start_waiter = asyncio.ensure_future(
+            self._wait_started(self._phase, os.dup(keywords["fd_pipes"][1])),
+            loop=self.scheduler,
+        )
+        return self._phase
+
+    @staticmethod
+    def _output_tty(fd_pipes):
+        """
+        Return the path of the terminal for stdout and stderr, if stdin
+        is /dev/null and there are no other file descriptors.
+        """
+        if not fd_pipes or sorted(fd_pipes) != [0, 1, 2]:
+            return None
+        if fd_pipes[1] != fd_pipes[2]:
+            return None
+        try:
+            if not os.path.samestat(os.fstat(fd_pipes[0]), os.stat(os.devnull)):
+                return None
+            return os.ttyname(fd_pipes[1])
+        except OSError:
+            return None
+
+    def _env_update(self, env):
+        """
+        Return bash code that turns the environment of the server into
+        the given environment, or None if this is not safe.
+        """
+        lines = []
+        for k in self._env.keys() - env.keys():
+            if k not in self._phase_vars or not self._var_name_re.match(k):
+                return None
+            lines.append(f"unset -v {k}\n")
+        for k, v in env.items():
+            if self._env.get(k) != v:
+                if k not in self._phase_vars or not self._var_name_re.match(k):
+                    return None
+                lines.append(f"export {k}={shlex.quote(v)}\n")
+        return "".join(lines)
+
+    def _start(self, spawn_func, env, keywords):
+        fifos = []
+        for name in ("server-in", "server-out"):
+            path = self._ipc_path(name)
+            try:
+                st = os.lstat(path)
+            except FileNotFoundError:
+                os.mkfifo(path)
+                st = None
+            else:
+                if not stat.S_ISFIFO(st.st_mode):
+                    os.unlink(path)
+                    os.mkfifo(path)
+                    st = None
+            apply_secpass_permissions(
+                path,
+                uid=os.getuid(),
+                gid=portage.data.portage_gid,
+                mode=0o770,
+                stat_cached=st,
+            )
+            fifos.append(path)
+
+        # Open both ends, so that opening the fifos does not block the
+        # server, and so that the input reaches EOF when it is closed.
+        self._in_fd = os.open(fifos[0], os.O_RDWR)
+        self._out_fd = os.open(fifos[1], os.O_RDWR | os.O_NONBLOCK)
+        self._out_buf = b""
+        self._env = dict(env)
+
+        null_fd = os.open(os.devnull, os.O_RDWR)
+        try:
+            server_keywords = dict(keywords)
+            server_keywords["fd_pipes"] = {0: null_fd, 1: null_fd, 2: null_fd}
+            server_keywords["returnproc"] = True
+            self._proc = spawn_func(
+                shlex.join(
+                    [
+                        os.path.join(
+                            env["PORTAGE_BIN_PATH"],
+                            os.path.basename(EBUILD_SH_BINARY),
+                        ),
+                        "__server",
+                    ]
+                    + fifos
+                ),
+                env=env,
+                **server_keywords,
+            )
+        finally:
+            os.close(null_fd)
+
+        self.scheduler.add_reader(self._out_fd, self._output_handler)
+        self._proc_waiter = asyncio.ensure_future(
+            self._proc.wait(), loop=self.scheduler
+        )
+        self._proc_waiter.add_done_callback(self._proc_exit)
+
+    async def _wait_started(self, phase, tty_fd):
+        """
+        Wait for the server to report the pid of the subshell, which
+        happens after the subshell has opened the terminal, and then
+        close the copy of the terminal that was kept open for it. If
+        the subshell does not start in time, then the server is stopped
+        and the phase fails.
+        """
+        try:
+            await asyncio.wait_for(asyncio.shield(phase.started), self._start_timeout)
+        except asyncio.TimeoutError:
+            if self._phase is phase:
+                writemsg_level(
+                    f"!!! {_('ebuild server failed')}: "
+                    f"{_('phase did not start')}\n",
+                    level=logging.ERROR,
+                    noiselevel=-1,
+                )
+                self.stop()
+        finally:
+            os.close(tty_fd)
+
+    def _output_handler(self):
+        self._read_output()
+
+    def _read_output(self):
+        try:
+            data = os.read(self._out_fd, 4096)
+        except BlockingIOError:
+            return
+        self._out_buf += data
+        while b"\n" in self._out_buf:
+            line, self._out_buf = self._out_buf.split(b"\n", 1)
+            self._handle_line(line.decode(errors="replace").split())
+
+    def _handle_line(self, words):
+        phase = self._phase
+        if phase is None or len(words) != 2:
+            return
+        if words[0] == "started":
+            phase._set_started(int(words[1]))
+        elif words[0] == "exited":
+            status = int(words[1])
+            # Convert the status of bash to that of os.waitpid.
+            phase._set_returncode(128 - status if status > 128 else status)
+            self._phase = None
+
+    def _proc_exit(self, waiter):
+        if self._proc_waiter is not waiter:
+            return
+        self._proc_waiter = None
+        if self._proc is not None:
+            self._close(returncode=waiter.result())
+
+    def _close(self, returncode=1):
+        self.scheduler.remove_reader(self._out_fd)
+        os.close(self._in_fd)
+        os.close(self._out_fd)
+        self._in_fd = self._out_fd = None
+        self._proc = None
+        self._env = None
+        self._spawn_key = None
+        if self._phase is not None:
+            self._phase._set_returncode(returncode or 1)
+            self._phase = None
+
+    def stop(self):
+        """
+        Stop the server. It exits when it reads EOF from its input, or
+        is terminated if a phase is still running.
+        """
+        proc = self._proc
+        if proc is None:
+            return
+        if self._phase is not None:
+            proc.terminate()
+        self._close()
+        if self._proc_waiter is not None:
+            # Reap the process.
+            self._proc_waiter.remove_done_callback(self._proc_exit)
+            self._proc_waiter = None
+            asyncio.ensure_future(proc.wait(), loop=self.scheduler)
+
+
+class _EbuildServerPhase(AbstractProcess):
+    """
+    The subshell of an EbuildServer that runs a phase. The pid is set
+    when the subshell has started, and signals that are sent before
+    that are delivered when it is set.
+    """
+
+    def __init__(self, future, started):
+        self.pid = None
+        self.returncode = None
+        self.started = started
+        self.start_waiter = None
+        self._future = future
+        self._pending_signals = []
+
+    def _set_started(self, pid):
+        if self.pid is None:
+            self.pid = pid
+        if not self.started.done():
+            self.started.set_result(True)
+        pending_signals, self._pending_signals = self._pending_signals, []
+        for sig in pending_signals:
+            self.send_signal(sig)
+
+    def _set_returncode(self, returncode):
+        self.returncode = returncode
+        if not self.started.done():
+            self.started.set_result(False)
+        if not self._future.done():
+            self._future.set_result(returncode)
+
+    def send_signal(self, sig):
+        if self.pid is None and self.returncode is None:
+            self._pending_signals.append(sig)
+            return
+        super().send_signal(sig)
+
+    async def wait(self):
+        if self.start_waiter is not None:
+            await self.start_waiter
+        return await self._future
@@ -0,0 +1,167 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+from portage import os
+from portage.util._cgroup import find_mount, find_own
+
+
+class MemoryAdmission:
+    """
+    Decides whether there is enough memory to start another build job,
+    given the expected peak memory usage of each job. Available memory
+    is the lower of MemAvailable in /proc/meminfo and the headroom below
+    the memory.max limits of the cgroup v2 hierarchy that contains this
+    process.
+
+    A new job is admitted if its expected peak fits into the currently
+    available memory, and if the expected peaks of all running jobs
+    plus the new job fit into the memory that was available when no
+    jobs were running. The second condition accounts for running jobs
+    that have not reached their peak yet.
+
+    A job that had to wait for memory in max_deferrals scheduling rounds
+    reserves the next start, so that smaller jobs are not admitted before
+    it indefinitely.
+    """
+
+    def __init__(
+        self,
+        meminfo_path="/proc/meminfo",
+        cgroup_path=None,
+        cgroup_root=None,
+        max_deferrals=8,
+    ):
+        """
+        @param meminfo_path: path of a file in /proc/meminfo format
+        @type meminfo_path: str
+        @param cgroup_path: path of the cgroup v2 directory of this
+                process, which is found via /proc/self/cgroup by default
+        @type cgroup_path: str
+        @param cgroup_root: mount point of the cgroup v2 hierarchy, which
+                is found via /proc/self/mounts by default
+        @type cgroup_root: str
+        @param max_deferrals: number of scheduling rounds that a job may
+                wait for memory before other jobs wait for it
+        @type max_deferrals: int
+        """
+        self._meminfo_path = meminfo_path
+        if cgroup_root is None:
+            cgroup_root = find_mount()
+        if cgroup_path is None and cgroup_root is not None:
+            cgroup_path = find_own(cgroup_root)
+        self._cgroup_root = cgroup_root
+        self._cgroup_path = cgroup_path
+        self._baseline = None
+        # { job : expected peak in bytes }
+        self._jobs = {}
+        self._max_deferrals = max_deferrals
+        # { job : number of rounds deferred }
+        self._deferrals = {}
+        self.reserved = None
+
+    def _meminfo_available(self):
+        try:
+            with open(self._meminfo_path) as f:
+                for line in f:
+                    if line.startswith("MemAvailable:"):
+                        # The value is in kB.
+                        return int(line.split()[1]) * 1024
+        except (OSError, IndexError, ValueError):
+            pass
+        return None
+
+    def _cgroup_available(self):
+        """
+        Return the smallest headroom below memory.max of the cgroup and
+        its ancestors, or None if none of them has a limit.
+        """
+        available = None
+        path = self._cgroup_path
+        if self._cgroup_root is None:
+            path = None
+        while path is not None and path.startswith(self._cgroup_root):
+            try:
+                with open(os.path.join(path, "memory.max")) as f:
+                    limit = f.read().strip()
+                with open(os.path.join(path, "memory.current")) as f:
+                    current = int(f.read().strip())
+            except (OSError, ValueError):
+                pass
+            else:
+                if limit != "max":
+                    try:
+                        headroom = max(0, int(limit) - current)
+                    except ValueError:
+                        pass
+                    else:
+                        if available is None or headroom < available:
+                            available = headroom
+            if path == self._cgroup_root:
+                break
+            path = os.path.dirname(path)
+        return available
+
+    def available(self):
+        """
+        @rtype: int or None
+        @return: available memory in bytes, or None if it is unknown
+        """
+        values = [
+            value
+            for value in (self._meminfo_available(), self._cgroup_available())
+            if value is not None
+        ]
+        return min(values) if values else None
+
+    def can_start(self, peak, job=None):
+        """
+        @param peak: expected peak memory usage of a new job in bytes
+        @type peak: int
+        @param job: the new job
+        @rtype: bool
+        @return: True if the job can be started without overcommitting
+                memory, if no other jobs are running, or if available
+                memory is unknown, unless another job reserved the next
+                start
+        """
+        if not self._jobs:
+            # Ensure forward progress.
+            return True
+        if self.reserved is not None and job != self.reserved:
+            return False
+        available = self.available()
+        if available is None:
+            return True
+        if self._baseline is not None and (
+            sum(self._jobs.values()) + peak > self._baseline
+        ):
+            return False
+        return peak <= available
+
+    def defer(self, job):
+        """
+        Record that a job has to wait for memory in this scheduling
+        round, and reserve the next start for it if it has waited for
+        max_deferrals rounds.
+        """
+        deferrals = self._deferrals.get(job, 0) + 1
+        self._deferrals[job] = deferrals
+        if self.reserved is None and deferrals >= self._max_deferrals:
+            self.reserved = job
+
+    def admitted(self, job):
+        """
+        Forget the deferrals and the reservation of a job that is started,
+        or that will not be started anymore.
+        """
+        self._deferrals.pop(job, None)
+        if job == self.reserved:
+            self.reserved = None
+
+    def job_started(self, job, peak):
+        if not self._jobs:
+            self._baseline = self.available()
+        self._jobs[job] = peak
+
+    def job_exited(self, job):
+        self._jobs.pop(job, None)
@@ -0,0 +1,110 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+from _emerge.Package import Package
+
+
+class MergeDurations:
+    """
+    Estimates how long merges take, based on the build times of previous
+    builds that are recorded in build_stats.json (see
+    portage.util.build_stats.BuildStats). The build time of a package is
+    the sum of its phase durations. Binary packages are not built, so
+    their merges are assumed to be short compared to builds.
+    """
+
+    def __init__(self, build_stats):
+        """
+        @param build_stats: statistics of previous builds for each root
+        @type build_stats: dict
+        """
+        self._build_stats = build_stats
+        self._default = {
+            root: stats.percentile(self._build_time, 0.5) or 0
+            for root, stats in build_stats.items()
+        }
+
+    def __bool__(self):
+        return any(self._build_stats.values())
+
+    @staticmethod
+    def _build_time(record):
+        phases = record.get("phases")
+        if not phases or not isinstance(phases, dict):
+            return None
+        try:
+            return sum(phases.values())
+        except TypeError:
+            return None
+
+    def estimate(self, pkg):
+        """
+        Return the estimated duration of a merge of the given package in
+        seconds. Packages without history are assumed to take the median
+        build time of the packages of the same root.
+
+        @param pkg: a package to merge
+        @type pkg: Package
+        @rtype: float
+        """
+        if pkg.type_name != "ebuild":
+            return 0
+        seconds = None
+        stats = self._build_stats.get(pkg.root)
+        if stats is not None:
+            record = stats.lookup(pkg.cpv)
+            if record is not None:
+                seconds = self._build_time(record)
+        if seconds is None:
+            seconds = self._default.get(pkg.root, 0)
+        return seconds
+
+    def critical_paths(self, graph, completed_tasks):
+        """
+        For each node of the given scheduler graph, calculate the estimated
+        duration of the longest chain of pending merges that starts with
+        that node and continues through the nodes that depend on it, which
+        is a lower bound for the time until all of those merges are done.
+        Merges with long critical paths should be started first.
+        Dependency cycles are broken arbitrarily.
+
+        @param graph: a graph in which parent nodes depend on child nodes
+        @type graph: digraph
+        @param completed_tasks: tasks that do not need to be merged
+        @type completed_tasks: set
+        @rtype: dict
+        @return: { node : seconds }
+        """
+        lengths = {}
+        in_progress = set()
+        for root in graph:
+            if root in lengths:
+                continue
+            stack = [(root, False)]
+            while stack:
+                node, expanded = stack.pop()
+                if node in lengths:
+                    continue
+                parents = graph.parent_nodes(node)
+                if expanded:
+                    in_progress.discard(node)
+                    if (
+                        isinstance(node, Package)
+                        and node.operation == "merge"
+                        and node not in completed_tasks
+                    ):
+                        seconds = self.estimate(node)
+                    else:
+                        seconds = 0
+                    lengths[node] = seconds + max(
+                        (lengths.get(parent, 0) for parent in parents), default=0
+                    )
+                elif node not in in_progress:
+                    in_progress.add(node)
+                    stack.append((node, True))
+                    stack.extend(
+                        (parent, False)
+                        for parent in parents
+                        if parent not in lengths and parent not in in_progress
+                    )
+        return lengths
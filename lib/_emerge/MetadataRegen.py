@@ -1,4 +1,4 @@
-# Copyright 1999-2025 Gentoo Authors
+# Copyright 1999-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 import asyncio
@@ -53,10 +53,22 @@ async def metadata_regen_retry(*args, max_tries=3, **kwargs) -> int:
 
 
 class MetadataRegen(AsyncScheduler):
+    # Cache modules that do not commit each update, such as sqlite,
+    # commit this many updates at a time. Pending updates are
+    # committed by portdb.flush_cache() in _cleanup, and the previous
+    # rates are restored afterwards.
+    _auxdb_sync_rate = 1000
+
     def __init__(self, portdb, cp_iter=None, consumer=None, write_auxdb=True, **kwargs):
         AsyncScheduler.__init__(self, **kwargs)
         self._portdb = portdb
         self._write_auxdb = write_auxdb
+        self._auxdb_sync_rates = []
+        if write_auxdb:
+            for auxdb in portdb.auxdb.values():
+                if not auxdb.autocommits and auxdb.sync_rate < self._auxdb_sync_rate:
+                    self._auxdb_sync_rates.append((auxdb, auxdb.sync_rate))
+                    auxdb.sync(self._auxdb_sync_rate)
         self._global_cleanse = False
         if cp_iter is None:
             cp_iter = self._iter_every_cp()
@@ -146,7 +158,7 @@ class MetadataRegen(AsyncScheduler):
         dead_nodes = {}
 
         if self._terminated.is_set():
-            portdb.flush_cache()
+            self._flush_cache()
             return
 
         if self._global_cleanse:
@@ -194,7 +206,12 @@ class MetadataRegen(AsyncScheduler):
                     except (KeyError, CacheError):
                         pass
 
-        portdb.flush_cache()
+        self._flush_cache()
+
+    def _flush_cache(self):
+        self._portdb.flush_cache()
+        for auxdb, sync_rate in self._auxdb_sync_rates:
+            auxdb.sync(sync_rate)
 
     def _task_exit(self, metadata_process):
         if metadata_process.returncode == os.EX_OK:
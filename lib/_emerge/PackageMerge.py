@@ -7,7 +7,7 @@ from portage.output import colorize
 
 
 class PackageMerge(CompositeTask):
-    __slots__ = ("is_system_pkg", "merge", "postinst_failure")
+    __slots__ = ("concurrent_merges", "is_system_pkg", "merge", "postinst_failure")
 
     def _should_show_status(self):
         return (
@@ -53,6 +53,17 @@ class PackageMerge(CompositeTask):
             msg = self._make_msg(pkg, action_desc, preposition, counter_str)
             self.merge.statusMessage(msg)
 
+        # Let ebuild phases know whether other packages may be merged at
+        # the same time, so that their phases are serialized, and QA
+        # checks of the live filesystem do not blame the wrong package.
+        settings = self.merge.settings
+        if self.concurrent_merges is not None and self.concurrent_merges(self):
+            settings["PORTAGE_CONCURRENT_MERGES"] = "1"
+            settings.backup_changes("PORTAGE_CONCURRENT_MERGES")
+        else:
+            settings.backupenv.pop("PORTAGE_CONCURRENT_MERGES", None)
+            settings.pop("PORTAGE_CONCURRENT_MERGES", None)
+
         task = self.merge.create_install_task()
         self._start_task(task, self._install_exit)
 
@@ -3,6 +3,7 @@
 
 from collections import deque
 import io
+import itertools
 import gc
 import gzip
 import logging
@@ -27,6 +28,9 @@ bad = create_color_func("BAD")
 from portage._sets import SETPREFIX
 from portage._sets.base import InternalPackageSet
 from portage.util import ensure_dirs, writemsg, writemsg_level
+from portage.util.build_stats import BuildStats
+from portage.util.digraph import incremental_digraph
+from portage.util.human_readable import bytes_to_human, human_to_bytes
 from portage.util.futures import asyncio
 from portage.util.path import first_existing
 from portage.util.SlotObject import SlotObject
@@ -56,6 +60,8 @@ from _emerge.getloadavg import getloadavg
 from _emerge._find_deep_system_runtime_deps import _find_deep_system_runtime_deps
 from _emerge._flush_elog_mod_echo import _flush_elog_mod_echo
 from _emerge.JobStatusDisplay import JobStatusDisplay
+from _emerge.MemoryAdmission import MemoryAdmission
+from _emerge.MergeDurations import MergeDurations
 from _emerge.MergeListItem import MergeListItem
 from _emerge.Package import Package
 from _emerge.PackageMerge import PackageMerge
@@ -118,6 +124,17 @@ class Scheduler(PollScheduler):
                 kwargs.pop("short_msg", None)
             emergelog(self.xterm_titles, *pargs, **kwargs)
 
+    class _later_pkgs_class(SlotObject):
+        """
+        The queued packages that come after a given position in merge
+        list order, for _dependent_on_scheduled_merges.
+        """
+
+        __slots__ = ("positions", "position", "queued")
+
+        def __contains__(self, pkg):
+            return pkg in self.queued and self.positions.get(pkg, -1) > self.position
+
     class _failed_pkg(SlotObject):
         __slots__ = ("build_dir", "build_log", "pkg", "postinst_failure", "returncode")
 
@@ -238,6 +255,29 @@ class Scheduler(PollScheduler):
             # dev-lang/rust-1.77.1: ~16 GiB
             # www-client/chromium-126.0.6478.57: ~18 GiB
             self._jobs_tmpdir_require_free_gb = 18
+        self._build_stats = {root: BuildStats.for_root(root) for root in self.trees}
+        # Assume 1 GiB for 90th percentile job size, unless there are
+        # statistics from previous builds.
+        self._jobs_tmpdir_p90_bytes = max(
+            (
+                stats.percentile("tmpdir_usage", 0.9) or 0
+                for stats in self._build_stats.values()
+            ),
+            default=0,
+        ) or (1 * 1024 * 1024 * 1024)
+        self._memory_admission = MemoryAdmission()
+        self._job_memory_cache = {}
+        # Assume the median peak memory usage of previous builds for
+        # packages without a history or a PORTAGE_JOB_MEMORY setting.
+        self._job_memory_default = max(
+            (
+                stats.percentile("memory_peak", 0.5)
+                or stats.percentile("max_rss", 0.5)
+                or 0
+                for stats in self._build_stats.values()
+            ),
+            default=0,
+        )
         self.edebug = 0
         if settings.get("PORTAGE_DEBUG", "") == "1":
             self.edebug = 1
@@ -435,8 +475,21 @@ class Scheduler(PollScheduler):
     def _set_max_jobs(self, max_jobs):
         self._max_jobs = max_jobs
         self._task_queues.jobs.max_jobs = max_jobs
+        self._task_queues.merge.max_jobs = max_jobs
+
+    def _is_exclusive_merge(self, pkg):
+        """
+        Return True if the given install or uninstall task must not run
+        concurrently with other tasks from the merge queue. Unless
+        FEATURES=parallel-install is enabled, this is the case for
+        uninstalls and for packages that have blocker relations, since
+        those can transfer files between packages. Other merges only
+        lock the vdb for short critical sections, and merges that
+        install the same files are serialized by vardbapi._merge_claims.
+        """
         if "parallel-install" in self.settings.features:
-            self._task_queues.merge.max_jobs = max_jobs
+            return False
+        return pkg.installed or any(atom.blocker for atom in pkg.validated_atoms)
 
     def _background_mode(self):
         """
@@ -512,6 +565,8 @@ class Scheduler(PollScheduler):
         return interactive_tasks
 
     def _set_graph_config(self, graph_config):
+        self._critical_order = None
+        self._merge_positions = None
         if graph_config is None:
             self._graph_config = None
             self._pkg_cache = {}
@@ -551,6 +606,12 @@ class Scheduler(PollScheduler):
                 self._pkg_cache[pkg] = pkg
             return
 
+        if not isinstance(self._digraph, incremental_digraph):
+            # _prune_digraph is called for each _choose_pkg call, so
+            # root nodes need to be tracked incrementally.
+            self._digraph = incremental_digraph(self._digraph)
+            graph_config.graph = self._digraph
+
         self._find_system_deps()
         self._prune_digraph()
         self._prevent_builddir_collisions()
@@ -660,7 +721,9 @@ class Scheduler(PollScheduler):
         Schedule a setup phase on the merge queue, in order to
         serialize unsandboxed access to the live filesystem.
         """
-        if (
+        if "parallel-install" not in self.settings.features:
+            self._task_queues.merge.add(setup_phase, exclusive=True)
+        elif (
             self._task_queues.merge.max_jobs > 1
             and "ebuild-locks" in self.settings.features
         ):
@@ -1567,6 +1630,7 @@ class Scheduler(PollScheduler):
     def _build_exit(self, build):
         self._running_tasks.pop(id(build), None)
         self._release_job_token(id(build))
+        self._memory_admission.job_exited(id(build))
         if build.returncode == os.EX_OK and self._terminated_tasks:
             # We've been interrupted, so we won't
             # add this to the merge queue.
@@ -1577,6 +1641,7 @@ class Scheduler(PollScheduler):
             merge = PackageMerge(
                 is_system_pkg=(build.pkg in self._deep_system_deps),
                 merge=build,
+                concurrent_merges=self._concurrent_merges,
                 scheduler=self._sched_iface,
             )
             # move the job token to the merge task
@@ -1591,7 +1656,9 @@ class Scheduler(PollScheduler):
                 if merge.is_system_pkg:
                     merge.addStartListener(self._system_merge_started)
             else:
-                self._task_queues.merge.add(merge)
+                self._task_queues.merge.add(
+                    merge, exclusive=self._is_exclusive_merge(build.pkg)
+                )
                 merge.addExitListener(self._merge_exit)
                 self._status_display.merges = len(self._task_queues.merge)
         else:
@@ -1741,6 +1808,8 @@ class Scheduler(PollScheduler):
         self._choose_pkg_return_early = False
         self._status_display.reset()
         self._digraph = None
+        self._critical_order = None
+        self._merge_positions = None
         self._task_queues.fetch.clear()
         self._prefetchers.clear()
         self._main_exit = None
@@ -1791,12 +1860,32 @@ class Scheduler(PollScheduler):
                 break
 
         if chosen_pkg is None:
-            later = set(self._pkg_queue)
-            for pkg in self._pkg_queue:
-                later.remove(pkg)
-                if not self._dependent_on_scheduled_merges(pkg, later):
-                    chosen_pkg = pkg
-                    break
+            critical_order = self._get_critical_order()
+            if critical_order:
+                # Start the merges that gate the longest chains of
+                # remaining merges first, in order to minimize the
+                # time that job slots are left idle at the end.
+                # Dependence on packages that come later in merge
+                # list order is still ignored, so that dependency
+                # cycles are broken where the merge list breaks them.
+                queued = set(self._pkg_queue)
+                positions = self._merge_positions
+                for pkg in critical_order:
+                    if pkg not in queued:
+                        continue
+                    later = self._later_pkgs_class(
+                        positions=positions, position=positions[pkg], queued=queued
+                    )
+                    if not self._dependent_on_scheduled_merges(pkg, later):
+                        chosen_pkg = pkg
+                        break
+            else:
+                later = set(self._pkg_queue)
+                for pkg in self._pkg_queue:
+                    later.remove(pkg)
+                    if not self._dependent_on_scheduled_merges(pkg, later):
+                        chosen_pkg = pkg
+                        break
 
         if chosen_pkg is not None:
             self._pkg_queue.remove(chosen_pkg)
@@ -1809,6 +1898,31 @@ class Scheduler(PollScheduler):
 
         return chosen_pkg
 
+    def _get_critical_order(self):
+        """
+        Return the packages of the merge list sorted by the estimated
+        durations of their critical paths, longest first, with merge
+        list order as the tie-breaker, or an empty list if there are no
+        statistics of previous builds. The estimates are based on the
+        build statistics that are loaded when the Scheduler is created,
+        and the order is calculated once per graph.
+        """
+        if self._critical_order is None:
+            self._critical_order = []
+            durations = MergeDurations(self._build_stats)
+            if durations:
+                lengths = durations.critical_paths(self._digraph, self._completed_tasks)
+                self._merge_positions = {
+                    pkg: i
+                    for i, pkg in enumerate(self._mergelist)
+                    if isinstance(pkg, Package)
+                }
+                self._critical_order = sorted(
+                    self._merge_positions,
+                    key=lambda pkg: (-lengths.get(pkg, 0), self._merge_positions[pkg]),
+                )
+        return self._critical_order
+
     def _dependent_on_scheduled_merges(self, pkg, later):
         """
         Traverse the subgraph of the given packages deep dependencies
@@ -1869,6 +1983,28 @@ class Scheduler(PollScheduler):
         temp_settings.reset()
         return temp_settings
 
+    def _concurrent_merges(self, merge):
+        """
+        Return True if other merges may run at the same time as the given
+        merge, which is starting. That is the case if another merge is
+        running or waiting in the merge queue. Otherwise, the merge is
+        made exclusive, so that merges that are queued later wait for it,
+        and its phases need not be serialized with those of others.
+        """
+        queue = self._task_queues.merge
+        if queue.max_jobs == 1:
+            return False
+        if "parallel-install" in self.settings.features:
+            # Merges are never exclusive, as before.
+            return True
+        if any(
+            task is not merge and isinstance(task, PackageMerge)
+            for task in itertools.chain(queue.running_tasks, queue.queued_tasks())
+        ):
+            return True
+        queue.make_exclusive(merge)
+        return False
+
     def _deallocate_config(self, settings):
         self._config_pool[settings["EROOT"]].append(settings)
 
@@ -1931,11 +2067,8 @@ class Scheduler(PollScheduler):
                         required_free_bytes = (
                             self._jobs_tmpdir_require_free_gb * 1024 * 1024 * 1024
                         )
-                        p90_bytes = (
-                            1 * 1024 * 1024 * 1024
-                        )  # Assume 1 GiB for 90th percentile job size
                         required_free_bytes = scale_to_jobs(
-                            required_free_bytes, p90_bytes
+                            required_free_bytes, self._jobs_tmpdir_p90_bytes
                         )
 
                         actual_free_bytes = vfs_stat.f_bsize * vfs_stat.f_bavail
@@ -2005,7 +2138,13 @@ class Scheduler(PollScheduler):
                     task = self._merge_wait_queue.popleft()
                     task.scheduler = self._sched_iface
                     self._merge_wait_scheduled.append(task)
-                    self._task_queues.merge.add(task)
+                    self._task_queues.merge.add(
+                        task,
+                        exclusive=(
+                            task.is_system_pkg
+                            or self._is_exclusive_merge(task.merge.pkg)
+                        ),
+                    )
                     task.addExitListener(self._merge_wait_exit_handler)
                     self._status_display.merges = len(self._task_queues.merge)
                     state_change += 1
@@ -2013,7 +2152,8 @@ class Scheduler(PollScheduler):
                     # parallel-install, in order to mitigate failures triggered
                     # by fragile states as in bug 256616. For other packages,
                     # continue to populate self._task_queues.merge, which will
-                    # serialize install unless parallel-install is enabled.
+                    # serialize install of packages with blocker relations
+                    # unless parallel-install is enabled.
                     if task.is_system_pkg:
                         break
 
@@ -2199,6 +2339,25 @@ class Scheduler(PollScheduler):
         @return: True if state changed, False otherwise.
         """
 
+        # Packages that have to wait for memory. Other packages that need
+        # less memory may be started meanwhile, and these are returned to
+        # the front of the queue afterwards.
+        memory_deferred = []
+        reserved = self._memory_admission.reserved
+        if reserved is not None and reserved not in self._pkg_queue:
+            # The package was dropped, for example because a dependency
+            # failed to build.
+            self._memory_admission.admitted(reserved)
+        try:
+            return self._schedule_tasks_loop(memory_deferred)
+        finally:
+            if memory_deferred:
+                self._pkg_queue[0:0] = memory_deferred
+                # Available memory may change while jobs are running,
+                # so search again on the next call.
+                self._choose_pkg_return_early = False
+
+    def _schedule_tasks_loop(self, memory_deferred):
         state_change = False
 
         while True:
@@ -2218,6 +2377,18 @@ class Scheduler(PollScheduler):
             if pkg is None:
                 return state_change
 
+            if (
+                not pkg.built
+                and self._jobs
+                and not self._memory_admission.can_start(self._job_memory(pkg), pkg)
+            ):
+                # Wait for a running job to exit, but consider the
+                # following packages meanwhile.
+                memory_deferred.append(pkg)
+                self._memory_admission.defer(pkg)
+                self._warn_job_memory(pkg)
+                continue
+
             if not pkg.installed:
                 try:
                     token = self._acquire_job_token()
@@ -2235,9 +2406,15 @@ class Scheduler(PollScheduler):
             task = self._task(pkg)
 
             if pkg.installed:
-                merge = PackageMerge(merge=task, scheduler=self._sched_iface)
+                merge = PackageMerge(
+                    merge=task,
+                    concurrent_merges=self._concurrent_merges,
+                    scheduler=self._sched_iface,
+                )
                 self._running_tasks[id(merge)] = merge
-                self._task_queues.merge.addFront(merge)
+                self._task_queues.merge.addFront(
+                    merge, exclusive=self._is_exclusive_merge(pkg)
+                )
                 merge.addExitListener(self._merge_exit)
 
             else:
@@ -2252,8 +2429,61 @@ class Scheduler(PollScheduler):
                 if pkg.built:
                     task.addExitListener(self._extract_exit)
                 else:
+                    self._memory_admission.admitted(pkg)
+                    if self._max_jobs is True or self._max_jobs > 1:
+                        self._memory_admission.job_started(
+                            id(task), self._job_memory(pkg)
+                        )
                     task.addExitListener(self._build_exit)
 
+    def _job_memory(self, pkg):
+        """
+        Return the expected peak memory usage in bytes of a build of the
+        given package, from PORTAGE_JOB_MEMORY in package.env or from
+        previous builds.
+        """
+        peak = self._job_memory_cache.get(pkg)
+        if peak is not None:
+            return peak
+
+        settings = self.pkgsettings[pkg.root]
+        settings.setcpv(pkg)
+        value = settings.get("PORTAGE_JOB_MEMORY")
+        settings.reset()
+        if value:
+            try:
+                peak = human_to_bytes(value)
+            except ValueError:
+                writemsg_level(
+                    f"!!! Invalid PORTAGE_JOB_MEMORY value for {pkg.cpv}: '{value}'\n",
+                    level=logging.ERROR,
+                    noiselevel=-1,
+                )
+        if peak is None:
+            record = self._build_stats[pkg.root].lookup(pkg.cpv)
+            if record is not None:
+                # The peak of the job cgroup (FEATURES=cgroup) does not
+                # count shared memory more than once.
+                peak = record.get("memory_peak") or record.get("max_rss")
+        if peak is None:
+            peak = self._job_memory_default
+
+        self._job_memory_cache[pkg] = peak
+        return peak
+
+    _warned_job_memory = False
+
+    def _warn_job_memory(self, pkg):
+        if self._warned_job_memory:
+            return
+        msg = (
+            f"--- insufficient memory for {pkg.cpv}, emerge job parallelism "
+            f"reduced. expected peak: {bytes_to_human(self._job_memory(pkg))}"
+        )
+        portage.writemsg_stdout(colorize("WARN", f"\n{msg}\n"), noiselevel=-1)
+        self._logger.log(msg)
+        self._warned_job_memory = True
+
     def _get_prefetcher(self, pkg):
         try:
             prefetcher = self._prefetchers.pop(pkg, None)
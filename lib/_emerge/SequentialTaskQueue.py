@@ -8,23 +8,59 @@ from portage.util.SlotObject import SlotObject
 
 
 class SequentialTaskQueue(SlotObject):
-    __slots__ = ("max_jobs", "running_tasks") + ("_scheduling", "_task_queue")
+    __slots__ = ("max_jobs", "running_tasks") + (
+        "_exclusive_tasks",
+        "_scheduling",
+        "_task_queue",
+    )
 
     def __init__(self, **kwargs):
         SlotObject.__init__(self, **kwargs)
         self._task_queue = deque()
+        self._exclusive_tasks = set()
         self.running_tasks = set()
         if self.max_jobs is None:
             self.max_jobs = 1
 
-    def add(self, task):
+    def add(self, task, exclusive=False):
+        """
+        Add a task to the end of the queue. An exclusive task does not
+        run concurrently with any other task from this queue, regardless
+        of max_jobs.
+        """
+        if exclusive:
+            self._exclusive_tasks.add(task)
         self._task_queue.append(task)
         self.schedule()
 
-    def addFront(self, task):
+    def addFront(self, task, exclusive=False):
+        if exclusive:
+            self._exclusive_tasks.add(task)
         self._task_queue.appendleft(task)
         self.schedule()
 
+    def make_exclusive(self, task):
+        """
+        Make a task exclusive after it was added, so that no other task
+        from this queue is started while it runs.
+        """
+        self._exclusive_tasks.add(task)
+
+    def queued_tasks(self):
+        """
+        Return the tasks that have not been started yet.
+        """
+        return tuple(self._task_queue)
+
+    def _can_start(self, task):
+        if not self.running_tasks:
+            return True
+        if not (self.max_jobs is True or len(self.running_tasks) < self.max_jobs):
+            return False
+        return task not in self._exclusive_tasks and self._exclusive_tasks.isdisjoint(
+            self.running_tasks
+        )
+
     def schedule(self):
         if self._scheduling:
             # Ignore any recursive schedule() calls triggered via
@@ -33,12 +69,12 @@ class SequentialTaskQueue(SlotObject):
 
         self._scheduling = True
         try:
-            while self._task_queue and (
-                self.max_jobs is True or len(self.running_tasks) < self.max_jobs
-            ):
+            while self._task_queue and self._can_start(self._task_queue[0]):
                 task = self._task_queue.popleft()
                 cancelled = getattr(task, "cancelled", None)
-                if not cancelled:
+                if cancelled:
+                    self._exclusive_tasks.discard(task)
+                else:
                     self.running_tasks.add(task)
                     task.addExitListener(self._task_exit)
                     task.start()
@@ -52,6 +88,7 @@ class SequentialTaskQueue(SlotObject):
         to actively prune it.
         """
         self.running_tasks.remove(task)
+        self._exclusive_tasks.discard(task)
         if self._task_queue:
             self.schedule()
 
@@ -61,6 +98,7 @@ class SequentialTaskQueue(SlotObject):
         """
         for task in self._task_queue:
             task.cancel()
+            self._exclusive_tasks.discard(task)
         self._task_queue.clear()
 
         for task in list(self.running_tasks):
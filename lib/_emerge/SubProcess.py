@@ -43,6 +43,10 @@ class SubProcess(AbstractPollTask):
                     )
                 elif e.errno != errno.ESRCH:
                     raise
+        elif self.isAlive() and self._proc is not None:
+            # The pid is not known yet (see EbuildServer), so let the
+            # process deliver the signal when it is.
+            self._proc.send_signal(signal.SIGTERM)
 
     def _async_wait(self):
         if self.returncode is None:
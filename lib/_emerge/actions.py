@@ -1701,7 +1701,7 @@ def _calc_depclean(
             def cmp_reference_count(node1, node2):
                 return node_refcounts[node1] - node_refcounts[node2]
 
-            graph.order.sort(key=cmp_sort_key(cmp_reference_count))
+            graph.order = sorted(graph.order, key=cmp_sort_key(cmp_reference_count))
 
             ignore_priority_range = [None]
             ignore_priority_range.extend(
@@ -2430,6 +2430,7 @@ def action_search(root_config, myopts, myfiles, spinner):
             "--usepkg" in myopts,
             "--usepkgonly" in myopts,
             search_index=myopts.get("--search-index", "y") != "n",
+            search_fulltext=myopts.get("--search-fulltext", "n") != "n",
             search_similarity=myopts.get("--search-similarity"),
             fuzzy=myopts.get("--fuzzy-search") != "n",
             regex_auto=myopts.get("--regex-search-auto") != "n",
@@ -58,7 +58,7 @@ from portage.util import ConfigProtect, new_protect_filename
 from portage.util import cmp_sort_key, writemsg, writemsg_stdout
 from portage.util import ensure_dirs, normalize_path
 from portage.util import writemsg_level, write_atomic
-from portage.util.digraph import digraph
+from portage.util.digraph import digraph, incremental_digraph
 from portage.util.futures import asyncio
 from portage.util._async.TaskScheduler import TaskScheduler
 from portage.util.portage_lru_cache import show_lru_cache_info
@@ -9079,7 +9079,7 @@ class depgraph:
 
             return node_info[node2] - node_info[node1]
 
-        mygraph.order.sort(key=cmp_sort_key(cmp_merge_preference))
+        mygraph.order = sorted(mygraph.order, key=cmp_sort_key(cmp_merge_preference))
 
     def altlist(self, reversed=DeprecationWarning):  # pylint: disable=redefined-builtin
         if reversed is not DeprecationWarning:
@@ -9237,7 +9237,7 @@ class depgraph:
             self._dynamic_config.digraph.debug_print()
             writemsg("\n", noiselevel=-1)
 
-        scheduler_graph = self._dynamic_config.digraph.copy()
+        scheduler_graph = incremental_digraph(self._dynamic_config.digraph)
 
         if "--nodeps" in self._frozen_config.myopts:
             # Preserve the package order given on the command line.
@@ -9250,7 +9250,7 @@ class depgraph:
                 scheduler_graph,
             )
 
-        mygraph = self._dynamic_config.digraph.copy()
+        mygraph = incremental_digraph(self._dynamic_config.digraph)
 
         removed_nodes = set()
 
@@ -180,6 +180,7 @@ def insert_optional_args(args):
         "--rebuild-if-unbuilt": y_or_n,
         "--rebuilt-binaries": y_or_n,
         "--root-deps": ("rdeps",),
+        "--search-fulltext": y_or_n,
         "--select": y_or_n,
         "--selective": y_or_n,
         "--use-ebuild-visibility": y_or_n,
@@ -677,6 +678,11 @@ def parse_opts(tmpcmdline, silent=False):
             "help": "modify interpretation of dependencies",
             "choices": ("True", "rdeps"),
         },
+        "--search-fulltext": {
+            "help": "Enable or disable full-text search and ranking of results "
+            + "with metadata/pkg_search_index (disabled by default)",
+            "choices": true_y_or_n,
+        },
         "--search-index": {
             "help": "Enable or disable indexed search (enabled by default)",
             "choices": y_or_n,
@@ -911,6 +917,9 @@ def parse_opts(tmpcmdline, silent=False):
     if myoptions.fuzzy_search in true_y:
         myoptions.fuzzy_search = True
 
+    if myoptions.search_fulltext in true_y:
+        myoptions.search_fulltext = True
+
     if myoptions.getbinpkg in true_y:
         myoptions.getbinpkg = True
     else:
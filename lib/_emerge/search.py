@@ -1,10 +1,14 @@
-# Copyright 1999-2020 Gentoo Authors
+# Copyright 1999-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 import difflib
 import re
 import portage
 from portage import os
+from portage.cache.index.pkg_search_index import (
+    pkg_search_index,
+    pkg_search_index_tokens,
+)
 from portage.dbapi.porttree import _parse_uri_map
 from portage.dbapi.IndexedPortdb import IndexedPortdb
 from portage.dbapi.IndexedVardb import IndexedVardb
@@ -36,6 +40,7 @@ class search:
         usepkg,
         usepkgonly,
         search_index=True,
+        search_fulltext=False,
         search_similarity=None,
         fuzzy=True,
         regex_auto=False,
@@ -57,6 +62,8 @@ class search:
         self.fuzzy = fuzzy
         self.search_similarity = 80 if search_similarity is None else search_similarity
         self.matches = {"pkg": []}
+        self._use_search_index = search_index
+        self._search_fulltext = search_fulltext
 
         self._dbs = []
 
@@ -95,6 +102,24 @@ class search:
         for group in MultiIterGroupBy(iterators):
             yield group[0]
 
+    def _load_search_indexes(self):
+        """
+        Load the pkg_search_index of each repository that has one, from
+        the same locations that IndexedPortdb uses for pkg_desc_index.
+        """
+        portdb = self.root_config.trees["porttree"].dbapi
+        indexes = []
+        for repo_path in portdb.porttrees:
+            outside_repo = os.path.join(portdb.depcachedir, repo_path.lstrip(os.sep))
+            for parent_dir in (repo_path, outside_repo):
+                index = pkg_search_index.load(
+                    os.path.join(parent_dir, "metadata", "pkg_search_index")
+                )
+                if index is not None:
+                    indexes.append(index)
+                    break
+        return indexes
+
     def _aux_get(self, *args, **kwargs):
         for db in self._dbs:
             try:
@@ -323,34 +348,87 @@ class search:
                         )
                     )
 
-        for package in self._cp_all():
-            self._spinner_update()
+        # With --search-fulltext, the search indexes are used to match
+        # the words of the search key against descriptions and other text
+        # instead of DESCRIPTION, and to rank the results. Packages that
+        # they do not contain, such as installed packages from removed
+        # repositories, are searched without an index.
+        fulltext = self._search_fulltext
+        search_indexes = []
+        if (
+            self._use_search_index
+            and fulltext
+            and not regexsearch
+            and self._portdb in self._dbs
+        ):
+            search_indexes = self._load_search_indexes()
+
+        indexed_desc_cps = set()
+        scores = {}
+        if search_indexes:
+            terms = pkg_search_index_tokens(self.searchkey)
+            for index in search_indexes:
+                for cp, score in index.search(terms).items():
+                    if score > scores.get(cp, 0):
+                        scores[cp] = score
+            if terms:
+                for index in search_indexes:
+                    indexed_desc_cps.update(index.cps)
+
+        def pkg_matches():
+            for package in self._cp_all():
+                self._spinner_update()
 
-            if match_category:
-                match_string = package[:]
-            else:
-                match_string = package.split("/")[-1]
+                if match_category:
+                    match_string = package[:]
+                else:
+                    match_string = package.split("/")[-1]
+
+                if self.searchre.search(match_string):
+                    yield ("pkg", package)
+                elif fuzzy and fuzzy_search(match_string):
+                    yield ("pkg", package)
+                elif self.searchdesc:  # DESCRIPTION searching
+                    if package in indexed_desc_cps:
+                        if package in scores:
+                            yield ("desc", package)
+                        continue
+                    # Use _first_cp to avoid an expensive visibility check,
+                    # since the visibility check can be avoided entirely
+                    # when the DESCRIPTION does not match.
+                    full_package = self._first_cp(package)
+                    if not full_package:
+                        continue
+                    try:
+                        full_desc = self._aux_get(full_package, ["DESCRIPTION"])[0]
+                    except KeyError:
+                        self._aux_get_error(full_package)
+                        continue
+                    if not self.searchre.search(full_desc):
+                        continue
 
-            if self.searchre.search(match_string):
-                yield ("pkg", package)
-            elif fuzzy and fuzzy_search(match_string):
-                yield ("pkg", package)
-            elif self.searchdesc:  # DESCRIPTION searching
-                # Use _first_cp to avoid an expensive visibility check,
-                # since the visibility check can be avoided entirely
-                # when the DESCRIPTION does not match.
-                full_package = self._first_cp(package)
-                if not full_package:
-                    continue
-                try:
-                    full_desc = self._aux_get(full_package, ["DESCRIPTION"])[0]
-                except KeyError:
-                    self._aux_get_error(full_package)
-                    continue
-                if not self.searchre.search(full_desc):
-                    continue
+                    yield ("desc", package)
+
+        def rank(match):
+            package = match[1]
+            name = (package if match_category else package.split("/")[-1]).lower()
+            key = self.searchkey.lower()
+            if name == key:
+                name_rank = 3
+            elif name.startswith(key):
+                name_rank = 2
+            elif key in name:
+                name_rank = 1
+            else:
+                name_rank = 0
+            return (-name_rank, -scores.get(package, 0), package)
 
-                yield ("desc", package)
+        if search_indexes and fulltext:
+            # Ranking requires all matches, so they are not displayed
+            # incrementally.
+            yield from sorted(pkg_matches(), key=rank)
+        else:
+            yield from pkg_matches()
 
         self.sdict = self.setconfig.getSets()
         for setname in self.sdict:
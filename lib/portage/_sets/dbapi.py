@@ -1,4 +1,4 @@
-# Copyright 2007-2025 Gentoo Authors
+# Copyright 2007-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 import glob
@@ -38,21 +38,19 @@ class EverythingSet(PackageSet):
 
     def load(self):
         myatoms = []
-        pkg_str = self._db._pkg_str
         cp_list = self._db.cp_list
-
-        for cp in self._db.cp_all():
-            for cpv in cp_list(cp):
-                # NOTE: Create SLOT atoms even when there is only one
-                # SLOT installed, in order to avoid the possibility
-                # of unwanted upgrades as reported in bug #338959.
-                pkg = pkg_str(cpv, None)
-                atom = Atom(f"{pkg.cp}:{pkg.slot}")
-                if self._filter:
-                    if self._filter(atom):
-                        myatoms.append(atom)
-                else:
+        cpvs = [cpv for cp in self._db.cp_all() for cpv in cp_list(cp)]
+
+        for pkg in self._db._pkg_str_many(cpvs, None):
+            # NOTE: Create SLOT atoms even when there is only one
+            # SLOT installed, in order to avoid the possibility
+            # of unwanted upgrades as reported in bug #338959.
+            atom = Atom(f"{pkg.cp}:{pkg.slot}")
+            if self._filter:
+                if self._filter(atom):
                     myatoms.append(atom)
+            else:
+                myatoms.append(atom)
 
         self._setAtoms(myatoms)
 
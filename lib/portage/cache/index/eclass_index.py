@@ -0,0 +1,111 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+from portage import os
+from portage import _encodings
+from portage.cache.cache_errors import CacheError
+
+
+def eclass_index_line_format(eclass, cpvs):
+    return f"{eclass} {' '.join(sorted(cpvs))}\n"
+
+
+def eclass_index_line_read(line):
+    parts = line.split()
+    if not parts:
+        return None
+    return parts[0], parts[1:]
+
+
+class eclass_index:
+    """
+    A reverse index from eclass names to the cpvs of a repository that
+    inherit them, directly or indirectly, as recorded in _eclasses_ of
+    their cache entries. The file format has one line per eclass, with
+    the eclass name followed by the cpvs.
+    """
+
+    def __init__(self):
+        self._dependents = {}
+        self._inherited = {}
+
+    @classmethod
+    def load(cls, filename):
+        """
+        @rtype: eclass_index or None
+        @return: the index stored in filename, or None if it does
+                not exist
+        """
+        index = cls()
+        try:
+            with open(filename, encoding=_encodings["repo.content"]) as f:
+                for line in f:
+                    node = eclass_index_line_read(line)
+                    if node is not None:
+                        eclass, cpvs = node
+                        for cpv in cpvs:
+                            index._inherited.setdefault(cpv, set()).add(eclass)
+                        index._dependents.setdefault(eclass, set()).update(cpvs)
+        except FileNotFoundError:
+            return None
+        return index
+
+    @classmethod
+    def from_cache(cls, cache):
+        """
+        Create an index from all entries of cache, which means that
+        every entry is read.
+        """
+        index = cls()
+        for cpv in cache:
+            try:
+                entry = cache[cpv]
+            except (KeyError, CacheError):
+                continue
+            index.add(cpv, entry.get("_eclasses_", ()))
+        return index
+
+    def __iter__(self):
+        """
+        Iterate over the cpvs that inherit at least one eclass.
+        """
+        return iter(self._inherited)
+
+    def add(self, cpv, eclasses):
+        """
+        Record that cpv inherits the given eclasses, replacing any
+        eclasses that were recorded for it before.
+        """
+        self.discard(cpv)
+        eclasses = set(eclasses)
+        if eclasses:
+            self._inherited[cpv] = eclasses
+            for eclass in eclasses:
+                self._dependents.setdefault(eclass, set()).add(cpv)
+
+    def discard(self, cpv):
+        for eclass in self._inherited.pop(cpv, ()):
+            dependents = self._dependents[eclass]
+            dependents.discard(cpv)
+            if not dependents:
+                del self._dependents[eclass]
+
+    def dependents(self, eclasses):
+        """
+        @param eclasses: eclass names
+        @type eclasses: iterable
+        @rtype: set
+        @return: the cpvs that inherit any of the eclasses
+        """
+        cpvs = set()
+        for eclass in eclasses:
+            cpvs.update(self._dependents.get(eclass, ()))
+        return cpvs
+
+    def write(self, filename):
+        from portage.util import atomic_ofstream, ensure_dirs
+
+        ensure_dirs(os.path.dirname(filename))
+        with atomic_ofstream(filename, encoding=_encodings["repo.content"]) as f:
+            for eclass in sorted(self._dependents):
+                f.write(eclass_index_line_format(eclass, self._dependents[eclass]))
@@ -1,4 +1,4 @@
-# Copyright 2014-2020 Gentoo Authors
+# Copyright 2014-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 import collections
@@ -36,6 +36,37 @@ def pkg_desc_index_line_format(cp, pkgs, desc):
     return f"{cp} {' '.join(_pkg_str(cpv).version for cpv in pkgs)}: {desc}\n"
 
 
+def pkg_desc_index_bisect(mm, key, lo=0):
+    """
+    Find a line in a buffer of lines that are sorted by key, where the
+    key of a line is the text before its first space.
+
+    @param mm: a buffer such as an mmap object
+    @param key: the encoded key
+    @type key: bytes
+    @param lo: the offset of the first line to consider
+    @type lo: int
+    @rtype: int
+    @return: the offset of the first line with a key that is not less
+            than key, or len(mm) if there is none
+    """
+    hi = len(mm)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        start = mm.rfind(b"\n", lo, mid) + 1 or lo
+        end = mm.find(b"\n", start)
+        if end == -1:
+            end = len(mm)
+        key_end = mm.find(b" ", start, end)
+        if key_end == -1:
+            key_end = end
+        if mm[start:key_end] < key:
+            lo = end + 1
+        else:
+            hi = start
+    return min(lo, len(mm))
+
+
 def pkg_desc_index_line_read(line, repo=None):
     try:
         pkgs, desc = line.split(":", 1)
@@ -0,0 +1,217 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import collections
+import math
+import mmap
+import re
+
+from portage import _encodings, _unicode_encode
+from portage.cache.index.pkg_desc_index import pkg_desc_index_bisect
+
+_magic = "pkg_search_index"
+_version = "1"
+
+_token_re = re.compile(r"[a-z0-9]+")
+
+# Tokens that are found in most HOMEPAGE values.
+_homepage_stopwords = frozenset(("com", "http", "https", "net", "org", "www"))
+
+# The score of a token for a package is the sum of the weights of the
+# fields that contain it.
+_field_weights = {
+    "name": 8,
+    "description": 4,
+    "longdescription": 2,
+    "use": 1,
+    "homepage": 1,
+}
+
+# Query terms shorter than this only match whole tokens, since prefix
+# matching would involve a large part of the index.
+_min_prefix_len = 3
+
+
+def pkg_search_index_tokens(text):
+    """
+    Split text into lowercase alphanumeric tokens.
+    """
+    return _token_re.findall(text.lower())
+
+
+class pkg_search_index_builder:
+    """
+    Collects the searchable fields of packages and writes them as an
+    inverted index, which maps tokens to the packages that contain them.
+
+    The file starts with a header line and the sorted category/package
+    names, one per line. The following lines are sorted, so that a
+    reader can find them by binary search. A line that begins with "t"
+    contains a token followed by id:score pairs. Ids refer to the
+    position of a package in the list of names.
+    """
+
+    def __init__(self):
+        self._fields = {}
+
+    def add(self, cp, description="", homepage="", longdescription=(), use=()):
+        """
+        @param cp: category/package name
+        @type cp: str
+        @param longdescription: longdescription texts from metadata.xml
+        @type longdescription: iterable
+        @param use: pairs of USE flag names and descriptions from
+                metadata.xml
+        @type use: iterable
+        """
+        pn = cp.split("/", 1)[-1]
+        tokens = {}
+        tokens["name"] = set(pkg_search_index_tokens(pn))
+        tokens["description"] = set(pkg_search_index_tokens(description))
+        tokens["homepage"] = (
+            set(pkg_search_index_tokens(homepage)) - _homepage_stopwords
+        )
+        tokens["longdescription"] = set()
+        for text in longdescription:
+            tokens["longdescription"].update(pkg_search_index_tokens(text))
+        tokens["use"] = set()
+        for flag, text in use:
+            tokens["use"].update(pkg_search_index_tokens(flag))
+            tokens["use"].update(pkg_search_index_tokens(text))
+
+        scores = collections.Counter()
+        for field, field_tokens in tokens.items():
+            for token in field_tokens:
+                scores[token] += _field_weights[field]
+        self._fields[cp] = scores
+
+    def write(self, f):
+        """
+        @param f: a text stream
+        """
+        cps = sorted(self._fields)
+        postings = collections.defaultdict(list)
+        for i, cp in enumerate(cps):
+            for token, score in self._fields[cp].items():
+                postings["t" + token].append(f"{i}:{score}")
+
+        table = "".join(f"{cp}\n" for cp in cps)
+        table_len = len(_unicode_encode(table, encoding=_encodings["repo.content"]))
+        f.write(f"{_magic} {_version} {len(cps)} {table_len}\n")
+        f.write(table)
+        # Sort by the encoded keys, which are compared by the reader.
+        for key in sorted(
+            postings,
+            key=lambda key: _unicode_encode(key, encoding=_encodings["repo.content"]),
+        ):
+            f.write(f"{key} {' '.join(postings[key])}\n")
+
+
+class pkg_search_index:
+    """
+    Reads an index written by pkg_search_index_builder. The file is
+    memory-mapped and only the lines for the query are decoded, so
+    that a search is fast regardless of the size of the repository.
+    """
+
+    def __init__(self, mm):
+        header_end = mm.find(b"\n")
+        header = mm[:header_end].decode(_encodings["repo.content"]).split()
+        if len(header) != 4 or header[0] != _magic or header[1] != _version:
+            raise ValueError("unsupported pkg_search_index")
+        count, table_len = int(header[2]), int(header[3])
+        table_start = header_end + 1
+        self._records = table_start + table_len
+        if self._records > len(mm):
+            raise ValueError("truncated pkg_search_index")
+        self.cps = (
+            mm[table_start : self._records]
+            .decode(_encodings["repo.content"])
+            .split("\n")[:count]
+        )
+        if len(self.cps) != count:
+            raise ValueError("truncated pkg_search_index")
+        self._mm = mm
+
+    @classmethod
+    def load(cls, filename):
+        """
+        @rtype: pkg_search_index or None
+        @return: the index stored in filename, or None if it does not
+                exist or is invalid
+        """
+        try:
+            with open(
+                _unicode_encode(filename, encoding=_encodings["fs"], errors="strict"),
+                "rb",
+            ) as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # ValueError is raised for an empty file.
+            return None
+        try:
+            return cls(mm)
+        except ValueError:
+            mm.close()
+            return None
+
+    def _lines(self, key, prefix=False):
+        """
+        Yield (key, values) for the line with the given key, or for all
+        lines with keys that start with it if prefix is True.
+        """
+        mm = self._mm
+        key = _unicode_encode(key, encoding=_encodings["repo.content"])
+        pos = pkg_desc_index_bisect(mm, key, self._records)
+        while pos < len(mm):
+            end = mm.find(b"\n", pos)
+            line_key, values = mm[pos:end].split(b" ", 1)
+            if line_key != key and not (prefix and line_key.startswith(key)):
+                break
+            yield line_key, values.split()
+            pos = end + 1
+
+    def search(self, terms):
+        """
+        Find the packages that match every term, where a term matches a
+        token that is equal to it or, for terms that are long enough,
+        that starts with it.
+
+        @param terms: lowercase tokens, as returned by
+                pkg_search_index_tokens
+        @type terms: list
+        @rtype: dict
+        @return: a mapping from category/package names to relevance
+                scores
+        """
+        count = len(self.cps)
+        result = None
+        for term in terms:
+            term_scores = {}
+            exact_key = _unicode_encode("t" + term, encoding=_encodings["repo.content"])
+            for key, postings in self._lines(
+                "t" + term, prefix=len(term) >= _min_prefix_len
+            ):
+                idf = math.log(1 + count / len(postings))
+                if key != exact_key:
+                    # Prefer whole-word matches.
+                    idf /= 2
+                for posting in postings:
+                    i, score = posting.split(b":")
+                    i = int(i)
+                    score = int(score) * idf
+                    if score > term_scores.get(i, 0):
+                        term_scores[i] = score
+            if result is None:
+                result = term_scores
+            else:
+                result = {
+                    i: score + result[i]
+                    for i, score in term_scores.items()
+                    if i in result
+                }
+            if not result:
+                return {}
+        if result is None:
+            return {}
+        return {self.cps[i]: score for i, score in result.items()}
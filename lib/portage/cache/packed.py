@@ -0,0 +1,262 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+"""
+A cache format that stores all entries of a repository in a single
+file, which egencache can generate alongside metadata/md5-cache.
+
+The file starts with a header (magic, version and number of entries),
+followed by an index of fixed-size records that are sorted by cpv, and
+then by the cpvs and the entries themselves. Each entry contains the
+same KEY=VALUE lines as the corresponding md5-cache file. Readers map
+the file into memory and read the whole index on first use, so that no
+system calls are needed for individual entries.
+"""
+
+import errno
+import mmap
+import struct
+import sys
+import tempfile
+
+from portage import os
+from portage import _encodings
+from portage import _unicode_decode
+from portage import _unicode_encode
+from portage.cache import cache_errors
+from portage.cache import flat_hash
+from portage.cache import fs_template
+from portage.exception import InvalidData
+from portage.versions import _pkg_str
+
+_magic = b"portage-cache-pack\n"
+_version = 1
+# magic, version, number of entries
+_header = struct.Struct(f"<{len(_magic)}sII")
+# cpv offset, cpv length, entry offset, entry length
+_record = struct.Struct("<QIQI")
+
+
+class database(fs_template.FsBased):
+    """
+    In readonly mode, entries that are missing from the pack (or all
+    entries, if the pack does not exist or has an unsupported version)
+    are read from the flat md5-cache directory, if it exists. This allows
+    a repository to ship both formats, and the pack to lag behind the
+    md5-cache directory for newly added ebuilds. Entries of the pack that
+    are stale for modified ebuilds are not detected here, since that
+    requires the ebuild hash, so portdbapi validates the entry of the
+    fallback database in that case.
+
+    In writable mode, all entries are loaded into memory and the pack is
+    rewritten by commit(). Individual updates do not trigger a commit,
+    since that would rewrite the whole file for each entry.
+    """
+
+    autocommits = False
+    flat_label = "metadata/md5-cache"
+
+    def __init__(self, *args, **config):
+        super().__init__(*args, **config)
+        self._path = os.path.join(self.location, self.label.lstrip(os.path.sep))
+        write_keys = set(self._known_keys)
+        write_keys.add("_eclasses_")
+        write_keys.add(f"_{self.validation_chf}_")
+        self._write_keys = sorted(write_keys)
+        self._mmap = None
+        self._count = 0
+        self._index = None
+        self._fallback = None
+        self._entries = None
+        self._dirty = False
+        if self.readonly:
+            self._open()
+            flat_dir = os.path.join(self.location, self.flat_label)
+            if os.path.isdir(flat_dir):
+                self._fallback = flat_hash.md5_database(
+                    self.location, self.flat_label, self._known_keys, readonly=True
+                )
+        else:
+            self.sync_rate = sys.maxsize
+            self._open()
+            try:
+                self._entries = dict(self._load())
+            finally:
+                if self._mmap is not None:
+                    self._mmap.close()
+                    self._mmap = None
+                self._index = None
+
+    @property
+    def fallback(self):
+        """
+        The database of the flat md5-cache directory, or None if it does
+        not exist or the database is writable.
+        """
+        return self._fallback
+
+    def _open(self):
+        try:
+            with open(
+                _unicode_encode(self._path, encoding=_encodings["fs"], errors="strict"),
+                "rb",
+            ) as f:
+                m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file.
+            return
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise cache_errors.InitializationError(self.__class__, e)
+            return
+
+        if len(m) >= _header.size:
+            magic, version, count = _header.unpack_from(m)
+            if (
+                magic == _magic
+                and version == _version
+                and len(m) >= _header.size + count * _record.size
+            ):
+                self._mmap = m
+                self._count = count
+                return
+        # Treat a corrupt pack or a pack from a newer version like a
+        # missing one.
+        m.close()
+
+    def _read_index(self):
+        """
+        Return a dict that maps each cpv in the pack to the start and
+        end offsets of its entry. The index is read with a single pass over
+        the records, the first time that it is needed.
+        """
+        if self._index is None:
+            m = self._mmap
+            index = {}
+            if m is not None:
+                for ko, kl, do, dl in _record.iter_unpack(
+                    m[_header.size : _header.size + self._count * _record.size]
+                ):
+                    index[_unicode_decode(m[ko : ko + kl], errors="replace")] = (
+                        do,
+                        do + dl,
+                    )
+            self._index = index
+        return self._index
+
+    def _load(self):
+        """
+        Generate (cpv, entry) pairs from the pack, in sorted order.
+        """
+        for cpv, (start, end) in self._read_index().items():
+            yield cpv, self._mmap[start:end]
+
+    def _getitem(self, cpv):
+        if self._entries is not None:
+            data = self._entries.get(cpv)
+        else:
+            data = self._read_index().get(cpv)
+            if data is not None:
+                data = self._mmap[data[0] : data[1]]
+        if data is None:
+            if self._fallback is not None:
+                return self._fallback._getitem(cpv)
+            raise KeyError(cpv)
+        lines = _unicode_decode(
+            data, encoding=_encodings["repo.content"], errors="replace"
+        ).split("\n")
+        if not lines[-1]:
+            lines.pop()
+        try:
+            return dict(x.split("=", 1) for x in lines)
+        except ValueError as e:
+            raise cache_errors.CacheCorruption(cpv, e)
+
+    def _setitem(self, cpv, values):
+        lines = []
+        for k in self._write_keys:
+            v = values.get(k)
+            if not v:
+                continue
+            lines.append(f"{k}={v}\n")
+        self._entries[cpv] = _unicode_encode(
+            "".join(lines),
+            encoding=_encodings["repo.content"],
+            errors="backslashreplace",
+        )
+        self._dirty = True
+
+    def _delitem(self, cpv):
+        try:
+            del self._entries[cpv]
+        except KeyError:
+            raise KeyError(cpv)
+        self._dirty = True
+
+    def __contains__(self, cpv):
+        try:
+            self._getitem(cpv)
+        except (KeyError, cache_errors.CacheError):
+            return False
+        return True
+
+    def __iter__(self):
+        if self._entries is not None:
+            keys = list(self._entries)
+        else:
+            keys = list(self._read_index())
+            if self._fallback is not None:
+                seen = set(keys)
+                keys.extend(cpv for cpv in self._fallback if cpv not in seen)
+        for cpv in keys:
+            try:
+                yield _pkg_str(cpv)
+            except InvalidData:
+                continue
+
+    def commit(self):
+        if self.readonly or not self._dirty:
+            return
+        entries = sorted(
+            (_unicode_encode(cpv, errors="replace"), data)
+            for cpv, data in self._entries.items()
+        )
+        records = []
+        blobs = []
+        offset = _header.size + len(entries) * _record.size
+        for key, _data in entries:
+            records.append([offset, len(key)])
+            blobs.append(key)
+            offset += len(key)
+        for record, (_key, data) in zip(records, entries):
+            record.extend((offset, len(data)))
+            blobs.append(data)
+            offset += len(data)
+
+        self._ensure_dirs(self.label)
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(self._path),
+                prefix=os.path.basename(self._path) + ".",
+            )
+        except OSError as e:
+            raise cache_errors.CacheCorruption(self._path, e)
+        try:
+            with open(fd, "wb") as f:
+                f.write(_header.pack(_magic, _version, len(entries)))
+                f.writelines(_record.pack(*record) for record in records)
+                f.writelines(blobs)
+            self._ensure_access(tmp_path)
+            os.rename(tmp_path, self._path)
+        except OSError as e:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise cache_errors.CacheCorruption(self._path, e)
+        self._dirty = False
+
+
+class md5_database(database):
+    validation_chf = "md5"
+    store_eclass_paths = False
@@ -1,4 +1,4 @@
-# Copyright 1999-2023 Gentoo Authors
+# Copyright 1999-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 import collections
@@ -23,6 +23,10 @@ class database(fs_template.FsBased):
     # to calculate the number of pages requested, according to the following
     # equation: cache_bytes = page_bytes * page_count
     cache_bytes = 1024 * 1024 * 10
+    # The rollback journal allows readers without write access to the
+    # directory. Writable instances set it, so that a database that was
+    # used by wal_database is converted back.
+    journal_mode = "DELETE"
 
     _connection_info_entry = collections.namedtuple(
         "_connection_info_entry", ("connection", "cursor", "pid")
@@ -46,12 +50,18 @@ class database(fs_template.FsBased):
 
         config.setdefault("autocommit", self.autocommits)
         config.setdefault("cache_bytes", self.cache_bytes)
+        config.setdefault("journal_mode", self.journal_mode)
         config.setdefault("synchronous", self.synchronous)
         # Set longer timeout for throwing a "database is locked" exception.
         # Default timeout in sqlite3 module is 5.0 seconds.
         config.setdefault("timeout", 15)
         self._config = config
         self._db_connection_info = None
+        # Updates that have not been written yet. The values are None
+        # for deleted entries. They are written in a single
+        # transaction by commit(), which template.database calls
+        # according to sync_rate.
+        self._pending = {}
 
     def __getstate__(self):
         state = self.__dict__.copy()
@@ -60,6 +70,8 @@ class database(fs_template.FsBased):
         state["_db_module"] = None
         state["_db_error"] = None
         state["_db_connection_info"] = None
+        # Pending updates are written by the instance that made them.
+        state["_pending"] = {}
         return state
 
     def __setstate__(self, state):
@@ -109,6 +121,9 @@ class database(fs_template.FsBased):
         # 	os.unlink(self._dbpath)
         connection_kwargs = {}
         connection_kwargs["timeout"] = config["timeout"]
+        # Transactions are started explicitly by commit(), so that the
+        # write lock is only held while pending updates are written.
+        connection_kwargs["isolation_level"] = None
         try:
             if not self.readonly:
                 self._ensure_dirs()
@@ -128,6 +143,8 @@ class database(fs_template.FsBased):
                 )
             self._db_init_cache_size(config["cache_bytes"])
             self._db_init_synchronous(config["synchronous"])
+            if not self.readonly:
+                self._db_init_journal_mode(config["journal_mode"])
             self._db_init_structures()
         except self._db_error as e:
             raise cache_errors.InitializationError(self.__class__, e)
@@ -157,6 +174,24 @@ class database(fs_template.FsBased):
 
         self._db_table["packages"]["create"] = " ".join(create_statement)
 
+        # The queries are parameterized, so that the sqlite3 module
+        # reuses the prepared statements from its statement cache.
+        package_key = self._db_table["packages"]["package_key"]
+        self._db_queries = {
+            "select": "SELECT %s FROM %s WHERE %s=?"
+            % (",".join(self._allowed_keys), mytable, package_key),
+            "contains": "SELECT %s FROM %s WHERE %s=?"
+            % (self._db_table["packages"]["package_id"], mytable, package_key),
+            "replace": "REPLACE INTO %s (%s) VALUES (%s)"
+            % (
+                mytable,
+                ",".join([package_key] + self._allowed_keys),
+                ",".join("?" * (len(self._allowed_keys) + 1)),
+            ),
+            "delete": f"DELETE FROM {mytable} WHERE {package_key}=?",
+            "keys": f"SELECT {package_key} FROM {mytable}",
+        }
+
         cursor = self._db_cursor
         for k, v in self._db_table.items():
             if self._db_table_exists(v["table_name"]):
@@ -182,18 +217,15 @@ class database(fs_template.FsBased):
         """return true/false dependent on a tbl existing"""
         cursor = self._db_cursor
         cursor.execute(
-            'SELECT name FROM sqlite_master WHERE type="table" AND name=%s'
-            % self._db_escape_string(table_name)
+            'SELECT name FROM sqlite_master WHERE type="table" AND name=?',
+            (table_name,),
         )
         return len(cursor.fetchall()) == 1
 
     def _db_table_get_create(self, table_name):
         """return true/false dependent on a tbl existing"""
         cursor = self._db_cursor
-        cursor.execute(
-            "SELECT sql FROM sqlite_master WHERE name=%s"
-            % self._db_escape_string(table_name)
-        )
+        cursor.execute("SELECT sql FROM sqlite_master WHERE name=?", (table_name,))
         return cursor.fetchall()[0][0]
 
     def _db_validate_create_statement(self, statement):
@@ -265,16 +297,27 @@ class database(fs_template.FsBased):
                 + synchronous,
             )
 
+    def _db_init_journal_mode(self, journal_mode):
+        cursor = self._db_cursor
+        cursor.execute(f"PRAGMA journal_mode = {journal_mode}")
+        # The result is the journal mode that is actually used, which
+        # may differ if the filesystem does not support WAL. That is
+        # not an error, since the cache still works with the default.
+        cursor.fetchall()
+        del cursor
+
     def _getitem(self, cpv):
+        try:
+            values = self._pending[cpv]
+        except KeyError:
+            pass
+        else:
+            if values is None:
+                raise KeyError(cpv)
+            return dict(zip(self._allowed_keys, values[1:]))
+
         cursor = self._db_cursor
-        cursor.execute(
-            "select * from %s where %s=%s"
-            % (
-                self._db_table["packages"]["table_name"],
-                self._db_table["packages"]["package_key"],
-                self._db_escape_string(cpv),
-            )
-        )
+        cursor.execute(self._db_queries["select"], (cpv,))
         result = cursor.fetchall()
         if len(result) == 1:
             pass
@@ -282,78 +325,62 @@ class database(fs_template.FsBased):
             raise KeyError(cpv)
         else:
             raise cache_errors.CacheCorruption(cpv, "key is not unique")
-        result = result[0]
-        d = {}
-        allowed_keys_set = self._allowed_keys_set
-        for column_index, column_info in enumerate(cursor.description):
-            k = column_info[0]
-            if k in allowed_keys_set:
-                v = result[column_index]
-                if v is None:
-                    # This happens after a new empty column has been added.
-                    v = ""
-                d[k] = v
-
-        return d
+        # A value is None after a new empty column has been added.
+        return {
+            k: "" if v is None else v for k, v in zip(self._allowed_keys, result[0])
+        }
 
     def _setitem(self, cpv, values):
-        update_statement = []
-        update_statement.append(
-            f"REPLACE INTO {self._db_table['packages']['table_name']}"
-        )
-        update_statement.append("(")
-        update_statement.append(
-            ",".join([self._db_table["packages"]["package_key"]] + self._allowed_keys)
-        )
-        update_statement.append(")")
-        update_statement.append("VALUES")
-        update_statement.append("(")
-        values_parameters = []
-        values_parameters.append(self._db_escape_string(cpv))
+        row = [cpv]
         for k in self._allowed_keys:
-            values_parameters.append(self._db_escape_string(values.get(k, "")))
-        update_statement.append(",".join(values_parameters))
-        update_statement.append(")")
+            v = values.get(k, "")
+            row.append(v if isinstance(v, str) else str(v))
+        self._pending[cpv] = tuple(row)
+
+    def commit(self):
+        """
+        Write all pending updates in a single transaction.
+        """
+        if not self._pending:
+            return
+        replace = []
+        delete = []
+        for cpv, values in self._pending.items():
+            if values is None:
+                delete.append((cpv,))
+            else:
+                replace.append(values)
+        connection = self._db_connection
         cursor = self._db_cursor
         try:
-            s = " ".join(update_statement)
-            cursor.execute(s)
+            # Acquire the write lock immediately, since a deferred
+            # transaction could fail to upgrade its lock without
+            # waiting for the timeout.
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                if delete:
+                    cursor.executemany(self._db_queries["delete"], delete)
+                if replace:
+                    cursor.executemany(self._db_queries["replace"], replace)
+            except BaseException:
+                connection.rollback()
+                raise
+            connection.commit()
         except self._db_error as e:
-            writemsg(f"{cpv}: {str(e)}\n")
+            writemsg(f"{self._dbpath}: {str(e)}\n")
             raise
-
-    def commit(self):
-        self._db_connection.commit()
+        self._pending.clear()
 
     def _delitem(self, cpv):
-        cursor = self._db_cursor
-        cursor.execute(
-            "DELETE FROM %s WHERE %s=%s"
-            % (
-                self._db_table["packages"]["table_name"],
-                self._db_table["packages"]["package_key"],
-                self._db_escape_string(cpv),
-            )
-        )
+        self._pending[cpv] = None
 
     def __contains__(self, cpv):
+        try:
+            return self._pending[cpv] is not None
+        except KeyError:
+            pass
         cursor = self._db_cursor
-        cursor.execute(
-            " ".join(
-                [
-                    "SELECT %s FROM %s"
-                    % (
-                        self._db_table["packages"]["package_id"],
-                        self._db_table["packages"]["table_name"],
-                    ),
-                    "WHERE %s=%s"
-                    % (
-                        self._db_table["packages"]["package_key"],
-                        self._db_escape_string(cpv),
-                    ),
-                ]
-            )
-        )
+        cursor.execute(self._db_queries["contains"], (cpv,))
         result = cursor.fetchall()
         if len(result) == 0:
             return False
@@ -363,16 +390,23 @@ class database(fs_template.FsBased):
 
     def __iter__(self):
         """generator for walking the dir struct"""
+        self.commit()
         cursor = self._db_cursor
-        cursor.execute(
-            "SELECT %s FROM %s"
-            % (
-                self._db_table["packages"]["package_key"],
-                self._db_table["packages"]["table_name"],
-            )
-        )
+        cursor.execute(self._db_queries["keys"])
         result = cursor.fetchall()
         key_list = [x[0] for x in result]
         del result
         while key_list:
             yield key_list.pop()
+
+
+class wal_database(database):
+    """
+    A sqlite database in WAL journal mode, where readers do not block a
+    writer and a writer does not block readers, so that concurrent
+    processes that use the same cache only wait for each other while
+    they commit. This requires write access to the directory for readers
+    as well, since they need the -shm file.
+    """
+
+    journal_mode = "WAL"
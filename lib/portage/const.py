@@ -171,6 +171,7 @@ SUPPORTED_FEATURES = frozenset(
         "candy",
         "case-insensitive-fs",
         "ccache",
+        "cgroup",
         "chflags",
         "clean-logs",
         "collision-protect",
@@ -178,12 +179,14 @@ SUPPORTED_FEATURES = frozenset(
         "compressdebug",
         "compress-index",
         "config-protect-if-modified",
+        "contents-index",
         "dedupdebug",
         "digest",
         "distcc",
         "distlocks",
         "downgrade-backup",
         "ebuild-locks",
+        "ebuild-server",
         "fail-clean",
         "fakeroot",
         "fixlafiles",
@@ -215,6 +218,7 @@ SUPPORTED_FEATURES = frozenset(
         "nostrip",
         "notitles",
         "packdebug",
+        "parallel-checksums",
         "parallel-fetch",
         "parallel-install",
         "pid-sandbox",
@@ -239,6 +243,7 @@ SUPPORTED_FEATURES = frozenset(
         "suidctl",
         "test",
         "test-fail-continue",
+        "tmpdir-usage",
         "unknown-features-filter",
         "unknown-features-warn",
         "unmerge-backup",
@@ -1,17 +1,20 @@
-# Copyright 2014-2020 Gentoo Authors
+# Copyright 2014-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
+import collections
 import errno
 import functools
+import mmap
 import operator
 import os
 
 import portage
-from portage import _encodings
+from portage import _encodings, _unicode_encode
 from portage.dep import Atom
 from portage.exception import FileNotFound
 from portage.cache.index.IndexStreamIterator import IndexStreamIterator
 from portage.cache.index.pkg_desc_index import (
+    pkg_desc_index_bisect,
     pkg_desc_index_line_read,
     pkg_desc_index_node,
 )
@@ -28,11 +31,23 @@ class IndexedPortdb:
     For performance reasons, the match method only supports package
     name and version constraints. For the same reason, the xmatch
     method is not implemented.
+
+    By default, the index is loaded into memory by the first cp_all
+    call. In streaming mode, cp_all reads the index files sequentially
+    without keeping the results, and match and aux_get find lines by
+    binary search in the memory-mapped files, so that memory usage is
+    bounded regardless of the size of the repositories. The packages
+    that were used most recently are kept in an LRU cache of lru_size
+    entries.
     """
 
     # Match returns unordered results.
     match_unordered = True
 
+    # If streaming is None, then the streaming mode is used when the
+    # total size of the index files exceeds this many bytes.
+    _streaming_threshold = 8 * 1024 * 1024
+
     _copy_attrs = (
         "cpv_exists",
         "findname",
@@ -42,7 +57,15 @@ class IndexedPortdb:
         "_have_root_eclass_dir",
     )
 
-    def __init__(self, portdb):
+    def __init__(self, portdb, streaming=None, lru_size=1024):
+        """
+        @param streaming: whether to use the streaming mode, or None
+                to use it only if the index files are large
+        @type streaming: bool or None
+        @param lru_size: the number of packages that are cached in the
+                streaming mode
+        @type lru_size: int
+        """
         self._portdb = portdb
 
         for k in self._copy_attrs:
@@ -51,37 +74,83 @@ class IndexedPortdb:
         self._desc_cache = None
         self._cp_map = None
         self._unindexed_cp_map = None
+        self._streaming = streaming
+        self._lru = collections.OrderedDict()
+        self._lru_size = lru_size
+        self._index_maps = None
+        self._index_missing = None
+
+    def _index_files(self):
+        """
+        Yield (repo_path, repo_name, filename) for each repository, where
+        filename is None if the repository does not have an index.
+        """
+        for repo_path in self._portdb.porttrees:
+            outside_repo = os.path.join(
+                self._portdb.depcachedir, repo_path.lstrip(os.sep)
+            )
+            repo_name = self._portdb.getRepositoryName(repo_path)
+            for parent_dir in (repo_path, outside_repo):
+                filename = os.path.join(parent_dir, "metadata", "pkg_desc_index")
+                try:
+                    os.stat(filename)
+                except OSError as e:
+                    if e.errno not in (errno.ENOENT, errno.ESTALE):
+                        raise
+                else:
+                    break
+            else:
+                filename = None
+            yield repo_path, repo_name, filename
+
+    def _is_streaming(self):
+        if self._streaming is None:
+            size = 0
+            for _repo_path, _repo_name, filename in self._index_files():
+                if filename is not None:
+                    size += os.stat(filename).st_size
+            self._streaming = size > self._streaming_threshold
+        return self._streaming
 
     def _init_index(self):
+        if self._is_streaming():
+            return self._stream_index()
+
         cp_map = {}
         desc_cache = {}
         self._desc_cache = desc_cache
         self._cp_map = cp_map
-        index_missing = []
+        return self._iter_index(cp_map, desc_cache)
 
-        streams = []
-        for repo_path in self._portdb.porttrees:
-            outside_repo = os.path.join(
-                self._portdb.depcachedir, repo_path.lstrip(os.sep)
-            )
-            filenames = []
-            for parent_dir in (repo_path, outside_repo):
-                filenames.append(os.path.join(parent_dir, "metadata", "pkg_desc_index"))
+    def _stream_index(self):
+        """
+        Yield every cp like _iter_index, without keeping them.
+        """
+        for cp, cp_list, desc_cache in self._iter_cp_groups():
+            # The versions from repositories without an index are
+            # only listed by _lookup.
+            if not self._index_missing:
+                self._lru_add(cp, (cp_list, desc_cache))
+            yield cp
 
-            repo_name = self._portdb.getRepositoryName(repo_path)
+    def _iter_index(self, cp_map, desc_cache):
+        for cp, cp_list, cp_desc_cache in self._iter_cp_groups():
+            cp_map[cp] = cp_list
+            desc_cache.update(cp_desc_cache)
+            yield cp
 
+    def _open_streams(self):
+        streams = []
+        index_missing = []
+        for repo_path, repo_name, filename in self._index_files():
             try:
-                f = None
-                for filename in filenames:
-                    try:
-                        f = open(filename, encoding=_encodings["repo.content"])
-                    except OSError as e:
-                        if e.errno not in (errno.ENOENT, errno.ESTALE):
-                            raise
-                    else:
-                        break
-
-                if f is None:
+                if filename is None:
+                    raise FileNotFound(repo_path)
+                try:
+                    f = open(filename, encoding=_encodings["repo.content"])
+                except OSError as e:
+                    if e.errno not in (errno.ENOENT, errno.ESTALE):
+                        raise
                     raise FileNotFound(filename)
 
                 streams.append(
@@ -94,9 +163,19 @@ class IndexedPortdb:
                 )
             except FileNotFound:
                 index_missing.append(repo_path)
+        return streams, index_missing
+
+    def _iter_cp_groups(self):
+        """
+        Yield (cp, cp_list, desc_cache) for each package in all
+        repositories, in sorted order.
+        """
+        streams, index_missing = self._open_streams()
+        self._index_missing = index_missing
 
         if index_missing:
-            self._unindexed_cp_map = {}
+            if not self._streaming:
+                self._unindexed_cp_map = {}
 
             class _NonIndexedStream:
                 def __iter__(self_):
@@ -104,7 +183,8 @@ class IndexedPortdb:
                         # Don't call cp_list yet, since it's a waste
                         # if the package name does not match the current
                         # search.
-                        self._unindexed_cp_map[cp] = index_missing
+                        if self._unindexed_cp_map is not None:
+                            self._unindexed_cp_map[cp] = index_missing
                         yield pkg_desc_index_node(cp, (), None)
 
             streams.append(iter(_NonIndexedStream()))
@@ -116,21 +196,86 @@ class IndexedPortdb:
                 cp_group_iter = MultiIterGroupBy(streams, key=operator.attrgetter("cp"))
 
             for cp_group in cp_group_iter:
-                new_cp = None
-                cp_list = cp_map.get(cp_group[0].cp)
-                if cp_list is None:
-                    new_cp = cp_group[0].cp
-                    cp_list = []
-                    cp_map[cp_group[0].cp] = cp_list
-
+                cp_list = []
+                desc_cache = {}
                 for entry in cp_group:
                     cp_list.extend(entry.cpv_list)
                     if entry.desc is not None:
                         for cpv in entry.cpv_list:
                             desc_cache[cpv] = entry.desc
 
-                if new_cp is not None:
-                    yield cp_group[0].cp
+                yield cp_group[0].cp, cp_list, desc_cache
+
+    def _lru_add(self, cp, value):
+        self._lru[cp] = value
+        self._lru.move_to_end(cp)
+        if len(self._lru) > self._lru_size:
+            self._lru.popitem(last=False)
+
+    def _lookup(self, cp):
+        """
+        Return (cp_list, desc_cache) for cp without loading the whole
+        index, from the LRU cache or by binary search in the index files.
+        """
+        try:
+            value = self._lru[cp]
+        except KeyError:
+            pass
+        else:
+            self._lru.move_to_end(cp)
+            return value
+
+        if self._index_maps is None:
+            self._index_maps = []
+            self._index_missing = []
+            for repo_path, repo_name, filename in self._index_files():
+                if filename is None:
+                    self._index_missing.append(repo_path)
+                    continue
+                try:
+                    with open(
+                        _unicode_encode(
+                            filename, encoding=_encodings["fs"], errors="strict"
+                        ),
+                        "rb",
+                    ) as f:
+                        self._index_maps.append(
+                            (
+                                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ),
+                                repo_name,
+                            )
+                        )
+                except (OSError, ValueError):
+                    # ValueError is raised for an empty file.
+                    self._index_missing.append(repo_path)
+
+        cp_list = []
+        desc_cache = {}
+        key = _unicode_encode(cp, encoding=_encodings["repo.content"])
+        for mm, repo_name in self._index_maps:
+            start = pkg_desc_index_bisect(mm, key)
+            end = mm.find(b"\n", start)
+            if end == -1:
+                end = len(mm)
+            line = mm[start:end]
+            if line.split(b" ", 1)[0] != key:
+                continue
+            entry = pkg_desc_index_line_read(
+                line.decode(_encodings["repo.content"], errors="replace"),
+                repo=repo_name,
+            )
+            if entry is None:
+                continue
+            cp_list.extend(entry.cpv_list)
+            for cpv in entry.cpv_list:
+                desc_cache[cpv] = entry.desc
+
+        if self._index_missing:
+            cp_list.extend(self._portdb.cp_list(cp, mytree=self._index_missing))
+
+        value = (cp_list, desc_cache)
+        self._lru_add(cp, value)
+        return value
 
     def cp_all(self, sort=True):
         """
@@ -141,6 +286,23 @@ class IndexedPortdb:
             return self._init_index()
         return iter(sorted(self._cp_map)) if sort else iter(self._cp_map)
 
+    def _lookup_cp_list(self, cp):
+        if self._cp_map is None:
+            return self._lookup(cp)[0] or None
+
+        cp_list = self._cp_map.get(cp)
+        if cp_list is None:
+            return None
+
+        if self._unindexed_cp_map is not None:
+            try:
+                unindexed = self._unindexed_cp_map.pop(cp)
+            except KeyError:
+                pass
+            else:
+                cp_list.extend(self._portdb.cp_list(cp, mytree=unindexed))
+        return cp_list
+
     def match(self, atom):
         """
         For performance reasons, only package name and version
@@ -149,26 +311,22 @@ class IndexedPortdb:
         """
         if not isinstance(atom, Atom):
             atom = Atom(atom)
-        cp_list = self._cp_map.get(atom.cp)
+        cp_list = self._lookup_cp_list(atom.cp)
         if cp_list is None:
             return []
 
-        if self._unindexed_cp_map is not None:
-            try:
-                unindexed = self._unindexed_cp_map.pop(atom.cp)
-            except KeyError:
-                pass
-            else:
-                cp_list.extend(self._portdb.cp_list(atom.cp, mytree=unindexed))
-
         if atom == atom.cp:
             return cp_list[:]
         return portage.match_from_list(atom, cp_list)
 
     def aux_get(self, cpv, attrs, myrepo=None):
         if len(attrs) == 1 and attrs[0] == "DESCRIPTION":
+            if self._desc_cache is None:
+                desc_cache = self._lookup(portage.cpv_getkey(cpv))[1]
+            else:
+                desc_cache = self._desc_cache
             try:
-                return [self._desc_cache[cpv]]
+                return [desc_cache[cpv]]
             except KeyError:
                 pass
         return self._portdb.aux_get(cpv, attrs)
@@ -0,0 +1,172 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+_type_codes = {"dir": 0, "obj": 1, "dev": 2, "fif": 3}
+_type_names = ("dir", "obj", "dev", "fif")
+_EXTRA = 255
+_MD5_LEN = 16
+_NO_MD5 = bytes(_MD5_LEN)
+_MTIME_MAX = 2**63 - 1
+
+
+class CompactContents(Mapping):
+    """
+    A read-only mapping of CONTENTS paths to entry tuples, with the
+    same keys and values as the dict that dblink.getcontents used to
+    return, but a much smaller memory footprint.
+
+    Paths are split into a directory prefix and a basename. Directory
+    prefixes are interned via sys.intern, so that they are shared
+    between all instances (and with any other strings that happen to
+    be interned), and the basenames of each directory are stored in
+    a sorted tuple which is searched with bisect. Entry types, mtimes
+    and md5 digests are stored in flat arrays indexed by row, and
+    entry tuples are only created on demand. Entries that can not be
+    represented exactly this way (symlinks, unusual mtime or md5
+    strings) are stored verbatim.
+
+    Iteration yields directories in order of first appearance, and
+    the basenames within each directory in sorted order. Use the
+    copy method in order to obtain a mutable dict.
+    """
+
+    __slots__ = ("_dirs", "_extra", "_len", "_md5", "_mtimes", "_types")
+
+    def __init__(self, contents=None):
+        """
+        @param contents: A mapping of paths to entry tuples, as
+                generated by dblink.getcontents
+        @type contents: dict
+        """
+        dirs = {}
+        extra = {}
+        if contents:
+            for path in contents:
+                dirname, sep, basename = path.rpartition("/")
+                if not sep:
+                    extra[path] = contents[path]
+                    continue
+                names = dirs.get(dirname)
+                if names is None:
+                    dirname = sys.intern(dirname)
+                    names = dirs[dirname] = []
+                names.append(basename)
+
+        types = bytearray()
+        mtimes = array("q")
+        md5 = bytearray()
+        offset = 0
+        for dirname, names in dirs.items():
+            names.sort()
+            prefix = dirname + "/"
+            for basename in names:
+                path = prefix + basename
+                data = contents[path]
+                code = _type_codes.get(data[0])
+                mtime = 0
+                digest = _NO_MD5
+                if code is None:
+                    code = _EXTRA
+                elif code == 1:
+                    mtime, digest = self._encode_obj(data)
+                    if digest is None:
+                        code = _EXTRA
+                        mtime = 0
+                        digest = _NO_MD5
+                elif len(data) != 1:
+                    code = _EXTRA
+                if code == _EXTRA:
+                    extra[path] = tuple(data)
+                types.append(code)
+                mtimes.append(mtime)
+                md5 += digest
+            dirs[dirname] = (offset, tuple(names))
+            offset += len(names)
+
+        self._dirs = dirs
+        self._extra = extra
+        self._len = offset + sum(1 for path in extra if "/" not in path)
+        self._types = bytes(types)
+        self._mtimes = mtimes
+        self._md5 = bytes(md5)
+
+    @staticmethod
+    def _encode_obj(data):
+        """
+        Encode the mtime and md5 of an obj entry, or return
+        (0, None) if they would not survive a round trip.
+        """
+        if len(data) != 3:
+            return 0, None
+        mtime_str, md5_str = data[1], data[2]
+        try:
+            mtime = int(mtime_str)
+            digest = bytes.fromhex(md5_str)
+        except (TypeError, ValueError):
+            return 0, None
+        if (
+            not 0 <= mtime <= _MTIME_MAX
+            or str(mtime) != mtime_str
+            or len(digest) != _MD5_LEN
+            or digest.hex() != md5_str
+        ):
+            return 0, None
+        return mtime, digest
+
+    def _row(self, path):
+        dirname, sep, basename = path.rpartition("/")
+        if not sep:
+            return None
+        entry = self._dirs.get(dirname)
+        if entry is None:
+            return None
+        offset, names = entry
+        i = bisect_left(names, basename)
+        if i == len(names) or names[i] != basename:
+            return None
+        return offset + i
+
+    def __getitem__(self, path):
+        row = self._row(path)
+        if row is None:
+            if path in self._extra:
+                return self._extra[path]
+            raise KeyError(path)
+        code = self._types[row]
+        if code == _EXTRA:
+            return self._extra[path]
+        if code == 1:
+            start = row * _MD5_LEN
+            return (
+                "obj",
+                str(self._mtimes[row]),
+                self._md5[start : start + _MD5_LEN].hex(),
+            )
+        return (_type_names[code],)
+
+    def __contains__(self, path):
+        return self._row(path) is not None or path in self._extra
+
+    def __iter__(self):
+        for dirname, (offset, names) in self._dirs.items():
+            prefix = dirname + "/"
+            for basename in names:
+                yield prefix + basename
+        for path in self._extra:
+            if "/" not in path:
+                yield path
+
+    def __len__(self):
+        return self._len
+
+    def copy(self):
+        """
+        @rtype: dict
+        @return: A mutable dict containing the same items
+        """
+        return dict(self.items())
@@ -20,14 +20,12 @@ class ContentsCaseSensitivityManager:
             self.contains = self._contains_case_insensitive
             self.keys = self._keys_case_insensitive
 
-        self._contents_insensitive = None
         self._reverse_key_map = None
 
     def clear_cache(self):
         """
         Clear all cached contents data.
         """
-        self._contents_insensitive = None
         self._reverse_key_map = None
 
     def keys(self):
@@ -65,24 +63,23 @@ class ContentsCaseSensitivityManager:
 
     def _case_insensitive_init(self):
         """
-        Initialize data structures for case-insensitive support.
+        Initialize data structures for case-insensitive support. Only
+        the reverse key map is needed, since values are never accessed
+        through lowercase keys.
         """
-        self._contents_insensitive = {
-            k.lower(): v for k, v in self.getcontents().items()
-        }
         self._reverse_key_map = {k.lower(): k for k in self.getcontents()}
 
     def _keys_case_insensitive(self):
-        if self._contents_insensitive is None:
+        if self._reverse_key_map is None:
             self._case_insensitive_init()
-        return iter(self._contents_insensitive)
+        return iter(self._reverse_key_map)
 
     _keys_case_insensitive.__doc__ = keys.__doc__
 
     def _contains_case_insensitive(self, key):
-        if self._contents_insensitive is None:
+        if self._reverse_key_map is None:
             self._case_insensitive_init()
-        return key.lower() in self._contents_insensitive
+        return key.lower() in self._reverse_key_map
 
     _contains_case_insensitive.__doc__ = contains.__doc__
 
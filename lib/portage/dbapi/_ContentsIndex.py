@@ -0,0 +1,221 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import errno
+import mmap
+import struct
+
+from portage import _encodings, _unicode_encode, os
+from portage.util import atomic_ofstream
+
+
+class ContentsIndex:
+    """
+    A memory-mapped binary companion of the CONTENTS file in a vdb
+    entry. It contains sorted tables of all paths (including implicit
+    parent directories, relative to ROOT) and of all basenames, so
+    that ownership can be tested by binary search without parsing
+    CONTENTS. The header records the inode, size and mtime of the
+    CONTENTS file that it was generated from, and the index is
+    ignored whenever those no longer match.
+
+    File layout (all integers little-endian):
+        header: magic, st_ino, st_size, st_mtime_ns, path count,
+                basename count
+        path offsets: (path count + 1) uint32 values
+        basename offsets: (basename count + 1) uint32 values
+        path table and basename table: concatenated utf-8 strings
+    """
+
+    filename = "CONTENTS.idx"
+
+    _magic = b"PCIDX\x00\x00\x01"
+    _header = struct.Struct("<8sQQQII")
+    _offset = struct.Struct("<I")
+
+    def __init__(self, mm):
+        self._mm = mm
+        (
+            magic,
+            self._st_ino,
+            self._st_size,
+            self._st_mtime_ns,
+            path_count,
+            basename_count,
+        ) = self._header.unpack_from(mm, 0)
+        if magic != self._magic:
+            raise ValueError("bad magic")
+        offset_size = self._offset.size
+        self._paths_offsets = self._header.size
+        self._basenames_offsets = self._paths_offsets + offset_size * (path_count + 1)
+        self._tables = self._basenames_offsets + offset_size * (basename_count + 1)
+        self._path_count = path_count
+        self._basename_count = basename_count
+        end = (
+            self._tables
+            + self._offset.unpack_from(
+                mm, self._basenames_offsets + offset_size * basename_count
+            )[0]
+        )
+        if end != len(mm):
+            raise ValueError("truncated index")
+
+    @classmethod
+    def load(cls, dbdir):
+        """
+        Load the index for the given vdb entry.
+
+        @param dbdir: vdb entry directory
+        @type dbdir: str
+        @rtype: ContentsIndex or None
+        @return: the index, or None if it does not exist, is corrupt,
+                or is stale with respect to CONTENTS
+        """
+        try:
+            contents_st = os.stat(os.path.join(dbdir, "CONTENTS"))
+            with open(
+                _unicode_encode(
+                    os.path.join(dbdir, cls.filename),
+                    encoding=_encodings["fs"],
+                    errors="strict",
+                ),
+                "rb",
+            ) as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # ValueError is raised by mmap for empty files.
+            return None
+
+        try:
+            index = cls(mm)
+        except (struct.error, ValueError):
+            mm.close()
+            return None
+
+        if (index._st_ino, index._st_size, index._st_mtime_ns) != (
+            contents_st.st_ino,
+            contents_st.st_size,
+            contents_st.st_mtime_ns,
+        ):
+            index.close()
+            return None
+
+        return index
+
+    def close(self):
+        self._mm.close()
+
+    def _search(self, offsets, count, key):
+        mm = self._mm
+        tables = self._tables
+        offset_size = self._offset.size
+        lo = 0
+        hi = count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start, end = struct.unpack_from("<II", mm, offsets + offset_size * mid)
+            entry = mm[tables + start : tables + end]
+            if entry < key:
+                lo = mid + 1
+            elif entry > key:
+                hi = mid
+            else:
+                return True
+        return False
+
+    @staticmethod
+    def _encode(s):
+        try:
+            return s.encode(_encodings["repo.content"])
+        except UnicodeEncodeError:
+            return None
+
+    def contains(self, path):
+        """
+        @param path: a path relative to ROOT (but including EPREFIX),
+                as found in CONTENTS
+        @type path: str
+        @rtype: bool or None
+        @return: whether the path is contained, or None if the path
+                can not be represented in the index
+        """
+        key = self._encode(path)
+        if key is None:
+            return None
+        return self._search(self._paths_offsets, self._path_count, key)
+
+    def contains_basename(self, basename):
+        """
+        @param basename: a file name without directory components
+        @type basename: str
+        @rtype: bool or None
+        @return: whether any path with the given basename is contained,
+                or None if the basename can not be represented in the index
+        """
+        key = self._encode(basename)
+        if key is None:
+            return None
+        return self._search(self._basenames_offsets, self._basename_count, key)
+
+
+def write_contents_index(dbdir, contents, root, contents_st):
+    """
+    Write a ContentsIndex for the given vdb entry. If any of the
+    contents keys can not be encoded, then no index is written and
+    any existing index is removed.
+
+    @param dbdir: vdb entry directory
+    @type dbdir: str
+    @param contents: contents mapping, as returned by dblink.getcontents
+    @type contents: Mapping
+    @param root: ROOT
+    @type root: str
+    @param contents_st: stat result of the CONTENTS file, taken before
+            it was parsed into contents
+    @type contents_st: os.stat_result
+    """
+    root_len = len(root) - 1
+    encoding = _encodings["repo.content"]
+    try:
+        paths = sorted(x[root_len:].encode(encoding) for x in contents)
+        basenames = sorted({x.rpartition("/")[2].encode(encoding) for x in contents})
+    except UnicodeEncodeError:
+        remove_contents_index(dbdir)
+        return
+
+    def offsets(table, start):
+        result = [start]
+        for entry in table:
+            start += len(entry)
+            result.append(start)
+        return result
+
+    path_offsets = offsets(paths, 0)
+    basename_offsets = offsets(basenames, path_offsets[-1])
+
+    with atomic_ofstream(os.path.join(dbdir, ContentsIndex.filename), mode="wb") as f:
+        f.write(
+            ContentsIndex._header.pack(
+                ContentsIndex._magic,
+                contents_st.st_ino,
+                contents_st.st_size,
+                contents_st.st_mtime_ns,
+                len(paths),
+                len(basenames),
+            )
+        )
+        f.write(struct.pack(f"<{len(path_offsets)}I", *path_offsets))
+        f.write(struct.pack(f"<{len(basename_offsets)}I", *basename_offsets))
+        f.write(b"".join(paths))
+        f.write(b"".join(basenames))
+
+
+def remove_contents_index(dbdir):
+    """
+    Remove the ContentsIndex of the given vdb entry, if any.
+    """
+    try:
+        os.unlink(os.path.join(dbdir, ContentsIndex.filename))
+    except OSError as e:
+        if e.errno not in (errno.ENOENT, errno.ESTALE):
+            raise
@@ -0,0 +1,109 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import errno
+import stat
+import tempfile
+
+from portage import _encodings, _unicode_encode, os, shutil
+from portage.util.file_copy import clonefile
+
+
+class ContentsSnapshot:
+    """
+    A point-in-time copy of the regular files of an installed package,
+    made of reflinks in a temporary directory. Archivers such as
+    tar_contents read file data through the get method, so that the
+    archive remains consistent even if the live files change while it
+    is being written, and without copying any data.
+
+    Files that are not on the same filesystem as the temporary
+    directory are not copied, and all copying stops as soon as the
+    filesystem turns out to lack reflink support. The get method
+    returns None for such files, and the caller reads the live file
+    instead.
+
+    Use as a context manager, which removes the temporary directory
+    on exit.
+    """
+
+    # Errors which indicate that reflinks can not work at all.
+    _unsupported_errnos = frozenset(
+        (
+            errno.EOPNOTSUPP,
+            errno.ENOTSUP,
+            errno.ENOTTY,
+            errno.EINVAL,
+            errno.EXDEV,
+            errno.ENOSYS,
+        )
+    )
+
+    def __init__(self, contents, tmpdir):
+        """
+        @param contents: contents mapping, as returned by dblink.getcontents
+        @type contents: Mapping
+        @param tmpdir: parent directory for the snapshot, which should be
+                on the same filesystem as the installed files
+        @type tmpdir: str
+        """
+        self._contents = contents
+        self._tmpdir = tmpdir
+        self._snapshot_dir = None
+        self._paths = {}
+
+    def __enter__(self):
+        self._snapshot_dir = tempfile.mkdtemp(prefix="snapshot-", dir=self._tmpdir)
+        try:
+            self._create()
+        except BaseException:
+            self._cleanup()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._cleanup()
+
+    def __len__(self):
+        return len(self._paths)
+
+    def _cleanup(self):
+        if self._snapshot_dir is not None:
+            shutil.rmtree(self._snapshot_dir, ignore_errors=True)
+            self._snapshot_dir = None
+        self._paths.clear()
+
+    def _create(self):
+        snapshot_dev = os.stat(self._snapshot_dir).st_dev
+        for i, path in enumerate(sorted(self._contents)):
+            if self._contents[path][0] != "obj":
+                continue
+            try:
+                path_bytes = _unicode_encode(
+                    path, encoding=_encodings["fs"], errors="strict"
+                )
+            except UnicodeEncodeError:
+                continue
+            try:
+                st = os.lstat(path_bytes)
+            except OSError:
+                continue
+            if not stat.S_ISREG(st.st_mode) or st.st_dev != snapshot_dev:
+                continue
+            snapshot_path = os.path.join(self._snapshot_dir, str(i))
+            try:
+                clonefile(path_bytes, snapshot_path)
+            except OSError as e:
+                if e.errno in self._unsupported_errnos:
+                    break
+                continue
+            self._paths[path] = snapshot_path
+
+    def get(self, path):
+        """
+        @param path: a path from contents
+        @type path: str
+        @rtype: str or None
+        @return: the path of the snapshot copy, or None if there is none
+        """
+        return self._paths.get(path)
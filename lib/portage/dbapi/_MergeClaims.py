@@ -0,0 +1,142 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import errno
+
+from portage import _encodings, _unicode_decode, _unicode_encode, os
+from portage.const import CACHE_PATH
+from portage.exception import TryAgain
+from portage.locks import lockfile, unlockfile
+from portage.util import ensure_dirs, write_atomic
+
+
+class MergeClaims:
+    """
+    Records the files of merges that are in progress for a vdb, so that
+    concurrent merges do not need to hold the vdb lock for their whole
+    duration. Before it checks for file collisions, a merge claims the
+    files that it is going to install. If another merge that is still in
+    progress has claimed any of the same files, then it waits for that
+    merge to complete, so that the collision check sees the files of
+    that merge as installed, as if the merges had been serialized.
+
+    Each claim is a file listing the claimed paths, together with a lock
+    file which is held by the claiming process. A claim without a held
+    lock is left over from a process that has died, and is removed. The
+    claim files are only read and written while the vdb lock is held.
+    """
+
+    _dirname = "merge_claims"
+
+    def __init__(self, vardb):
+        self._vardb = vardb
+        self._dir = os.path.join(vardb._eroot, CACHE_PATH, self._dirname)
+        # { claim path : lock } for claims held by this process
+        self._held = {}
+
+    def _claim_path(self, cpv):
+        return os.path.join(self._dir, cpv.replace("/", ":"))
+
+    @staticmethod
+    def _read(claim_path):
+        try:
+            with open(
+                _unicode_encode(claim_path, encoding=_encodings["fs"], errors="strict"),
+                encoding=_encodings["merge"],
+                errors="replace",
+            ) as f:
+                return frozenset(f.read().splitlines())
+        except OSError as e:
+            if e.errno not in (errno.ENOENT, errno.ESTALE):
+                raise
+            return frozenset()
+
+    @staticmethod
+    def _unlink(claim_path):
+        try:
+            os.unlink(claim_path)
+        except OSError as e:
+            if e.errno not in (errno.ENOENT, errno.ESTALE):
+                raise
+
+    def _find_conflict(self, paths):
+        """
+        Return the path of a live claim that overlaps with the given
+        paths, or None. Stale claims are removed. The caller must hold
+        the vdb lock.
+        """
+        try:
+            names = os.listdir(self._dir)
+        except OSError as e:
+            if e.errno not in (errno.ENOENT, errno.ESTALE):
+                raise
+            return None
+
+        for name in names:
+            if name.startswith("."):
+                # lock files
+                continue
+            claim_path = os.path.join(self._dir, _unicode_decode(name))
+            if claim_path in self._held:
+                # Merges in this process are sequential.
+                continue
+            try:
+                lock = lockfile(claim_path, wantnewlockfile=True, flags=os.O_NONBLOCK)
+            except TryAgain:
+                pass
+            else:
+                self._unlink(claim_path)
+                unlockfile(lock)
+                continue
+            if not paths.isdisjoint(self._read(claim_path)):
+                return claim_path
+        return None
+
+    def acquire(self, cpv, paths, waiting_msg=None):
+        """
+        Claim the given paths for a merge of cpv, waiting for any
+        overlapping claims of concurrent merges to be released.
+
+        @param cpv: the package being merged
+        @type cpv: str
+        @param paths: paths relative to ROOT, without a leading slash
+        @type paths: iterable
+        @param waiting_msg: message to show before waiting
+        @type waiting_msg: str
+        """
+        paths = frozenset(paths)
+        claim_path = self._claim_path(cpv)
+        while True:
+            self._vardb.lock()
+            try:
+                conflict = self._find_conflict(paths)
+                if conflict is None:
+                    ensure_dirs(self._dir)
+                    write_atomic(
+                        claim_path, "".join(f"{path}\n" for path in sorted(paths))
+                    )
+                    self._held[claim_path] = lockfile(claim_path, wantnewlockfile=True)
+                    return
+            finally:
+                self._vardb.unlock()
+
+            # The lock of a live claim is held until its merge is
+            # complete.
+            unlockfile(
+                lockfile(conflict, wantnewlockfile=True, waiting_msg=waiting_msg)
+            )
+
+    def release(self, cpv):
+        """
+        Release the claim of a merge of cpv, if any.
+        """
+        claim_path = self._claim_path(cpv)
+        lock = self._held.pop(claim_path, None)
+        if lock is None:
+            return
+        self._vardb.lock()
+        try:
+            self._unlink(claim_path)
+            unlockfile(lock)
+        finally:
+            self._vardb.unlock()
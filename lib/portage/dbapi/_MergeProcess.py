@@ -79,12 +79,14 @@ class MergeProcess(ForkProcess):
 
     def _lock_vdb(self):
         """
-        Lock the vdb if FEATURES=parallel-install is NOT enabled,
-        otherwise do nothing. This is implemented with
-        vardbapi.lock(), which supports reentrance by the
-        subprocess that we spawn.
+        Lock the vdb for an unmerge if FEATURES=parallel-install is NOT
+        enabled, otherwise do nothing. This is implemented with
+        vardbapi.lock(), which supports reentrance by the subprocess
+        that we spawn. Merges do not need this lock, since they hold
+        slot locks and claim their files via vardbapi._merge_claims,
+        and only lock the vdb for short critical sections.
         """
-        if "parallel-install" not in self.settings.features:
+        if self.unmerge and "parallel-install" not in self.settings.features:
             self.vartree.dbapi.lock()
             self._locked_vdb = True
 
@@ -168,12 +170,11 @@ class MergeProcess(ForkProcess):
         )
         self.scheduler.add_reader(elog_reader_fd.fileno(), self._elog_output_handler)
 
-        # If a concurrent emerge process tries to install a package
-        # in the same SLOT as this one at the same time, there is an
-        # extremely unlikely chance that the COUNTER values will not be
-        # ordered correctly unless we lock the vdb here.
-        # FEATURES=parallel-install skips this lock in order to
-        # improve performance, and the risk is practically negligible.
+        # The COUNTER is allocated while the vdb is locked by
+        # counter_tick. If a concurrent emerge process tries to install
+        # a package in the same SLOT as this one at the same time, there
+        # is an extremely unlikely chance that the COUNTER values will
+        # not be ordered correctly, but the risk is practically negligible.
         self._lock_vdb()
         if not self.unmerge:
             self._counter = self.vartree.dbapi.counter_tick()
@@ -0,0 +1,179 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import errno
+import time
+
+from portage import os
+from portage.const import VCS_DIRS
+from portage.util._pickle_cache import RACY_NS, load_pickle, store_pickle
+
+
+class TreeIndex:
+    """
+    A persistent listing of the category and package directories of a
+    repository. For each category, the index holds the names of its
+    subdirectories, and for each package, the names of its ebuilds.
+    Each listing is stored along with st_mtime_ns of its directory, and
+    it is used only while that is unchanged, so that a lookup costs a
+    single stat instead of reading the directory. Listings are added
+    on demand, and store() persists them for later processes.
+    """
+
+    _version = "1"
+
+    def __init__(self, location, filename=None, removed=None):
+        """
+        @param location: path of the repository
+        @type location: str
+        @param filename: path of the file that the index is loaded from
+                and stored to, or None for an index that is not persistent
+        @type filename: str
+        @param removed: a function that is called with the path of each
+                ebuild that is found to be removed from a listing
+        @type removed: callable
+        """
+        self.location = location
+        self.filename = filename
+        self._removed = removed
+        self._categories = None
+        self._packages = None
+        self._modified = False
+
+    def _load(self):
+        index = None
+        if self.filename is not None:
+            # If the index is missing, unreadable or corrupt, then the
+            # listings are simply read again.
+            index = load_pickle(self.filename, self._version)
+        if (
+            index is not None
+            and index.get("location") == self.location
+            and isinstance(index.get("categories"), dict)
+            and isinstance(index.get("packages"), dict)
+        ):
+            self._categories = index["categories"]
+            self._packages = index["packages"]
+        else:
+            self._categories = {}
+            self._packages = {}
+
+    def _listing(self, listings, relative_path, dirs):
+        """
+        Return the listing of the directory at relative_path, from
+        listings if it is still valid.
+
+        @raise OSError: if the directory can not be read
+        """
+        path = os.path.join(self.location, relative_path)
+        st = os.stat(path)
+        cached = listings.get(relative_path)
+        if cached is not None and cached[0] == st.st_mtime_ns:
+            return cached[1]
+
+        names = []
+        with os.scandir(path) as it:
+            for entry in it:
+                if dirs:
+                    if entry.name in VCS_DIRS or not entry.is_dir():
+                        continue
+                elif not entry.name.endswith(".ebuild"):
+                    continue
+                names.append(entry.name)
+        names = tuple(sorted(names))
+        if cached is not None and not dirs:
+            self._removed_ebuilds(relative_path, set(cached[1]).difference(names))
+
+        if st.st_mtime_ns < time.time_ns() - RACY_NS:
+            listings[relative_path] = (st.st_mtime_ns, names)
+            self._modified = True
+        elif cached is not None:
+            del listings[relative_path]
+            self._modified = True
+        return names
+
+    def category(self, cat):
+        """
+        Return the names of the subdirectories of a category, which are
+        package names unless the repository contains invalid entries.
+
+        @param cat: category name
+        @type cat: str
+        @rtype: tuple
+        @return: sorted names, or an empty tuple if the category does
+                not exist in this repository
+        @raise OSError: if the category directory exists but can not
+                be read
+        """
+        if self._categories is None:
+            self._load()
+        try:
+            return self._listing(self._categories, cat, True)
+        except OSError as e:
+            if e.errno not in (errno.ENOTDIR, errno.ENOENT, errno.ESTALE):
+                raise
+            return ()
+
+    def package(self, cp):
+        """
+        Return the ebuild file names of a package.
+
+        @param cp: category/package name
+        @type cp: str
+        @rtype: tuple
+        @return: sorted file names, or an empty tuple if the package
+                does not exist in this repository
+        @raise OSError: if the package directory exists but can not
+                be read
+        """
+        if self._packages is None:
+            self._load()
+        try:
+            return self._listing(self._packages, cp, False)
+        except OSError as e:
+            if e.errno not in (errno.ENOTDIR, errno.ENOENT, errno.ESTALE):
+                raise
+            return ()
+
+    def update(self):
+        """
+        Bring every listing in the index up to date, and discard those
+        of directories that no longer exist. This is intended to be
+        called after the repository has been synchronized, so that
+        later processes find valid listings.
+        """
+        if self._categories is None:
+            self._load()
+        for listings, dirs in ((self._categories, True), (self._packages, False)):
+            for relative_path in list(listings):
+                try:
+                    self._listing(listings, relative_path, dirs)
+                except OSError:
+                    if not dirs:
+                        self._removed_ebuilds(relative_path, listings[relative_path][1])
+                    del listings[relative_path]
+                    self._modified = True
+
+    def _removed_ebuilds(self, cp, names):
+        if self._removed is not None:
+            for name in names:
+                self._removed(os.path.join(self.location, cp, name))
+
+    def store(self):
+        """
+        Store the index if it has been modified, and if the current user
+        has permission.
+        """
+        if not self._modified or self.filename is None:
+            return
+        if store_pickle(
+            self.filename,
+            {
+                "version": self._version,
+                "location": self.location,
+                "categories": self._categories,
+                "packages": self._packages,
+            },
+            ensure_parent=True,
+        ):
+            self._modified = False
@@ -1,4 +1,4 @@
-# Copyright 1998-2024 Gentoo Authors
+# Copyright 1998-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 __all__ = ["dbapi"]
@@ -119,6 +119,41 @@ class dbapi:
         """
         raise NotImplementedError
 
+    def aux_get_many(
+        self, cpvs: Sequence[str], wants: Sequence[str], myrepo: Optional[str] = None
+    ) -> list[Optional[list[str]]]:
+        """Return the metadata keys in wants for each cpv in cpvs. Subclasses
+        override this in order to avoid the overhead of separate aux_get
+        calls.
+        Args:
+                cpvs - ["sys-apps/foo-1.0", "sys-apps/bar-2.0"]
+                wants - ["SLOT","DEPEND","HOMEPAGE"]
+                myrepo - The repository name.
+        Returns:
+                a list with one item per cpv, in the same order as cpvs, which
+                is the result of aux_get for that cpv, or None if the cpv is
+                not found
+        """
+        results = []
+        for cpv in cpvs:
+            try:
+                results.append(self.aux_get(cpv, wants, myrepo=myrepo))
+            except KeyError:
+                results.append(None)
+        return results
+
+    async def async_aux_get_many(
+        self,
+        cpvs: Sequence[str],
+        wants: Sequence[str],
+        myrepo: Optional[str] = None,
+        loop=None,
+    ) -> list[Optional[list[str]]]:
+        """Asynchronous form of aux_get_many. Subclasses that generate
+        metadata override this in order to do so concurrently.
+        """
+        return self.aux_get_many(cpvs, wants, myrepo=myrepo)
+
     def aux_update(self, cpv: str, metadata_updates: dict[str, Any]) -> None:
         """
         Args:
@@ -182,6 +217,36 @@ class dbapi:
 
         return _pkg_str(cpv, metadata=metadata, settings=self.settings, db=self)
 
+    def _pkg_str_many(self, cpvs, repo):
+        """
+        This is like _pkg_str for each of cpvs, but it fetches the
+        metadata with a single aux_get_many call. The cpvs that are not
+        found are omitted from the result. This may raise InvalidData.
+        """
+        from portage.versions import _pkg_str
+
+        cpvs = list(cpvs)
+        fetch = [cpv for cpv in cpvs if not hasattr(cpv, "slot")]
+        metadata = dict(
+            zip(fetch, self.aux_get_many(fetch, self._pkg_str_aux_keys, myrepo=repo))
+        )
+        result = []
+        for cpv in cpvs:
+            if hasattr(cpv, "slot"):
+                result.append(cpv)
+                continue
+            values = metadata[cpv]
+            if values is not None:
+                result.append(
+                    _pkg_str(
+                        cpv,
+                        metadata=dict(zip(self._pkg_str_aux_keys, values)),
+                        settings=self.settings,
+                        db=self,
+                    )
+                )
+        return result
+
     def _iter_match_repo(self, atom, cpv_iter):
         for cpv in cpv_iter:
             try:
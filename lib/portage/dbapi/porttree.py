@@ -1,4 +1,4 @@
-# Copyright 1998-2025 Gentoo Authors
+# Copyright 1998-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 __all__ = ["close_portdbapi_caches", "FetchlistDict", "portagetree", "portdbapi"]
@@ -9,6 +9,7 @@ from portage.cache import volatile
 from portage.cache.cache_errors import CacheError
 from portage.cache.mappings import Mapping
 from portage.dbapi import dbapi
+from portage.dbapi._TreeIndex import TreeIndex
 from portage.exception import (
     PortageException,
     PortageKeyError,
@@ -33,7 +34,6 @@ import os as _os
 import threading
 import traceback
 import warnings
-import errno
 import shlex
 
 import collections
@@ -77,6 +77,12 @@ def close_portdbapi_caches():
 
 portage.process.atexit_register(close_portdbapi_caches)
 
+# An ebuild that async_aux_get needs to run the metadata phase for.
+_aux_get_miss = collections.namedtuple(
+    "_aux_get_miss", ("myebuild", "mylocation", "ebuild_hash", "cache_me")
+)
+
+
 # It used to be necessary for API consumers to remove portdbapi instances
 # from portdbapi_instances, in order to avoid having accumulated instances
 # consume memory. Now, portdbapi_instances is just an empty dummy list, so
@@ -119,11 +125,15 @@ class _better_cache:
     The better_cache has been redesigned to perform on-demand scans -- it will only scan a category at a time, as
     needed. This should further optimize IO performance by not scanning category directories that are not needed by
     Portage.
+
+    Category listings are obtained from the persistent tree index of each repository, so that a scan costs one stat
+    per repository unless the category directory has changed.
     """
 
-    def __init__(self, repositories):
+    def __init__(self, repositories, tree_index):
         self._items = collections.defaultdict(list)
         self._scanned_cats = set()
+        self._tree_index = tree_index
 
         # ordered list of all portree locations we'll scan:
         self._repo_list = [
@@ -146,13 +156,7 @@ class _better_cache:
         from portage.dep import Atom
 
         for repo in self._repo_list:
-            cat_dir = repo.location + "/" + cat
-            try:
-                pkg_list = os.listdir(cat_dir)
-            except OSError as e:
-                if e.errno not in (errno.ENOTDIR, errno.ENOENT, errno.ESTALE):
-                    raise
-                continue
+            pkg_list = self._tree_index(repo.location).category(cat)
             for p in pkg_list:
                 try:
                     atom = Atom(f"{cat}/{p}")
@@ -261,6 +265,19 @@ class portdbapi(dbapi):
         # Keep a list of repo names, sorted by priority (highest priority first).
         self._ordered_repo_name_list = tuple(reversed(self.repositories.prepos_order))
 
+        # Shared by the ebuild and eclass hashes that validate md5-dict
+        # cache entries, and stored by close_caches and flush_cache.
+        self._md5_memo = eclass_cache.md5_memo(
+            os.path.join(self.depcachedir, "md5_memo.pickle")
+        )
+        for repo in self.repositories:
+            if repo.eclass_db is not None:
+                repo.eclass_db.set_md5_memo(self._md5_memo)
+
+        # Directory listings of each repository, created on demand by
+        # _tree_index and stored by close_caches and flush_cache.
+        self._tree_indexes = {}
+
         self.auxdbmodule = self.settings.load_best_module("portdbapi.auxdbmodule")
         self.auxdb = {}
         self._pregen_auxdb = {}
@@ -434,10 +451,34 @@ class portdbapi(dbapi):
         for x in self.auxdb:
             self.auxdb[x].sync()
         self.auxdb.clear()
+        self._md5_memo.store()
+        for tree_index in self._tree_indexes.values():
+            tree_index.store()
 
     def flush_cache(self):
         for x in self.auxdb.values():
             x.sync()
+        self._md5_memo.store()
+        for tree_index in self._tree_indexes.values():
+            tree_index.store()
+
+    def _tree_index(self, location):
+        """
+        Return the TreeIndex for the repository at location. It is
+        persistent unless the location does not belong to a configured
+        repository.
+        """
+        tree_index = self._tree_indexes.get(location)
+        if tree_index is None:
+            filename = None
+            repo_name = self.repositories.location_map.get(location)
+            if repo_name is not None:
+                filename = os.path.join(
+                    self.depcachedir, "tree_index", repo_name + ".pickle"
+                )
+            tree_index = TreeIndex(location, filename, removed=self._md5_memo.discard)
+            self._tree_indexes[location] = tree_index
+        return tree_index
 
     def findLicensePath(self, license_name):
         for x in reversed(self.porttrees):
@@ -612,7 +653,7 @@ class portdbapi(dbapi):
         from portage.util import writemsg
 
         try:
-            ebuild_hash = eclass_cache.hashed_path(ebuild_path)
+            ebuild_hash = eclass_cache.hashed_path(ebuild_path, md5_memo=self._md5_memo)
             # snag mtime since we use it later, and to trigger stat failure
             # if it doesn't exist
             ebuild_hash.mtime
@@ -631,6 +672,11 @@ class portdbapi(dbapi):
         pregen_auxdb = self._pregen_auxdb.get(repo_path)
         if pregen_auxdb is not None:
             auxdbs.append(pregen_auxdb)
+            # A packed cache may contain a stale entry for an ebuild that
+            # has a valid entry in the flat md5-cache directory.
+            fallback = getattr(pregen_auxdb, "fallback", None)
+            if fallback is not None:
+                auxdbs.append(fallback)
         ro_auxdb = self._ro_auxdb.get(repo_path)
         if ro_auxdb is not None:
             auxdbs.append(ro_auxdb)
@@ -702,14 +748,104 @@ class portdbapi(dbapi):
         @return: list of metadata values
         @rtype: asyncio.Future (or compatible)
         """
-        from portage.util import writemsg
-
         # Don't default to self._event_loop here, since that creates a
         # local event loop for thread safety, and that could easily lead
         # to simultaneous instantiation of multiple event loops here.
         # Callers of this method certainly want the same event loop to
         # be used for all calls.
         loop = asyncio._wrap_loop(loop)
+        result = self._aux_get_cached(mycpv, mylist, mytree=mytree, myrepo=myrepo)
+        if isinstance(result, _aux_get_miss):
+            result = await self._aux_get_generate(mycpv, mylist, result, loop)
+        return result
+
+    def aux_get_many(self, cpvs, wants, mytree=None, myrepo=None):
+        loop = self._event_loop
+        return loop.run_until_complete(
+            self.async_aux_get_many(
+                cpvs, wants, mytree=mytree, myrepo=myrepo, loop=loop
+            )
+        )
+
+    async def async_aux_get_many(
+        self,
+        cpvs,
+        wants,
+        mytree=None,
+        myrepo=None,
+        loop=None,
+        max_jobs=None,
+        max_load=None,
+    ):
+        """
+        Asynchronous form of aux_get_many. Entries are read from the
+        caches first, and metadata is then generated concurrently for
+        the remaining ebuilds.
+
+        @param max_jobs: max number of concurrent metadata processes
+                (default is portage.util.cpuinfo.get_cpu_count())
+        @type max_jobs: int
+        @param max_load: max load allowed when starting a new metadata
+                process, otherwise start no more than 1 at a time
+                (default is portage.util.cpuinfo.get_cpu_count())
+        @type max_load: int or float
+        @param loop: event loop (defaults to global event loop)
+        @type loop: EventLoop
+        """
+        loop = asyncio._wrap_loop(loop)
+        cpvs = list(cpvs)
+        results = [None] * len(cpvs)
+        # Map each cpv that needs the metadata phase to its indices in
+        # cpvs, so that the phase runs only once if a cpv is repeated.
+        misses = {}
+        for i, cpv in enumerate(cpvs):
+            try:
+                result = self._aux_get_cached(cpv, wants, mytree=mytree, myrepo=myrepo)
+            except KeyError:
+                continue
+            if isinstance(result, _aux_get_miss):
+                misses.setdefault(cpv, (result, []))[1].append(i)
+            else:
+                results[i] = result
+
+        if misses:
+            futures = await iter_gather(
+                # Use a generator expression for lazy evaluation, so that
+                # iter_gather controls the number of metadata processes.
+                (
+                    asyncio.ensure_future(
+                        self._aux_get_generate(cpv, wants, miss, loop), loop=loop
+                    )
+                    for cpv, (miss, _indices) in misses.items()
+                ),
+                max_jobs=max_jobs,
+                max_load=max_load,
+                loop=loop,
+            )
+            error = None
+            for (_miss, indices), future in zip(misses.values(), futures):
+                # Consume all exceptions, in order to avoid triggering
+                # the event loop's exception handler.
+                if future.cancelled():
+                    error = error or asyncio.CancelledError()
+                elif future.exception() is None:
+                    for i in indices:
+                        results[i] = list(future.result())
+                elif not isinstance(future.exception(), KeyError):
+                    error = error or future.exception()
+            if error is not None:
+                raise error
+
+        return results
+
+    def _aux_get_cached(self, mycpv, mylist, mytree=None, myrepo=None):
+        """
+        Return the aux_get result for mycpv if it is available from
+        the caches, or an _aux_get_miss instance which can be passed
+        to _aux_get_generate.
+        """
+        from portage.util import writemsg
+
         cache_me = False
         if myrepo is not None:
             mytree = self.treemap.get(myrepo)
@@ -753,39 +889,10 @@ class portdbapi(dbapi):
 
         mydata, ebuild_hash = self._pull_valid_cache(mycpv, myebuild, mylocation)
 
-        proc = None
         if mydata is None:
             if myebuild in self._broken_ebuilds:
                 raise PortageKeyError(mycpv)
-
-            # Retry for an intermittent unexpected returncode which
-            # occurs in CI runs with forkserver (bug 965132). In CI
-            # the unexpected returncode tends to be 255 which indicates
-            # that the forkserver exited unexpectedly.
-            tries = 3
-            while tries > 0:
-                tries -= 1
-                proc = await self._run_metadata_phase(
-                    mycpv, mylocation, ebuild_hash, loop
-                )
-
-                if proc.returncode != os.EX_OK:
-                    if proc.returncode != 1:
-                        writemsg(
-                            _(
-                                "!!! aux_get(): metadata phase for package '%(pkg)s' failed with unexpected returncode %(returncode)s\n"
-                            )
-                            % {"pkg": mycpv, "returncode": proc.returncode},
-                            noiselevel=-1,
-                        )
-                        # Only retry for an unexpected returncode.
-                        if tries > 0:
-                            continue
-                    self._broken_ebuilds.add(myebuild)
-                    raise PortageKeyError(mycpv)
-
-                mydata = proc.metadata
-                break
+            return _aux_get_miss(myebuild, mylocation, ebuild_hash, cache_me)
 
         return self._aux_get_return(
             mycpv,
@@ -797,6 +904,52 @@ class portdbapi(dbapi):
             cache_me,
         )
 
+    async def _aux_get_generate(self, mycpv, mylist, miss, loop):
+        """
+        Run the metadata phase for an ebuild that _aux_get_cached did
+        not find in the caches, and return the aux_get result.
+        """
+        from portage.util import writemsg
+
+        # Retry for an intermittent unexpected returncode which
+        # occurs in CI runs with forkserver (bug 965132). In CI
+        # the unexpected returncode tends to be 255 which indicates
+        # that the forkserver exited unexpectedly.
+        tries = 3
+        while tries > 0:
+            tries -= 1
+            proc = await self._run_metadata_phase(
+                mycpv, miss.mylocation, miss.ebuild_hash, loop
+            )
+
+            if proc.returncode != os.EX_OK:
+                if proc.returncode != 1:
+                    writemsg(
+                        _(
+                            "!!! aux_get(): metadata phase for package '%(pkg)s' failed with unexpected returncode %(returncode)s\n"
+                        )
+                        % {"pkg": mycpv, "returncode": proc.returncode},
+                        noiselevel=-1,
+                    )
+                    # Only retry for an unexpected returncode.
+                    if tries > 0:
+                        continue
+                self._broken_ebuilds.add(miss.myebuild)
+                raise PortageKeyError(mycpv)
+
+            mydata = proc.metadata
+            break
+
+        return self._aux_get_return(
+            mycpv,
+            mylist,
+            miss.myebuild,
+            miss.ebuild_hash,
+            mydata,
+            miss.mylocation,
+            miss.cache_me,
+        )
+
     async def _run_metadata_phase(
         self, mycpv, mylocation, ebuild_hash, loop
     ) -> EbuildMetadataPhase:
@@ -1126,7 +1279,6 @@ class portdbapi(dbapi):
         @rtype list of [cat/pkg,...]
         """
         from portage.dep import Atom
-        from portage.util.listdir import listdir
 
         d = {}
         if categories is None:
@@ -1135,9 +1287,11 @@ class portdbapi(dbapi):
             trees = self.porttrees
         for x in categories:
             for oroot in trees:
-                for y in listdir(
-                    oroot + "/" + x, EmptyOnError=1, ignorecvs=1, dirsonly=1
-                ):
+                try:
+                    pkg_list = self._tree_index(oroot).category(x)
+                except OSError:
+                    continue
+                for y in pkg_list:
                     try:
                         atom = Atom(f"{x}/{y}")
                     except InvalidAtom:
@@ -1200,7 +1354,7 @@ class portdbapi(dbapi):
         for repo in repos:
             oroot = repo.location
             try:
-                file_list = os.listdir(os.path.join(oroot, mycp))
+                file_list = self._tree_index(oroot).package(mycp)
             except OSError:
                 continue
             for x in file_list:
@@ -1270,7 +1424,7 @@ class portdbapi(dbapi):
         ):
             self.xcache[x] = {}
         self.frozen = 1
-        self._better_cache = _better_cache(self.repositories)
+        self._better_cache = _better_cache(self.repositories, self._tree_index)
 
     def melt(self):
         self.xcache = {}
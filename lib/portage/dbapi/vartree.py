@@ -1,4 +1,4 @@
-# Copyright 1998-2025 Gentoo Authors
+# Copyright 1998-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 __all__ = ["vardbapi", "vartree", "dblink"] + ["write_contents", "tar_contents"]
@@ -41,6 +41,7 @@ from portage import _selinux_merge
 from portage import _unicode_decode
 from portage import _unicode_encode
 from portage.util.futures.executor.fork import ForkExecutor
+from ._MergeClaims import MergeClaims
 from ._VdbMetadataDelta import VdbMetadataDelta
 
 from _emerge.EbuildBuildDir import EbuildBuildDir
@@ -48,7 +49,13 @@ from _emerge.EbuildPhase import EbuildPhase
 from _emerge.emergelog import emergelog
 from _emerge.MiscFunctionsProcess import MiscFunctionsProcess
 from _emerge.SpawnProcess import SpawnProcess
+from ._CompactContents import CompactContents
 from ._ContentsCaseSensitivityManager import ContentsCaseSensitivityManager
+from ._ContentsIndex import (
+    ContentsIndex,
+    remove_contents_index,
+    write_contents_index,
+)
 
 import argparse
 import errno
@@ -150,6 +157,7 @@ class vardbapi(dbapi):
         self._fs_lock_obj = None
         self._fs_lock_count = 0
         self._slot_locks = {}
+        self._merge_claims = MergeClaims(self)
 
         if vartree is None:
             vartree = portage.db[settings["EROOT"]]["vartree"]
@@ -777,20 +785,42 @@ class vardbapi(dbapi):
         unrecognized, the cache will simple be recreated from scratch (it is
         completely disposable).
         """
-        from portage.eapi import _get_eapi_attrs
-        from portage.versions import _get_slot_re
+        return self._aux_get_cached(mycpv, wants, self._aux_cache_these(wants))
+
+    def aux_get_many(self, cpvs, wants, myrepo=None):
+        cache_these = self._aux_cache_these(wants)
+        results = []
+        for cpv in cpvs:
+            try:
+                results.append(self._aux_get_cached(cpv, wants, cache_these))
+            except KeyError:
+                results.append(None)
+        return results
 
+    def _aux_cache_these(self, wants):
+        """
+        Return the keys to store in the aux cache when wants are
+        requested, or None if none of wants are cached.
+        """
         cache_these_wants = self._aux_cache_keys.intersection(wants)
         for x in wants:
             if self._aux_cache_keys_re.match(x) is not None:
                 cache_these_wants.add(x)
 
         if not cache_these_wants:
-            mydata = self._aux_get(mycpv, wants)
-            return [mydata[x] for x in wants]
+            return None
 
         cache_these = set(self._aux_cache_keys)
         cache_these.update(cache_these_wants)
+        return cache_these
+
+    def _aux_get_cached(self, mycpv, wants, cache_these):
+        from portage.eapi import _get_eapi_attrs
+        from portage.versions import _get_slot_re
+
+        if cache_these is None:
+            mydata = self._aux_get(mycpv, wants)
+            return [mydata[x] for x in wants]
 
         mydir = self.getpath(mycpv)
         mydir_stat = None
@@ -952,7 +982,7 @@ class vardbapi(dbapi):
             raise portage.exception.CommandNotFound(args[0])
 
         # Parts of the following code are borrowed from
-        # filter-bash-environment.py (keep them in sync).
+        # portage.package.ebuild._filter_bash_env (keep them in sync).
         var_assign_re = re.compile(
             r'(^|^declare\s+-\S+\s+|^declare\s+|^export\s+)([^=\s]+)=("|\')?(.*)$'
         )
@@ -1376,6 +1406,7 @@ class vardbapi(dbapi):
         f.close()
         self._bump_mtime(pkg.mycpv)
         pkg._clear_contents_cache()
+        pkg._write_contents_index()
 
     class _owners_cache:
         """
@@ -1871,11 +1902,13 @@ class dblink:
         self.myroot = self.settings["ROOT"]
         self._installed_instance = None
         self.contentscache = None
+        self._contents_index = None
         self._contents_inodes = None
         self._contents_basenames = None
         self._linkmap_broken = False
         self._device_path_map = {}
         self._hardlink_merge_map = {}
+        self._merge_md5_cache = None
         self._hash_key = (self._eroot, self.mycpv)
         self._mtime_pipe = mtime_pipe
         self._protect_obj = None
@@ -1921,16 +1954,15 @@ class dblink:
 
     def _slot_locked(f):
         """
-        A decorator function which, when parallel-install is enabled,
-        acquires and releases slot locks for the current package and
-        blocked packages. This is required in order to account for
-        interactions with blocked packages (involving resolution of
-        file collisions).
+        A decorator function which acquires and releases slot locks
+        for the current package and blocked packages. This is required
+        in order to account for interactions with blocked packages
+        (involving resolution of file collisions), since the vdb lock
+        is only held for short critical sections.
         """
 
         def wrapper(self, *args, **kwargs):
-            if "parallel-install" in self.settings.features:
-                self._acquire_slot_locks(kwargs.get("mydbapi", self.vartree.dbapi))
+            self._acquire_slot_locks(kwargs.get("mydbapi", self.vartree.dbapi))
             try:
                 return f(self, *args, **kwargs)
             finally:
@@ -2035,6 +2067,9 @@ class dblink:
 
     def _clear_contents_cache(self):
         self.contentscache = None
+        if self._contents_index:
+            self._contents_index.close()
+        self._contents_index = None
         self._contents_inodes = None
         self._contents_basenames = None
         self._contents.clear_cache()
@@ -2042,6 +2077,10 @@ class dblink:
     def getcontents(self):
         """
         Get the installed files of a given package (aka what that package installed)
+
+        @rtype: CompactContents
+        @return: A read-only mapping of paths to entry tuples (use the copy
+                method in order to obtain a mutable dict)
         """
         from portage.util import normalize_path
         from portage.util import writemsg
@@ -2063,8 +2102,8 @@ class dblink:
             if e.errno != errno.ENOENT:
                 raise
             del e
-            self.contentscache = pkgfiles
-            return pkgfiles
+            self.contentscache = CompactContents()
+            return self.contentscache
 
         null_byte = "\0"
         normalize_needed = self._normalize_needed
@@ -2146,8 +2185,30 @@ class dblink:
             writemsg(_("!!! Parse error in '%s'\n") % contents_file, noiselevel=-1)
             for pos, e in errors:
                 writemsg(_("!!!   line %d: %s\n") % (pos, e), noiselevel=-1)
-        self.contentscache = pkgfiles
-        return pkgfiles
+        self.contentscache = CompactContents(pkgfiles)
+        return self.contentscache
+
+    def _write_contents_index(self):
+        """
+        Write the binary CONTENTS index if FEATURES=contents-index is
+        enabled, or remove any existing index otherwise. The stat of
+        CONTENTS is taken before it is parsed, so that the index will
+        be treated as stale if CONTENTS changes concurrently.
+        """
+        if "contents-index" not in self.settings.features:
+            remove_contents_index(self.dbdir)
+            return
+        try:
+            contents_st = os.stat(os.path.join(self.dbdir, "CONTENTS"))
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            remove_contents_index(self.dbdir)
+            return
+        self._clear_contents_cache()
+        write_contents_index(
+            self.dbdir, self.getcontents(), self.settings["ROOT"], contents_st
+        )
 
     def quickpkg(
         self,
@@ -2155,6 +2216,7 @@ class dblink:
         metadata=None,
         include_config=False,
         include_unmodified_config=False,
+        snapshot=False,
     ):
         """
         Create a tar file appropriate for use by quickpkg.
@@ -2168,12 +2230,19 @@ class dblink:
                 that have not been modified since installation (as a security precaution,
                 default is False).
         @type include_unmodified_config: bool
+        @param snapshot: Archive files from a snapshot made of reflinks in
+                PORTAGE_TMPDIR, so that the archive is consistent even if
+                files are modified meanwhile (files that can not be
+                reflinked are read directly).
+        @type snapshot: bool
         @rtype: list
         @return: Paths of protected configuration files which have been omitted.
         """
+        import contextlib
         import tarfile
         from portage.checksum import _perform_md5_merge as perform_md5
         from portage.util import ConfigProtect
+        from ._ContentsSnapshot import ContentsSnapshot
 
         settings = self.settings
         cpv = self.mycpv
@@ -2206,27 +2275,44 @@ class dblink:
                 excluded_config_files.append(filename)
                 return True
 
-        if binpkg_format == "xpak":
-            # The tarfile module will write pax headers holding the
-            # xattrs only if PAX_FORMAT is specified here.
-            with tarfile.open(
-                fileobj=(
-                    output_file
-                    if hasattr(output_file, "write")
-                    else open(output_file.fileno(), mode="wb", closefd=False)
-                ),
-                mode="w|",
-                format=tarfile.PAX_FORMAT if xattrs else tarfile.DEFAULT_FORMAT,
-            ) as tar:
-                tar_contents(
-                    contents, settings["ROOT"], tar, protect=protect, xattrs=xattrs
-                )
-        elif binpkg_format == "gpkg":
-            gpkg_file = portage.gpkg.gpkg(settings, cpv, output_file)
-            gpkg_file._quickpkg(contents, metadata, settings["ROOT"], protect=protect)
-        else:
+        if binpkg_format not in ("xpak", "gpkg"):
             raise InvalidBinaryPackageFormat(binpkg_format)
 
+        with (
+            ContentsSnapshot(contents, settings["PORTAGE_TMPDIR"])
+            if snapshot
+            else contextlib.nullcontext()
+        ) as contents_snapshot:
+            if binpkg_format == "xpak":
+                # The tarfile module will write pax headers holding the
+                # xattrs only if PAX_FORMAT is specified here.
+                with tarfile.open(
+                    fileobj=(
+                        output_file
+                        if hasattr(output_file, "write")
+                        else open(output_file.fileno(), mode="wb", closefd=False)
+                    ),
+                    mode="w|",
+                    format=tarfile.PAX_FORMAT if xattrs else tarfile.DEFAULT_FORMAT,
+                ) as tar:
+                    tar_contents(
+                        contents,
+                        settings["ROOT"],
+                        tar,
+                        protect=protect,
+                        xattrs=xattrs,
+                        snapshot=contents_snapshot,
+                    )
+            else:
+                gpkg_file = portage.gpkg.gpkg(settings, cpv, output_file)
+                gpkg_file._quickpkg(
+                    contents,
+                    metadata,
+                    settings["ROOT"],
+                    protect=protect,
+                    snapshot=contents_snapshot,
+                )
+
         return excluded_config_files
 
     def _prune_plib_registry(self, unmerge=False, needed=None, preserve_paths=None):
@@ -2836,6 +2922,49 @@ class dblink:
                 else:
                     infodirs_inodes.add((statobj.st_dev, statobj.st_ino))
 
+            # Classify files up front, and verify checksums in parallel
+            # for those that will be checked below. This excludes files
+            # that are skipped before the checksum comparison, such as
+            # ignored files, files with a modified mtime, and files that
+            # are owned by another instance in the same slot. Ownership is
+            # recorded in owner_checks, so that it is not checked twice.
+            # The files are still removed serially and in sorted order,
+            # so that the output remains deterministic.
+            md5_cache = {}
+            owner_checks = {}
+            if not unmerge_orphans and self._md5_parallel_jobs():
+                md5_candidates = []
+                for objkey in mykeys:
+                    file_data = pkgfiles[objkey]
+                    if file_data[0] != "obj":
+                        continue
+                    obj = normalize_path(objkey)
+                    if len(obj) <= len(eroot) or not obj.startswith(eroot):
+                        continue
+                    f_match = obj[len(eroot) - 1 :]
+                    if any(
+                        fnmatch.fnmatch(f_match, pattern)
+                        for pattern in uninstall_ignore
+                    ):
+                        continue
+                    try:
+                        lstatobj = os.lstat(obj)
+                    except (OSError, UnicodeEncodeError):
+                        continue
+                    if str(lstatobj[stat.ST_MTIME]) != file_data[1]:
+                        continue
+                    if obj.startswith(real_root):
+                        relative_path = obj[real_root_len:]
+                        is_owned = any(
+                            dblnk.isowner(relative_path) for dblnk in others_in_slot
+                        )
+                        owner_checks[relative_path] = is_owned
+                        if is_owned:
+                            continue
+                    md5_candidates.append((obj, lstatobj))
+                md5_cache = self._md5_precompute(md5_candidates)
+                del md5_candidates
+
             for i, objkey in enumerate(mykeys):
                 obj = normalize_path(objkey)
                 if os is _os_merge:
@@ -2899,11 +3028,13 @@ class dblink:
                 # don't use EROOT, CONTENTS entries already contain EPREFIX
                 if obj.startswith(real_root):
                     relative_path = obj[real_root_len:]
-                    is_owned = False
-                    for dblnk in others_in_slot:
-                        if dblnk.isowner(relative_path):
-                            is_owned = True
-                            break
+                    is_owned = owner_checks.get(relative_path)
+                    if is_owned is None:
+                        is_owned = False
+                        for dblnk in others_in_slot:
+                            if dblnk.isowner(relative_path):
+                                is_owned = True
+                                break
 
                     if (
                         is_owned
@@ -3049,9 +3180,10 @@ class dblink:
                     if statobj is None or not stat.S_ISREG(statobj.st_mode):
                         show_unmerge("---", unmerge_desc["!obj"], file_type, obj)
                         continue
-                    mymd5 = None
+                    mymd5 = self._md5_lookup(md5_cache, obj, statobj)
                     try:
-                        mymd5 = perf_md5(obj, calc_prelink=calc_prelink)
+                        if mymd5 is None:
+                            mymd5 = perf_md5(obj, calc_prelink=calc_prelink)
                     except FileNotFound as e:
                         # the file has disappeared between now and our stat call
                         show_unmerge("---", unmerge_desc["!obj"], file_type, obj)
@@ -3432,6 +3564,28 @@ class dblink:
         if "case-insensitive-fs" in self.settings.features:
             destfile = destfile.lower()
 
+        if (
+            self.contentscache is None
+            and "case-insensitive-fs" not in self.settings.features
+            and destfile.startswith(destroot[:-1])
+        ):
+            # Use the binary CONTENTS index if available, in order
+            # to avoid parsing CONTENTS in the common cases.
+            if self._contents_index is None:
+                self._contents_index = ContentsIndex.load(self.dbdir) or False
+            if self._contents_index:
+                found = self._contents_index.contains(destfile[len(destroot) - 1 :])
+                if found:
+                    return destfile
+                if (
+                    found is not None
+                    and self._contents_index.contains_basename(
+                        os_filename_arg.path.basename(destfile)
+                    )
+                    is False
+                ):
+                    return False
+
         if self._contents.contains(destfile):
             return self._contents.unmap_key(destfile)
 
@@ -4782,6 +4936,15 @@ class dblink:
             if blocker.exists():
                 blockers.append(blocker)
 
+        # Concurrent merges only hold the vdb lock for short critical
+        # sections, so wait for any of them that install the same files
+        # to complete, in order for the collision check to see them.
+        self.vartree.dbapi._merge_claims.acquire(
+            self.mycpv,
+            chain(filelist, linklist),
+            waiting_msg=_("Waiting for a concurrent merge of the same files"),
+        )
+
         (
             collisions,
             internal_collisions,
@@ -5237,6 +5400,7 @@ class dblink:
         # and remove any colliding files from their CONTENTS
         # since they now belong to this package.
         self._clear_contents_cache()
+        self._write_contents_index()
         contents = self.getcontents()
         destroot_len = len(destroot) - 1
 
@@ -5251,6 +5415,9 @@ class dblink:
             finally:
                 self.unlockdb()
 
+        # The files are now owned by this package in the vdb.
+        self.vartree.dbapi._merge_claims.release(self.mycpv)
+
         plib_registry = self.vartree.dbapi._plib_registry
         if plib_registry:
             self.vartree.dbapi._fs_lock()
@@ -5394,8 +5561,109 @@ class dblink:
 
         return backup_p
 
+    # Minimum size of files for which _md5_precompute computes checksums.
+    # For smaller files, the cost is dominated by interpreter overhead
+    # that can not run concurrently.
+    _md5_parallel_min_size = 65536
+
+    def _md5_parallel_jobs(self):
+        """
+        Return the number of threads that _md5_precompute uses, or 0 if
+        it does not precompute checksums, so that callers can skip any
+        preparation for it.
+        """
+        from portage.util.cpuinfo import get_cpu_count
+
+        features = self.settings.features
+        if "parallel-checksums" not in features or "prelink-checksums" in features:
+            return 0
+        # Other merges that run at the same time already use the other
+        # CPUs, and each of them would start a thread pool of its own.
+        if self.settings.get("PORTAGE_CONCURRENT_MERGES") == "1":
+            return 0
+        jobs = get_cpu_count() or 1
+        if jobs < 2:
+            return 0
+        return jobs
+
+    def _md5_precompute(self, paths):
+        """
+        Compute md5 checksums for the given files using a thread pool,
+        since checksum calculation is the most CPU intensive part of
+        merge and unmerge. Only regular files of at least
+        _md5_parallel_min_size bytes are considered, since the hash
+        functions release the GIL for large buffers. Callers still
+        process files serially and in their usual order, and look up
+        results with _md5_lookup.
+
+        @param paths: iterable of file paths, or of tuples of a path
+                and its lstat result if the caller already has it, which
+                is not consumed unless _md5_parallel_jobs returns a number
+                of threads
+        @type paths: iterable
+        @rtype: dict
+        @return: a mapping of paths to tuples of (st_dev, st_ino,
+                st_size, st_mtime_ns) and md5 checksum
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from portage.checksum import _perform_md5_merge as perform_md5
+        from portage.exception import PortageException
+
+        os = _os_merge
+        jobs = self._md5_parallel_jobs()
+        if not jobs:
+            return {}
+
+        min_size = self._md5_parallel_min_size
+        files = []
+        for path in paths:
+            if isinstance(path, tuple):
+                path, st = path
+            else:
+                try:
+                    st = os.lstat(path)
+                except (OSError, UnicodeEncodeError):
+                    continue
+            if stat.S_ISREG(st.st_mode) and st.st_size >= min_size:
+                files.append((path, (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)))
+
+        if len(files) < 2:
+            return {}
+
+        def checksum(path):
+            try:
+                return perform_md5(path)
+            except (PortageException, UnicodeEncodeError):
+                # Let the caller handle the error.
+                return None
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            return {
+                path: (st_key, result)
+                for (path, st_key), result in zip(
+                    files, executor.map(checksum, (path for path, st_key in files))
+                )
+                if result is not None
+            }
+
+    @staticmethod
+    def _md5_lookup(md5_cache, path, st):
+        """
+        Return a checksum from the result of _md5_precompute, provided
+        that the file has not changed since, or None otherwise.
+        """
+        cached = md5_cache.pop(path, None)
+        if cached is not None and cached[0] == (
+            st.st_dev,
+            st.st_ino,
+            st.st_size,
+            st.st_mtime_ns,
+        ):
+            return cached[1]
+        return None
+
     def _merge_contents(self, srcroot, destroot, cfgfiledict):
-        from portage.util import atomic_ofstream, writedict
+        from portage.util import atomic_ofstream, normalize_path, writedict
 
         cfgfiledict_orig = cfgfiledict.copy()
 
@@ -5425,50 +5693,66 @@ class dblink:
         # slot.
         mymtime = None
 
+        image_root = normalize_path(srcroot).rstrip(os.sep) + os.sep
+        self._merge_md5_cache = self._md5_precompute(
+            _os_merge.path.join(parent, f)
+            for parent, dirs, files in _os_merge.walk(image_root)
+            for f in files
+        )
+
         # set umask to 0 for merging; back up umask, save old one in prevmask (since this is a global change)
         prevmask = os.umask(0)
         secondhand = []
 
-        # we do a first merge; this will recurse through all files in our srcroot but also build up a
-        # "second hand" of symlinks to merge later
-        if self.mergeme(
-            srcroot,
-            destroot,
-            outfile,
-            secondhand,
-            self.settings["EPREFIX"].lstrip(os.sep),
-            cfgfiledict,
-            mymtime,
-        ):
-            return 1
-
-        # now, it's time for dealing our second hand; we'll loop until we can't merge anymore.	The rest are
-        # broken symlinks.  We'll merge them too.
-        lastlen = 0
-        while len(secondhand) and len(secondhand) != lastlen:
-            # clear the thirdhand.	Anything from our second hand that
-            # couldn't get merged will be added to thirdhand.
-
-            thirdhand = []
+        try:
+            # we do a first merge; this will recurse through all files in our srcroot but also build up a
+            # "second hand" of symlinks to merge later
             if self.mergeme(
-                srcroot, destroot, outfile, thirdhand, secondhand, cfgfiledict, mymtime
+                srcroot,
+                destroot,
+                outfile,
+                secondhand,
+                self.settings["EPREFIX"].lstrip(os.sep),
+                cfgfiledict,
+                mymtime,
             ):
                 return 1
 
-            # swap hands
-            lastlen = len(secondhand)
+            # now, it's time for dealing our second hand; we'll loop until we can't merge anymore.	The rest are
+            # broken symlinks.  We'll merge them too.
+            lastlen = 0
+            while len(secondhand) and len(secondhand) != lastlen:
+                # clear the thirdhand.	Anything from our second hand that
+                # couldn't get merged will be added to thirdhand.
+
+                thirdhand = []
+                if self.mergeme(
+                    srcroot,
+                    destroot,
+                    outfile,
+                    thirdhand,
+                    secondhand,
+                    cfgfiledict,
+                    mymtime,
+                ):
+                    return 1
+
+                # swap hands
+                lastlen = len(secondhand)
 
-            # our thirdhand now becomes our secondhand.  It's ok to throw
-            # away secondhand since thirdhand contains all the stuff that
-            # couldn't be merged.
-            secondhand = thirdhand
+                # our thirdhand now becomes our secondhand.  It's ok to throw
+                # away secondhand since thirdhand contains all the stuff that
+                # couldn't be merged.
+                secondhand = thirdhand
 
-        if len(secondhand):
-            # force merge of remaining symlinks (broken or circular; oh well)
-            if self.mergeme(
-                srcroot, destroot, outfile, None, secondhand, cfgfiledict, mymtime
-            ):
-                return 1
+            if len(secondhand):
+                # force merge of remaining symlinks (broken or circular; oh well)
+                if self.mergeme(
+                    srcroot, destroot, outfile, None, secondhand, cfgfiledict, mymtime
+                ):
+                    return 1
+        finally:
+            self._merge_md5_cache = None
 
         # restore umask
         os.umask(prevmask)
@@ -5541,6 +5825,7 @@ class dblink:
         srcroot = normalize_path(srcroot).rstrip(sep) + sep
         destroot = normalize_path(destroot).rstrip(sep) + sep
         calc_prelink = "prelink-checksums" in self.settings.features
+        md5_cache = self._merge_md5_cache or {}
 
         protect_if_modified = (
             "config-protect-if-modified" in self.settings.features
@@ -5572,7 +5857,9 @@ class dblink:
             mymtime = mystat.st_mtime_ns
 
             if stat.S_ISREG(mymode):
-                mymd5 = perform_md5(mysrc, calc_prelink=calc_prelink)
+                mymd5 = self._md5_lookup(md5_cache, mysrc, mystat)
+                if mymd5 is None:
+                    mymd5 = perform_md5(mysrc, calc_prelink=calc_prelink)
             elif stat.S_ISLNK(mymode):
                 # The file name of mysrc and the actual file that it points to
                 # will have earlier been forcefully converted to the 'merge'
@@ -6175,9 +6462,6 @@ class dblink:
 
         myroot = None
         retval = -1
-        parallel_install = "parallel-install" in self.settings.features
-        if not parallel_install:
-            self.lockdb()
         self.vartree.dbapi._bump_mtime(self.mycpv)
         if self._scheduler is None:
             self._scheduler = SchedulerInterface(asyncio._safe_loop())
@@ -6233,6 +6517,7 @@ class dblink:
                     phase.start()
                     phase.wait()
         finally:
+            self.vartree.dbapi._merge_claims.release(self.mycpv)
             self.settings.pop("REPLACING_VERSIONS", None)
             if self.vartree.dbapi._linkmap is None:
                 # preserve-libs is entirely disabled
@@ -6240,8 +6525,6 @@ class dblink:
             else:
                 self.vartree.dbapi._linkmap._clear_cache()
             self.vartree.dbapi._bump_mtime(self.mycpv)
-            if not parallel_install:
-                self.unlockdb()
 
         if retval == os.EX_OK and self._postinst_failure:
             retval = portage.const.RETURNCODE_POSTINST_FAILURE
@@ -6573,7 +6856,16 @@ def write_contents(contents, root, f):
         f.write(line)
 
 
-def tar_contents(contents, root, tar, protect=None, onProgress=None, xattrs=False):
+def tar_contents(
+    contents, root, tar, protect=None, onProgress=None, xattrs=False, snapshot=None
+):
+    """
+    Add the given contents to an open TarFile.
+
+    @param snapshot: if given, file data is read from snapshot copies
+            where available (see ContentsSnapshot)
+    @type snapshot: ContentsSnapshot
+    """
     import tarfile
     from portage.util import normalize_path
     from portage.util._xattr import xattr
@@ -6708,8 +7000,14 @@ def tar_contents(contents, root, tar, protect=None, onProgress=None, xattrs=Fals
                             _unicode_decode(xattr.get(path_bytes, _unicode_encode(k)))
                         )
 
-                with open(path_bytes, "rb") as f:
-                    tar.addfile(tarinfo, f)
+                snapshot_path = snapshot.get(path) if snapshot else None
+                if snapshot_path is None:
+                    with open(path_bytes, "rb") as f:
+                        tar.addfile(tarinfo, f)
+                else:
+                    with open(snapshot_path, "rb") as f:
+                        tarinfo.size = os.fstat(f.fileno()).st_size
+                        tar.addfile(tarinfo, f)
 
         else:
             tar.addfile(tarinfo)
@@ -1,23 +1,131 @@
-# Copyright 2005-2020 Gentoo Authors
+# Copyright 2005-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 # Author(s): Nicholas Carpaski (carpaski@gentoo.org), Brian Harring (ferringb@gentoo.org)
 
-__all__ = ["cache"]
+__all__ = ["cache", "md5_memo"]
 
 import shlex
 import stat
 import operator
+import time
 import warnings
 from portage.util import normalize_path
 import errno
 from portage.exception import FileNotFound, PermissionDenied
 from portage import os
 from portage import checksum
+from portage.util._pickle_cache import RACY_NS, load_pickle, store_pickle
+
+
+class md5_memo:
+    """
+    A persistent memo of md5 digests, for ebuilds and eclasses that are
+    unchanged since a previous process hashed them. Entries are keyed by
+    path and are valid only while (st_dev, st_ino, st_size, st_mtime_ns)
+    of the file are unchanged.
+    """
+
+    _version = "1"
+
+    def __init__(self, filename=None):
+        """
+        @param filename: path of the file that the memo is loaded from
+                and stored to, or None for a memo that is not persistent
+        @type filename: str
+        """
+        self.filename = filename
+        self._digests = None
+        self._modified = False
+
+    def _load(self):
+        digests = None
+        if self.filename is not None:
+            # If the memo is missing, unreadable or corrupt, then start
+            # over, since it is only a memo.
+            memo = load_pickle(self.filename, self._version)
+            if memo is not None:
+                digests = memo.get("md5")
+                if not isinstance(digests, dict):
+                    digests = None
+        self._digests = {} if digests is None else digests
+
+    def md5(self, path, st):
+        """
+        Return the md5 digest of the file at path, from the memo if
+        the file has not changed since it was memoized.
+
+        @param path: path of a regular file
+        @type path: str
+        @param st: the result of os.stat(path)
+        @type st: os.stat_result
+        @rtype: str
+        """
+        if self._digests is None:
+            self._load()
+        key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        cached = self._digests.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        now_ns = time.time_ns()
+        digest = checksum.perform_checksum(path, "MD5")[0]
+        if st.st_mtime_ns < now_ns - RACY_NS:
+            self._digests[path] = (key, digest)
+            self._modified = True
+        elif cached is not None:
+            del self._digests[path]
+            self._modified = True
+        return digest
+
+    def discard(self, path):
+        """
+        Discard the entry of a file that no longer exists.
+
+        @param path: path of the file
+        @type path: str
+        """
+        if self._digests is None:
+            self._load()
+        if self._digests.pop(path, None) is not None:
+            self._modified = True
+
+    def store(self):
+        """
+        Store the memo if it has been modified, and if the current user
+        has permission.
+        """
+        if not self._modified or self.filename is None:
+            return
+        if store_pickle(
+            self.filename, {"version": self._version, "md5": self._digests}
+        ):
+            self._modified = False
 
 
 class hashed_path:
-    def __init__(self, location):
+    def __init__(self, location, md5_memo=None):
+        """
+        @param location: path of the file
+        @type location: str
+        @param md5_memo: a memo that is used for the md5 attribute
+        @type md5_memo: md5_memo
+        """
         self.location = location
+        self._md5_memo = md5_memo
+        self._stat = None
+
+    def _do_stat(self):
+        if self._stat is None:
+            try:
+                self._stat = os.stat(self.location)
+            except OSError as e:
+                if e.errno in (errno.ENOENT, errno.ESTALE):
+                    if self._md5_memo is not None:
+                        self._md5_memo.discard(self.location)
+                    raise FileNotFound(self.location)
+                elif e.errno == PermissionDenied.errno:
+                    raise PermissionDenied(self.location)
+                raise
+        return self._stat
 
     def __getattr__(self, attr):
         if attr == "mtime":
@@ -27,22 +135,18 @@ class hashed_path:
             # the straight c api.
             # thus use the defacto python compatibility work around;
             # access via index, which guarantees you get the raw int.
-            try:
-                self.mtime = obj = os.stat(self.location)[stat.ST_MTIME]
-            except OSError as e:
-                if e.errno in (errno.ENOENT, errno.ESTALE):
-                    raise FileNotFound(self.location)
-                elif e.errno == PermissionDenied.errno:
-                    raise PermissionDenied(self.location)
-                raise
+            self.mtime = obj = self._do_stat()[stat.ST_MTIME]
             return obj
-        if not attr.islower():
+        if not attr.islower() or attr.startswith("_"):
             # we don't care to allow .mD5 as an alias for .md5
             raise AttributeError(attr)
         hashname = attr.upper()
         if hashname not in checksum.get_valid_checksum_keys():
             raise AttributeError(attr)
-        val = checksum.perform_checksum(self.location, hashname)[0]
+        if hashname == "MD5" and self._md5_memo is not None:
+            val = self._md5_memo.md5(self.location, self._do_stat())
+        else:
+            val = checksum.perform_checksum(self.location, hashname)[0]
         setattr(self, attr, val)
         return val
 
@@ -66,6 +170,7 @@ class cache:
         self.eclasses = {}  # {"Name": hashed_path}
         self._eclass_locations = {}
         self._eclass_locations_str = None
+        self.md5_memo = None
 
         # screw with the porttree ordering, w/out having bash inherit match it, and I'll hurt you.
         # ~harring
@@ -89,8 +194,20 @@ class cache:
         result.porttree_root = self.porttree_root
         result.porttrees = self.porttrees
         result._master_eclass_root = self._master_eclass_root
+        result.md5_memo = self.md5_memo
         return result
 
+    def set_md5_memo(self, memo):
+        """
+        Use memo for the md5 digests of eclasses, including those that
+        have already been found by update_eclasses.
+
+        @type memo: md5_memo
+        """
+        self.md5_memo = memo
+        for obj in self.eclasses.values():
+            obj._md5_memo = memo
+
     def append(self, other):
         """
         Append another instance to this instance. This will cause eclasses
@@ -123,7 +240,7 @@ class cache:
             for y in eclass_filenames:
                 if not y.endswith(".eclass"):
                     continue
-                obj = hashed_path(os.path.join(x, y))
+                obj = hashed_path(os.path.join(x, y), md5_memo=self.md5_memo)
                 obj.eclass_dir = x
                 try:
                     mtime = obj.mtime
@@ -1319,11 +1319,12 @@ class gpkg:
         if self.create_signature:
             self._add_signature(checksum_info, metadata_tarinfo, container)
 
-    def _quickpkg(self, contents, metadata, root_dir, protect=None):
+    def _quickpkg(self, contents, metadata, root_dir, protect=None, snapshot=None):
         """
         Similar to compress, but for quickpkg.
         Will compress the given files to image with root,
-        ignoring all other files.
+        ignoring all other files. If snapshot is given, file data is
+        read from snapshot copies where available (see ContentsSnapshot).
         """
         eout = EOutput()
 
@@ -1472,8 +1473,14 @@ class gpkg:
                                 path, encoding=_encodings["fs"], errors="strict"
                             )
 
-                            with open(path_bytes, "rb") as f:
-                                image_tar.addfile(tarinfo, f)
+                            snapshot_path = snapshot.get(path) if snapshot else None
+                            if snapshot_path is None:
+                                with open(path_bytes, "rb") as f:
+                                    image_tar.addfile(tarinfo, f)
+                            else:
+                                with open(snapshot_path, "rb") as f:
+                                    tarinfo.size = os.fstat(f.fileno()).st_size
+                                    image_tar.addfile(tarinfo, f)
 
                     else:
                         image_tar.addfile(tarinfo)
@@ -1,4 +1,4 @@
-# Copyright 1998-2020 Gentoo Authors
+# Copyright 1998-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 import logging
@@ -132,7 +132,7 @@ def action_metadata(settings, portdb, myopts, porttrees=None):
                 ebuild_location = portdb.findname(cpv, mytree=tree_data.path)
                 if ebuild_location is None:
                     continue
-                ebuild_hash = hashed_path(ebuild_location)
+                ebuild_hash = hashed_path(ebuild_location, md5_memo=portdb._md5_memo)
 
                 try:
                     if not tree_data.src_db.validate_entry(
@@ -51,6 +51,7 @@ env_blacklist = frozenset(
         "PORTAGE_BACKGROUND_UNMERGE",
         "PORTAGE_BUILDDIR_LOCKED",
         "PORTAGE_BUILT_USE",
+        "PORTAGE_CONCURRENT_MERGES",
         "PORTAGE_CONFIGROOT",
         "PORTAGE_EXPLICIT_INHERIT",
         "PORTAGE_INTERNAL_CALLER",
@@ -145,6 +146,7 @@ environ_whitelist = frozenset(
         "PORTAGE_COMPRESS",
         "PORTAGE_COMPRESSION_COMMAND",
         "PORTAGE_COMPRESS_EXCLUDE_SUFFIXES",
+        "PORTAGE_CONCURRENT_MERGES",
         "PORTAGE_CONFIGROOT",
         "PORTAGE_DEBUG",
         "PORTAGE_DEPCACHEDIR",
@@ -301,6 +303,10 @@ environ_filter = frozenset(
         "PORTAGE_BINHOST",
         "PORTAGE_BINPKG_FORMAT",
         "PORTAGE_BUILDDIR_LOCKED",
+        "PORTAGE_CGROUP",
+        "PORTAGE_CGROUP_CPU_WEIGHT",
+        "PORTAGE_CGROUP_IO_WEIGHT",
+        "PORTAGE_CGROUP_MEMORY_HIGH",
         "PORTAGE_CHECKSUM_FILTER",
         "PORTAGE_ELOG_CLASSES",
         "PORTAGE_ELOG_MAILFROM",
@@ -313,6 +319,7 @@ environ_filter = frozenset(
         "PORTAGE_GPG_KEY",
         "PORTAGE_GPG_SIGNING_COMMAND",
         "PORTAGE_IONICE_COMMAND",
+        "PORTAGE_JOB_MEMORY",
         "PORTAGE_PACKAGE_EMPTY_ABORT",
         "PORTAGE_REPO_DUPLICATE_WARN",
         "PORTAGE_RO_DISTDIRS",
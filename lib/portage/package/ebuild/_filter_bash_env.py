@@ -0,0 +1,212 @@
+# Copyright 1999-2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+# This module does not import portage at module level, so that
+# filter-bash-environment.py can load it without the startup cost of
+# the portage package.
+
+import re
+
+__all__ = (
+    "compile_var_pattern",
+    "filter_bash_environment",
+    "filter_saved_environment",
+)
+
+here_doc_re = re.compile(rb".*\s<<[-]?(\w+)$")
+func_start_re = re.compile(rb"^[-\w]+\s*\(\)\s*$")
+
+var_assign_re = re.compile(
+    rb'(^|^declare\s+-\S+\s+|^declare\s+|^export\s+)([^=\s]+)=("|\')?.*$'
+)
+readonly_re = re.compile(rb"^declare\s+-(\S*)r(\S*)\s+")
+# declare without assignment
+var_declare_re = re.compile(rb"^declare(\s+-\S+)?\s+([^=\s]+)\s*$")
+
+
+def _end_quote(line):
+    r"""
+    Return the quote at the end of the line (ignoring trailing
+    whitespace), which is one of b'"', b"'" and b'\\"', or None.
+    This is equivalent to searching for (\\"|"|')\s*$, without
+    trying a match at each position of the line.
+    """
+    line = line.rstrip()
+    if line.endswith(b'\\"'):
+        return b'\\"'
+    last = line[-1:]
+    if last == b'"' or last == b"'":
+        return last
+    return None
+
+
+def have_end_quote(quote, line):
+    """
+    Check if the line has an end quote (useful for handling multi-line
+    quotes). This handles escaped double quotes that may occur at the
+    end of a line. The posix spec does not allow escaping of single
+    quotes inside of single quotes, so that case is not handled.
+    """
+    return _end_quote(line) == quote
+
+
+def filter_declare_readonly_opt(line):
+    readonly_match = readonly_re.match(line)
+    if readonly_match is not None:
+        declare_opts = b""
+        for i in (1, 2):
+            group = readonly_match.group(i)
+            if group is not None:
+                declare_opts += group
+        if declare_opts:
+            line = b"declare -" + declare_opts + b" " + line[readonly_match.end() :]
+        else:
+            line = b"declare " + line[readonly_match.end() :]
+    return line
+
+
+def compile_var_pattern(names):
+    """
+    Compile a pattern that matches the given variable names, which
+    support python regular expression syntax, and also the names of
+    variables that are not supported by bash.
+
+    @param names: variable names or patterns
+    @type names: iterable of bytes
+    @rtype: re.Pattern
+    """
+    names = list(names)
+    # Filter invalid variable names that are not supported by bash.
+    names.append(rb"\d.*")
+    names.append(rb".*\W.*")
+    return re.compile(b"^(" + b"|".join(names) + b")$")
+
+
+def filter_bash_environment(pattern, file_in, file_out):
+    """
+    Copy the output of declare -p and declare -fp from file_in to
+    file_out, while filtering out assignments of variables with names
+    that match pattern, and leaving function definitions and
+    here-documents intact. Both files are binary and file_in is read
+    one line at a time.
+
+    @param pattern: a pattern from compile_var_pattern
+    @type pattern: re.Pattern
+    """
+    # Filter out any instances of the \1 character from variable values
+    # since this character multiplies each time that the environment
+    # is saved (strange bash behavior). This can eventually result in
+    # mysterious 'Argument list too long' errors from programs that have
+    # huge strings of \1 characters in their environment. See bug #222091.
+    write = file_out.write
+    here_doc_delim = None
+    in_func = False
+    multi_line_quote = None
+    multi_line_quote_filter = False
+    for line in file_in:
+        if multi_line_quote is not None:
+            if not multi_line_quote_filter:
+                write(line.replace(b"\1", b""))
+            if _end_quote(line) == multi_line_quote:
+                multi_line_quote = None
+                multi_line_quote_filter = False
+            continue
+
+        if here_doc_delim is not None:
+            if line in here_doc_delim:
+                here_doc_delim = None
+            write(line)
+            continue
+
+        if not in_func:
+            var_assign_match = var_assign_re.match(line)
+            if var_assign_match is not None:
+                quote = var_assign_match.group(3)
+                filter_this = pattern.match(var_assign_match.group(2)) is not None
+                # Exclude the start quote when searching for the end quote,
+                # to ensure that the start quote is not misidentified as the
+                # end quote (happens if there is a newline immediately after
+                # the start quote).
+                if quote is not None and (
+                    _end_quote(line[var_assign_match.end(2) + 2 :]) != quote
+                ):
+                    multi_line_quote = quote
+                    multi_line_quote_filter = filter_this
+                if not filter_this:
+                    if line.startswith(b"declare"):
+                        line = filter_declare_readonly_opt(line)
+                    write(line.replace(b"\1", b""))
+                continue
+            if line.startswith(b"declare"):
+                declare_match = var_declare_re.match(line)
+                if declare_match is not None:
+                    # declare without assignment
+                    if pattern.match(declare_match.group(2)) is None:
+                        write(filter_declare_readonly_opt(line))
+                    continue
+
+        # Note: here-documents are handled before functions since otherwise
+        # it would be possible for the content of a here-document to be
+        # mistaken as the end of a function.
+        if b"<<" in line:
+            here_doc = here_doc_re.match(line)
+            if here_doc is not None:
+                # Compare lines instead of matching ^delim$.
+                delim = here_doc.group(1)
+                here_doc_delim = (delim, delim + b"\n")
+                write(line)
+                continue
+
+        if in_func:
+            if line == b"}\n" or line == b"}":
+                in_func = False
+        elif b"()" in line:
+            in_func = func_start_re.match(line) is not None
+        # Otherwise, this line is not recognized as part of a variable
+        # assignment, function definition, or here document, so just
+        # allow it to pass through.
+        write(line)
+
+
+def filter_saved_environment(env_path):
+    """
+    Filter the environment that ebuild.sh saved as env_path.unfiltered,
+    using the variable names that it wrote to env_path.filter, and
+    replace env_path with the result. The temporary files are removed,
+    and the result gets the ownership and mode of the unfiltered file.
+
+    @param env_path: path of the environment file (usually ${T}/environment)
+    @type env_path: str
+    @rtype: bool
+    @return: True if the environment was saved and filtered, False if
+        it was not saved in this way.
+    """
+    from portage import os
+    from portage.util import apply_secpass_permissions
+
+    unfiltered_path = env_path + ".unfiltered"
+    filter_path = env_path + ".filter"
+    try:
+        with open(filter_path, "rb") as f:
+            pattern = compile_var_pattern(f.read().split())
+        with open(unfiltered_path, "rb") as file_in:
+            st = os.fstat(file_in.fileno())
+            tmp_path = env_path + ".filtered"
+            with open(tmp_path, "wb") as file_out:
+                filter_bash_environment(pattern, file_in, file_out)
+        apply_secpass_permissions(
+            tmp_path,
+            uid=st.st_uid,
+            gid=st.st_gid,
+            mode=st.st_mode & 0o7777,
+        )
+        os.rename(tmp_path, env_path)
+    except FileNotFoundError:
+        return False
+    finally:
+        for path in (filter_path, unfiltered_path):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+    return True
@@ -2000,6 +2000,7 @@ def spawn(
     ipc=True,
     mountns=False,
     pidns=False,
+    ebuild_server=None,
     **keywords,
 ):
     """
@@ -2039,6 +2040,8 @@ def spawn(
     @type mountns: Boolean
     @param pidns: Run this command in isolated PID namespace
     @type pidns: Boolean
+    @param ebuild_server: Run ebuild.sh phases in this server if possible
+    @type ebuild_server: EbuildServer
     @param keywords: Extra options encoded as a dict, to be passed to spawn
     @type keywords: Dictionary
     @rtype: Integer
@@ -2092,6 +2095,11 @@ def spawn(
                 mysettings["PORTAGE_SOCKS5_PROXY"] = proxy
                 mysettings["DISTCC_SOCKS_PROXY"] = proxy
 
+    # Join the cgroup of the build job (FEATURES=cgroup).
+    cgroup = mysettings.get("PORTAGE_CGROUP")
+    if cgroup and "cgroup" in features:
+        keywords["cgroup"] = cgroup
+
     # TODO: Enable fakeroot to be used together with droppriv.  The
     # fake ownership/permissions will have to be converted to real
     # permissions in the merge phase.
@@ -2293,6 +2301,10 @@ def spawn(
 
     try:
         if keywords.get("returnpid") or keywords.get("returnproc"):
+            if ebuild_server is not None and keywords.get("returnproc"):
+                proc = ebuild_server.spawn(spawn_func, mystring, env, keywords)
+                if proc is not None:
+                    return proc
             return spawn_func(mystring, env=env, **keywords)
 
         proc = EbuildSpawnProcess(
@@ -2395,7 +2407,14 @@ def spawnebuild(
 
 
 _post_phase_cmds = {
-    "install": ["install_qa_check", "install_symlink_html_docs", "install_hooks"],
+    "install": (
+        ({}, ["install_qa_check"]),
+        # NEEDED.ELF.2 is written by _post_src_install_needed in between.
+        (
+            {"needed_elf": True},
+            ["install_qa_check_elf", "install_symlink_html_docs", "install_hooks"],
+        ),
+    ),
     "preinst": (
         (
             # Since SELinux does not allow LD_PRELOAD across domain transitions,
@@ -2814,9 +2833,10 @@ def _post_src_install_uid_fix(mysettings, out):
     PORTAGE_INST_GID if necessary. The chown system call may clear
     S_ISUID and S_ISGID bits, so those bits are restored if
     necessary.
-    """
-    from portage.util._desktop_entry import validate_desktop_entry
 
+    The same walk collects .desktop files for validation, which then
+    runs in parallel, up to the number of MAKEOPTS jobs.
+    """
     os = _os_merge
 
     inst_uid = int(mysettings["PORTAGE_INST_UID"])
@@ -2866,7 +2886,7 @@ def _post_src_install_uid_fix(mysettings, out):
         counted_inodes = set()
         fixlafiles_announced = False
         fixlafiles = "fixlafiles" in mysettings.features
-        desktopfile_errors = []
+        desktop_files = []
 
         for parent, dirs, files in os.walk(destdir):
             if portage.utf8_mode:
@@ -2917,11 +2937,16 @@ def _post_src_install_uid_fix(mysettings, out):
                 else:
                     fpath = os.path.join(parent, fname)
 
+                mystat = os.lstat(fpath)
+                is_file = stat.S_ISREG(mystat.st_mode) or (
+                    stat.S_ISLNK(mystat.st_mode) and os.path.isfile(fpath)
+                )
+
                 fpath_relative = fpath[ed_len - 1 :]
                 if (
                     desktop_file_validate
+                    and is_file
                     and fname.endswith(".desktop")
-                    and os.path.isfile(fpath)
                     and fpath_relative.startswith(xdg_dirs)
                     and not (
                         qa_desktop_file
@@ -2929,11 +2954,9 @@ def _post_src_install_uid_fix(mysettings, out):
                         is not None
                     )
                 ):
-                    desktop_validate = validate_desktop_entry(fpath)
-                    if desktop_validate:
-                        desktopfile_errors.extend(desktop_validate)
+                    desktop_files.append(fpath)
 
-                if fixlafiles and fname.endswith(".la") and os.path.isfile(fpath):
+                if fixlafiles and is_file and fname.endswith(".la"):
                     f = open(
                         _unicode_encode(
                             fpath, encoding=_encodings["merge"], errors="strict"
@@ -2987,8 +3010,8 @@ def _post_src_install_uid_fix(mysettings, out):
                             new_contents,
                             mode="wb",
                         )
+                        mystat = os.lstat(fpath)
 
-                mystat = os.lstat(fpath)
                 if stat.S_ISREG(mystat.st_mode) and mystat.st_ino not in counted_inodes:
                     counted_inodes.add(mystat.st_ino)
                     size += mystat.st_size
@@ -3015,6 +3038,9 @@ def _post_src_install_uid_fix(mysettings, out):
         if not unicode_error:
             break
 
+    desktopfile_errors = _validate_desktop_entries(
+        desktop_files, int(makeopts_to_job_count(mysettings.get("MAKEOPTS")) or 1)
+    )
     if desktopfile_errors:
         for l in _merge_desktopfile_error(desktopfile_errors):
             l = l.replace(mysettings["ED"], "/")
@@ -3042,6 +3068,21 @@ def _post_src_install_uid_fix(mysettings, out):
     _reapply_bsdflags_to_image(mysettings)
 
 
+def _validate_desktop_entries(paths, jobs):
+    """
+    Run desktop-file-validate for the given paths, with up to jobs
+    processes at once, and return the combined output lines.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from portage.util._desktop_entry import validate_desktop_entry
+
+    if jobs < 2 or len(paths) < 2:
+        return [line for path in paths for line in validate_desktop_entry(path)]
+    with ThreadPoolExecutor(max_workers=min(jobs, len(paths))) as executor:
+        results = executor.map(validate_desktop_entry, paths)
+        return [line for lines in results for line in lines]
+
+
 def _reapply_bsdflags_to_image(mysettings):
     """
     Reapply flags saved and removed by _preinst_bsdflags.
@@ -3099,6 +3140,80 @@ def _inject_libc_dep(build_info_dir, mysettings):
             f.write(f"{rdepend}\n")
 
 
+def _post_src_install_needed(mysettings):
+    """
+    Write $PORTAGE_BUILDDIR/build-info/NEEDED and NEEDED.ELF.2 for the
+    ELF files in $D. The files are parsed in parallel, up to the number
+    of MAKEOPTS jobs.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from portage.util._dyn_libs.NeededEntry import NeededEntry
+    from portage.util.elf.dynamic import ELFDynamic
+
+    os = _os_merge
+
+    image_dir = mysettings["D"].rstrip(os.sep)
+    build_info_dir = os.path.join(mysettings["PORTAGE_BUILDDIR"], "build-info")
+    for name in ("NEEDED", "NEEDED.ELF.2"):
+        try:
+            os.unlink(os.path.join(build_info_dir, name))
+        except FileNotFoundError:
+            pass
+
+    # Like scanelf -R, consider regular files only.
+    paths = []
+    for parent, dirs, files in os.walk(image_dir):
+        for fname in files:
+            fpath = os.path.join(parent, fname)
+            try:
+                if stat.S_ISREG(os.lstat(fpath).st_mode):
+                    paths.append(fpath)
+            except OSError:
+                continue
+    paths.sort()
+
+    def read_dynamic(fpath):
+        try:
+            with open(
+                _unicode_encode(fpath, encoding=_encodings["merge"], errors="strict"),
+                "rb",
+            ) as f:
+                return ELFDynamic.read(f)
+        except OSError:
+            return None
+
+    jobs = int(makeopts_to_job_count(mysettings.get("MAKEOPTS")) or 1)
+    if jobs < 2 or len(paths) < 2:
+        results = list(map(read_dynamic, paths))
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(read_dynamic, paths))
+
+    needed_lines = []
+    needed_elf_lines = []
+    for fpath, elf in zip(paths, results):
+        if elf is None:
+            continue
+        entry = NeededEntry.from_elf(fpath[len(image_dir) :], elf)
+        needed_lines.append(f"{entry.filename} {','.join(entry.needed)}\n")
+        needed_elf_lines.append(str(entry))
+
+    for name, lines in (("NEEDED", needed_lines), ("NEEDED.ELF.2", needed_elf_lines)):
+        if not lines:
+            continue
+        with open(
+            _unicode_encode(
+                os.path.join(build_info_dir, name),
+                encoding=_encodings["fs"],
+                errors="strict",
+            ),
+            mode="w",
+            encoding=_encodings["repo.content"],
+            errors="strict",
+        ) as f:
+            f.writelines(lines)
+
+
 def _post_src_install_soname_symlinks(mysettings, out):
     """
     Check that libraries in $D have corresponding soname symlinks.
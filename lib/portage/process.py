@@ -565,6 +565,7 @@ def spawn(
     unshare_mount=False,
     unshare_pid=False,
     warn_on_large_env=False,
+    cgroup=None,
 ) -> Union[int, MultiprocessingProcess, list[int]]:
     """
     Spawns a given command.
@@ -615,6 +616,9 @@ def spawn(
     @type unshare_mount: Boolean
     @param unshare_pid: If True, PID ns will be unshared from the spawned process
     @type unshare_pid: Boolean
+    @param cgroup: Path of a cgroup v2 directory that the spawned process
+            joins, if permitted
+    @type cgroup: String
 
     logfile requires stdout and stderr to be assigned to this process (ie not pointed
        somewhere else.)
@@ -756,6 +760,7 @@ def spawn(
             unshare_pid,
             unshare_flags,
             env_stats,
+            cgroup,
         ),
         fd_pipes=fd_pipes,
         close_fds=close_fds,
@@ -909,6 +914,7 @@ def _exec_wrapper(
     unshare_pid,
     unshare_flags,
     env_stats,
+    cgroup=None,
 ):
     """
     Calls _exec with the given args and handles any raised Exception.
@@ -936,6 +942,7 @@ def _exec_wrapper(
             unshare_mount,
             unshare_pid,
             unshare_flags,
+            cgroup,
         )
     except Exception as e:
         if isinstance(e, OSError) and e.errno == errno.E2BIG:
@@ -975,6 +982,7 @@ def _exec(
     unshare_mount,
     unshare_pid,
     unshare_flags,
+    cgroup=None,
 ):
     """
     Execute a given binary with options
@@ -1012,6 +1020,8 @@ def _exec(
     @type unshare_pid: Boolean
     @param unshare_flags: Flags for the unshare(2) function
     @type unshare_flags: Integer
+    @param cgroup: Path of a cgroup v2 directory to join
+    @type cgroup: String
     @rtype: None
     @return: Never returns (calls os.execve)
     """
@@ -1058,6 +1068,16 @@ def _exec(
     # the parent process (see bug #289486).
     signal.signal(signal.SIGQUIT, signal.SIG_DFL)
 
+    # Join the cgroup (while still uid==0), so that all descendants
+    # are accounted to it. Failure is not fatal, since the cgroup
+    # is only used for resource controls and accounting.
+    if cgroup:
+        try:
+            with open(os.path.join(cgroup, "cgroup.procs"), "w") as f:
+                f.write(str(os.getpid()))
+        except OSError:
+            pass
+
     # Unshare (while still uid==0)
     have_unshare = False
     libc = None
@@ -0,0 +1,137 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+"""
+Determine which packages of a git repository need their metadata cache
+entries regenerated after the repository changed, so that egencache
+does not need to process the whole repository.
+"""
+
+import subprocess
+
+import portage
+from portage import os
+from portage.cache.cache_errors import CacheError
+from portage.versions import cpv_getkey
+
+__all__ = (
+    "affected_cps",
+    "git_changed_paths",
+    "inherits_foreign_eclasses",
+    "scan_eclass_dependents",
+)
+
+# Changes to these files can affect the metadata of every package.
+_global_paths = frozenset(("metadata/layout.conf",))
+
+
+def git_changed_paths(location, since):
+    """
+    Return the paths of files that differ between the commit since and
+    the work tree, including untracked files, relative to location.
+
+    @param location: a directory inside of a git work tree
+    @type location: str
+    @param since: a commit, such as the HEAD before a sync
+    @type since: str
+    @rtype: list or None
+    @return: a list of paths, or None if git failed, for example
+        because the commit is unknown
+    """
+    paths = []
+    for cmd in (
+        ["git", "diff", "--relative", "--no-renames", "--name-only", "-z", since, "--"],
+        ["git", "ls-files", "--others", "--exclude-standard", "-z"],
+    ):
+        try:
+            output = subprocess.run(
+                cmd,
+                cwd=portage._unicode_encode(location),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                check=True,
+            ).stdout
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        paths.extend(
+            portage._unicode_decode(path) for path in output.split(b"\0") if path
+        )
+    return paths
+
+
+def inherits_foreign_eclasses(repo_config):
+    """
+    Return True if the packages of a repository can inherit eclasses of
+    other repositories, such as its masters. Changes to those eclasses
+    do not show up in the git history of the repository.
+
+    @param repo_config: the repository
+    @type repo_config: portage.repository.config.RepoConfig
+    @rtype: bool
+    """
+    return any(
+        location != repo_config.location for location in repo_config.eclass_locations
+    )
+
+
+def scan_eclass_dependents(cache, eclasses):
+    """
+    Return the cpvs of cache entries that inherit any of the given
+    eclasses, directly or indirectly. This reads every entry.
+
+    @param cache: a metadata cache such as md5-cache
+    @type cache: portage.cache.template.database
+    @param eclasses: eclass names
+    @type eclasses: set
+    @rtype: set
+    """
+    cpvs = set()
+    for cpv in cache:
+        try:
+            entry = cache[cpv]
+        except (KeyError, CacheError):
+            continue
+        if not eclasses.isdisjoint(entry.get("_eclasses_", ())):
+            cpvs.add(cpv)
+    return cpvs
+
+
+def affected_cps(paths, eclass_dependents):
+    """
+    Return the packages whose cache entries may be affected by changes
+    to the given paths. These are the packages that have changed
+    ebuilds, including removed ones, and the packages that inherit a
+    changed eclass.
+
+    @param paths: paths relative to the repository, as returned by
+        git_changed_paths
+    @type paths: iterable
+    @param eclass_dependents: a function that takes a set of eclass
+        names and returns the cpvs that inherit them, or None if it
+        is unknown which cpvs inherit eclasses
+    @type eclass_dependents: callable
+    @rtype: set or None
+    @return: a set of category/package names, or None if all cache
+        entries need to be regenerated
+    """
+    cps = set()
+    eclasses = set()
+    for path in paths:
+        if path in _global_paths:
+            return None
+        parts = path.split(os.sep)
+        if len(parts) == 2 and parts[0] == "eclass":
+            if parts[1].endswith(".eclass"):
+                eclasses.add(parts[1][: -len(".eclass")])
+        elif len(parts) == 3 and parts[2].endswith(".ebuild"):
+            cps.add(f"{parts[0]}/{parts[1]}")
+
+    if eclasses:
+        if eclass_dependents is None:
+            return None
+        for cpv in eclass_dependents(eclasses):
+            cp = cpv_getkey(cpv)
+            if cp is not None:
+                cps.add(cp)
+
+    return cps
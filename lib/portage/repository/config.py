@@ -1,4 +1,4 @@
-# Copyright 2010-2025 Gentoo Authors
+# Copyright 2010-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 import collections
@@ -199,6 +199,7 @@ class RepoConfig:
         "volatile",
         "_eapis_banned",
         "_eapis_deprecated",
+        "_eclass_index",
         "_masters_orig",
     )
 
@@ -236,6 +237,7 @@ class RepoConfig:
         # Eclass databases and locations are computed later.
         self.eclass_db = None
         self.eclass_locations = None
+        self._eclass_index = None
 
         if local_config or "masters" in force:
             # Masters from repos.conf override layout.conf.
@@ -600,6 +602,10 @@ class RepoConfig:
                 from portage.cache.flat_hash import md5_database as database
 
                 name = "metadata/md5-cache"
+            elif fmt == "md5-packed":
+                from portage.cache.packed import md5_database as database
+
+                name = "metadata/md5-cache.pack"
 
             if name is not None:
                 yield database(self.location, name, auxdbkeys, readonly=readonly)
@@ -615,6 +621,34 @@ class RepoConfig:
             None,
         )
 
+    def eclass_dependents(self, name):
+        """
+        Returns the cpvs of this repository that inherit the named eclass,
+        directly or indirectly, according to metadata/eclass-index. If
+        the index does not exist, then it is created in memory from the
+        pregenerated cache, which requires reading every cache entry.
+
+        @param name: an eclass name
+        @type name: str
+        @rtype: frozenset or None
+        @return: the cpvs that inherit the eclass, or None if neither an
+                index nor a pregenerated cache is available
+        """
+        if self._eclass_index is None:
+            from portage.cache.index.eclass_index import eclass_index
+            from portage.dbapi import dbapi
+
+            index = eclass_index.load(
+                os.path.join(self.location, "metadata", "eclass-index")
+            )
+            if index is None:
+                cache = self.get_pregenerated_cache(dbapi._known_keys, readonly=True)
+                if cache is None:
+                    return None
+                index = eclass_index.from_cache(cache)
+            self._eclass_index = index
+        return frozenset(self._eclass_index.dependents((name,)))
+
     def load_manifest(self, *args, **kwds):
         kwds["thin"] = self.thin_manifest
         kwds["allow_missing"] = self.allow_missing_manifest
@@ -1544,6 +1578,10 @@ def parse_layout_conf(repo_location, repo_name=None):
         # will NOT recognize md5-dict format unless it is explicitly
         # listed in layout.conf.
         cache_formats = []
+        # The packed format falls back to md5-cache for missing entries,
+        # so prefer it if both are available.
+        if os.path.isfile(os.path.join(repo_location, "metadata", "md5-cache.pack")):
+            cache_formats.append("md5-packed")
         if os.path.isdir(os.path.join(repo_location, "metadata", "md5-cache")):
             cache_formats.append("md5-dict")
         if os.path.isdir(os.path.join(repo_location, "metadata", "cache")):
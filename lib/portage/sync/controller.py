@@ -368,6 +368,13 @@ class SyncManager:
         if proc.returncode == os.EX_OK:
             exitcode, message, updatecache_flg, hooks_enabled = proc.result
 
+        if exitcode == os.EX_OK:
+            # Refresh the directory listings that were indexed before
+            # the sync, so that they are valid for the next process.
+            tree_index = self.portdb._tree_index(repo.location)
+            tree_index.update()
+            tree_index.store()
+
         if updatecache_flg and "metadata-transfer" not in self.settings.features:
             updatecache_flg = False
 
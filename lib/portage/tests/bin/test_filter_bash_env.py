@@ -1,13 +1,21 @@
-# Copyright 2018-2023 Gentoo Authors
+# Copyright 2018-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 import difflib
+import io
 import os
 import subprocess
+import tempfile
 
 import portage
+from portage import shutil
 from portage.const import PORTAGE_BIN_PATH
-from portage.tests import TestCase
+from portage.package.ebuild._filter_bash_env import (
+    compile_var_pattern,
+    filter_bash_environment,
+    filter_saved_environment,
+)
+from portage.tests import TestCase, get_pythonpath
 
 
 class TestFilterBashEnv(TestCase):
@@ -79,11 +87,48 @@ use_if_iuse ()
     in_iuse $1 || return 1;
     use $1
 }
+""",
+            ),
+            (
+                "B",
+                rb"""declare -- A="one
+two \"
+three"
+declare -- B="one
+two"
+B2 ()
+{
+    cat <<EOF
+}
+EOFX
+EOF
+}
+declare -r C
+""",
+                rb"""declare -- A="one
+two \"
+three"
+B2 ()
+{
+    cat <<EOF
+}
+EOFX
+EOF
+}
+declare C
 """,
             ),
         )
 
         for filter_vars, env_in, env_out in test_cases:
+            file_out = io.BytesIO()
+            filter_bash_environment(
+                compile_var_pattern(filter_vars.encode().split()),
+                io.BytesIO(env_in),
+                file_out,
+            )
+            self.assertEqual(file_out.getvalue(), env_out)
+
             proc = None
             try:
                 proc = subprocess.Popen(
@@ -92,6 +137,7 @@ use_if_iuse ()
                         os.path.join(PORTAGE_BIN_PATH, "filter-bash-environment.py"),
                         filter_vars,
                     ],
+                    env=dict(os.environ, PYTHONPATH=get_pythonpath()),
                     stdin=subprocess.PIPE,
                     stdout=subprocess.PIPE,
                 )
@@ -112,3 +158,42 @@ use_if_iuse ()
             )
 
             self.assertEqual(diff, [])
+
+    def testScriptDoesNotImportPortage(self):
+        # Importing portage would more than double the time that the
+        # script takes to run.
+        script = os.path.join(PORTAGE_BIN_PATH, "filter-bash-environment.py")
+        output = subprocess.check_output(
+            [
+                portage._python_interpreter,
+                "-c",
+                "import runpy, sys; "
+                f"sys.argv = [{script!r}, 'A']; "
+                "sys.stdin = open(sys.argv[0]); "
+                f"runpy.run_path({script!r}, run_name='__main__'); "
+                "sys.stderr.write(str('portage' in sys.modules))",
+            ],
+            env=dict(os.environ, PYTHONPATH=get_pythonpath()),
+            stderr=subprocess.STDOUT,
+        )
+        self.assertTrue(output.endswith(b"False"), output[-200:])
+
+    def testFilterSavedEnvironment(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            env_path = os.path.join(tmpdir, "environment")
+            self.assertFalse(filter_saved_environment(env_path))
+
+            with open(env_path + ".filter", "w") as f:
+                f.write("A B.*\n")
+            with open(env_path + ".unfiltered", "w") as f:
+                f.write('declare -- A="1"\ndeclare -x BC="2"\ndeclare -- C="3"\n')
+            os.chmod(env_path + ".unfiltered", 0o664)
+
+            self.assertTrue(filter_saved_environment(env_path))
+            with open(env_path) as f:
+                self.assertEqual(f.read(), 'declare -- C="3"\n')
+            self.assertEqual(os.stat(env_path).st_mode & 0o777, 0o664)
+            self.assertEqual(os.listdir(tmpdir), ["environment"])
+        finally:
+            shutil.rmtree(tmpdir)
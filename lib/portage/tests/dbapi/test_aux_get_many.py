@@ -0,0 +1,91 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+from portage._sets.dbapi import EverythingSet
+from portage.dep import Atom
+from portage.tests import TestCase
+from portage.tests.resolver.ResolverPlayground import ResolverPlayground
+
+
+class AuxGetManyTestCase(TestCase):
+    def testAuxGetMany(self):
+        ebuilds = {
+            "dev-libs/A-1": {"EAPI": "8", "SLOT": "1"},
+            "dev-libs/A-2": {"EAPI": "8", "SLOT": "2"},
+            "dev-libs/B-1": {"EAPI": "7", "DESCRIPTION": "B"},
+            "dev-libs/C-1": {"EAPI": "8"},
+        }
+        installed = {
+            "dev-libs/A-1": {"EAPI": "8", "SLOT": "1"},
+            "dev-libs/B-1": {"EAPI": "7", "SLOT": "0"},
+        }
+
+        playground = ResolverPlayground(
+            ebuilds=ebuilds,
+            installed=installed,
+            user_config={
+                # Use a cache that is not pregenerated, so that
+                # metadata is generated for each ebuild.
+                "modules": ("portdbapi.auxdbmodule = portage.cache.volatile.database",),
+            },
+        )
+        try:
+            trees = playground.trees[playground.eroot]
+            keys = ["EAPI", "SLOT", "DESCRIPTION"]
+            cpvs = [
+                "dev-libs/B-1",
+                "dev-libs/A-2",
+                "dev-libs/Z-1",
+                "dev-libs/C-1",
+                "dev-libs/A-1",
+                "dev-libs/B-1",
+            ]
+
+            for tree, found in (
+                (
+                    "porttree",
+                    ("dev-libs/A-1", "dev-libs/A-2", "dev-libs/B-1", "dev-libs/C-1"),
+                ),
+                ("vartree", ("dev-libs/A-1", "dev-libs/B-1")),
+            ):
+                db = trees[tree].dbapi
+                # For porttree, metadata is generated by aux_get_many,
+                # since it is called first.
+                results = db.aux_get_many(cpvs, keys)
+                expected = [
+                    db.aux_get(cpv, keys) if cpv in found else None for cpv in cpvs
+                ]
+                self.assertEqual(results, expected, tree)
+
+            portdb = trees["porttree"].dbapi
+            self.assertEqual(
+                portdb.aux_get_many(cpvs[:2], keys),
+                [["7", "0", "B"], ["8", "2", ""]],
+            )
+            loop = portdb._event_loop
+            self.assertEqual(
+                loop.run_until_complete(
+                    portdb.async_aux_get_many(cpvs, keys, loop=loop, max_jobs=2)
+                ),
+                portdb.aux_get_many(cpvs, keys),
+            )
+
+            vardb = trees["vartree"].dbapi
+            self.assertEqual(
+                sorted(
+                    pkg.slot
+                    for pkg in vardb._pkg_str_many(
+                        ["dev-libs/A-1", "dev-libs/Z-1", "dev-libs/B-1"], None
+                    )
+                ),
+                ["0", "1"],
+            )
+
+            everything = EverythingSet(vardb)
+            everything.load()
+            self.assertEqual(
+                set(everything.getAtoms()),
+                {Atom("dev-libs/A:1"), Atom("dev-libs/B:0")},
+            )
+        finally:
+            playground.cleanup()
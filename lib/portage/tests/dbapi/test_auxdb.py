@@ -1,4 +1,4 @@
-# Copyright 2020-2024 Gentoo Authors
+# Copyright 2020-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 import functools
@@ -31,6 +31,102 @@ class AuxdbTestCase(TestCase):
             self.skipTest("sqlite3 import failed")
         self._test_mod("portage.cache.sqlite.database", picklable=True)
 
+    def test_sqlite_wal(self):
+        try:
+            import sqlite3
+        except ImportError:
+            self.skipTest("sqlite3 import failed")
+        self._test_mod("portage.cache.sqlite.wal_database", picklable=True)
+
+    def test_sqlite_batch(self):
+        try:
+            import sqlite3
+        except ImportError:
+            self.skipTest("sqlite3 import failed")
+        from portage.cache.sqlite import database
+
+        self._test_sqlite_batch(database, "delete")
+
+    def test_sqlite_wal_batch(self):
+        try:
+            import sqlite3
+        except ImportError:
+            self.skipTest("sqlite3 import failed")
+        from portage.cache.sqlite import wal_database
+
+        self._test_sqlite_batch(wal_database, "wal")
+
+    def test_sqlite_regen_sync_rate(self):
+        try:
+            import sqlite3
+        except ImportError:
+            self.skipTest("sqlite3 import failed")
+        from _emerge.MetadataRegen import MetadataRegen
+
+        ebuilds = {"cat/A-1": {"EAPI": "8"}, "cat/B-1": {"EAPI": "8"}}
+        playground = ResolverPlayground(
+            ebuilds=ebuilds,
+            user_config={
+                "modules": ("portdbapi.auxdbmodule = portage.cache.sqlite.database",)
+            },
+        )
+        try:
+            portdb = playground.trees[playground.eroot]["porttree"].dbapi
+            repo_location = portdb.getRepositoryPath("test_repo")
+            auxdb = portdb.auxdb[repo_location]
+            auxdb.sync(10)
+
+            regen = MetadataRegen(portdb, main=True)
+            self.assertEqual(auxdb.sync_rate, MetadataRegen._auxdb_sync_rate)
+            regen.start()
+            regen.scheduler.run_until_complete(regen.async_wait())
+            self.assertEqual(regen.returncode, 0)
+
+            # The previous rate is restored, and the updates are committed.
+            self.assertEqual(auxdb.sync_rate, 10)
+            reader = type(auxdb)(
+                portdb.depcachedir, repo_location, portdb._known_keys, readonly=True
+            )
+            self.assertEqual(sorted(reader), sorted(ebuilds))
+        finally:
+            playground.cleanup()
+
+    def _test_sqlite_batch(self, database, journal_mode):
+        playground = ResolverPlayground()
+        try:
+            keys = ("DESCRIPTION", "EAPI", "SLOT")
+            md5 = "0" * 32
+            location = playground.settings["PORTAGE_DEPCACHEDIR"]
+            writer = database(location, "test", keys)
+            reader = database(location, "test", keys, readonly=True)
+            writer["cat/A-1"] = {"EAPI": "8", "SLOT": "0", "_md5_": md5}
+            self.assertEqual(reader["cat/A-1"]["EAPI"], "8")
+
+            writer.sync(100)
+            writer["cat/A-1"] = {"EAPI": "7", "SLOT": "0", "_md5_": md5}
+            writer["cat/B-1"] = {"DESCRIPTION": "it's B", "SLOT": "1", "_md5_": md5}
+            del writer["cat/A-1"]
+            writer["cat/C-1"] = {"SLOT": "0", "_md5_": md5}
+
+            # Pending updates are visible to the writer only.
+            self.assertNotIn("cat/A-1", writer)
+            self.assertRaises(KeyError, writer.__getitem__, "cat/A-1")
+            self.assertEqual(writer["cat/B-1"]["DESCRIPTION"], "it's B")
+            self.assertEqual(reader["cat/A-1"]["EAPI"], "8")
+            self.assertNotIn("cat/B-1", reader)
+
+            writer.sync()
+            self.assertNotIn("cat/A-1", reader)
+            self.assertEqual(reader["cat/B-1"]["DESCRIPTION"], "it's B")
+            self.assertEqual(reader["cat/B-1"]["SLOT"], "1")
+            self.assertEqual(sorted(reader), ["cat/B-1", "cat/C-1"])
+
+            cursor = writer._db_cursor
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], journal_mode)
+        finally:
+            playground.cleanup()
+
     def _test_mod(self, auxdbmodule, multiproc=True, picklable=True):
         ebuilds = {
             "cat/A-1": {
@@ -0,0 +1,36 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+from portage.dbapi._CompactContents import CompactContents
+from portage.tests import TestCase
+
+
+class CompactContentsTestCase(TestCase):
+    def testCompactContents(self):
+        contents = {
+            "/usr": ("dir",),
+            "/usr/bin": ("dir",),
+            "/usr/bin/foo": ("obj", "1700000000", "d41d8cd98f00b204e9800998ecf8427e"),
+            "/usr/bin/bar": ("sym", "1700000001", "foo"),
+            "/usr/bin/baz": ("obj", "0017", "d41d8cd98f00b204e9800998ecf8427e"),
+            "/usr/bin/upper": ("obj", "5", "D41D8CD98F00B204E9800998ECF8427E"),
+            "/dev/null": ("dev",),
+            "/run/fifo": ("fif",),
+            "/": ("dir",),
+        }
+        compact = CompactContents(contents)
+
+        self.assertEqual(len(compact), len(contents))
+        self.assertEqual(sorted(compact), sorted(contents))
+        self.assertEqual(compact.copy(), contents)
+        self.assertIsInstance(compact.copy(), dict)
+        for path, data in contents.items():
+            self.assertIn(path, compact)
+            self.assertEqual(compact[path], data)
+
+        for path in ("/usr/bin/missing", "/usr/bin/fo", "/opt", "usr", ""):
+            self.assertNotIn(path, compact)
+            self.assertRaises(KeyError, compact.__getitem__, path)
+
+        self.assertEqual(len(CompactContents()), 0)
+        self.assertFalse(CompactContents())
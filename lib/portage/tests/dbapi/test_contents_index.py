@@ -0,0 +1,74 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import os
+
+import portage
+from portage.dbapi._ContentsIndex import ContentsIndex
+from portage.dbapi.vartree import dblink
+from portage.tests import TestCase
+from portage.tests.resolver.ResolverPlayground import ResolverPlayground
+
+
+class ContentsIndexTestCase(TestCase):
+    def testContentsIndex(self):
+        installed = {
+            "app-misc/A-1": {"EAPI": "8"},
+        }
+        playground = ResolverPlayground(installed=installed)
+        try:
+            settings = portage.config(clone=playground.settings)
+            settings.features.add("contents-index")
+            eroot = settings["EROOT"]
+            vardb = playground.trees[eroot]["vartree"].dbapi
+            dbdir = vardb.getpath("app-misc/A-1")
+            eprefix = settings["EPREFIX"]
+
+            with open(os.path.join(dbdir, "CONTENTS"), "w") as f:
+                f.write(
+                    f"dir {eprefix}/usr/bin\n"
+                    f"obj {eprefix}/usr/bin/foo d41d8cd98f00b204e9800998ecf8427e 1\n"
+                    f"sym {eprefix}/usr/bin/bar -> foo 1\n"
+                )
+
+            pkg = dblink(
+                "app-misc",
+                "A-1",
+                settings=settings,
+                treetype="vartree",
+                vartree=playground.trees[eroot]["vartree"],
+            )
+            pkg._write_contents_index()
+            self.assertTrue(os.path.exists(os.path.join(dbdir, ContentsIndex.filename)))
+            pkg._clear_contents_cache()
+
+            index = ContentsIndex.load(dbdir)
+            self.assertNotEqual(index, None)
+            for path in ("/usr", "/usr/bin", "/usr/bin/foo", "/usr/bin/bar"):
+                self.assertTrue(index.contains(eprefix + path))
+                self.assertTrue(index.contains_basename(os.path.basename(path)))
+            self.assertFalse(index.contains(eprefix + "/usr/bin/baz"))
+            self.assertFalse(index.contains_basename("baz"))
+            index.close()
+
+            # Ownership is answered by the index without parsing CONTENTS.
+            self.assertTrue(pkg.isowner(eprefix + "/usr/bin/foo"))
+            self.assertFalse(pkg.isowner(eprefix + "/usr/bin/baz"))
+            self.assertEqual(pkg.contentscache, None)
+            pkg._clear_contents_cache()
+
+            # A modified CONTENTS file invalidates the index.
+            with open(os.path.join(dbdir, "CONTENTS"), "a") as f:
+                f.write(
+                    f"obj {eprefix}/usr/bin/baz d41d8cd98f00b204e9800998ecf8427e 1\n"
+                )
+            self.assertEqual(ContentsIndex.load(dbdir), None)
+            self.assertTrue(pkg.isowner(eprefix + "/usr/bin/baz"))
+
+            settings.features.discard("contents-index")
+            pkg._write_contents_index()
+            self.assertFalse(
+                os.path.exists(os.path.join(dbdir, ContentsIndex.filename))
+            )
+        finally:
+            playground.cleanup()
@@ -0,0 +1,81 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import errno
+import io
+import tarfile
+import tempfile
+from unittest.mock import patch
+
+from portage import os, shutil
+from portage.dbapi._ContentsSnapshot import ContentsSnapshot
+from portage.dbapi.vartree import tar_contents
+from portage.tests import TestCase
+from portage.util.file_copy import copyfile
+
+
+class ContentsSnapshotTestCase(TestCase):
+    def _create_root(self, tempdir):
+        root = os.path.join(tempdir, "root") + os.sep
+        os.makedirs(os.path.join(root, "usr/bin"))
+        contents = {
+            os.path.join(root, "usr"): ("dir",),
+            os.path.join(root, "usr/bin"): ("dir",),
+        }
+        for name in ("foo", "bar"):
+            path = os.path.join(root, "usr/bin", name)
+            with open(path, "w") as f:
+                f.write(f"{name}\n")
+            contents[path] = ("obj", "0", "0" * 32)
+        return root, contents
+
+    def testSnapshot(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            root, contents = self._create_root(tempdir)
+            foo = os.path.join(root, "usr/bin/foo")
+
+            # Emulate reflinks with regular copies, since the
+            # filesystem of the test environment may not support them.
+            with patch("portage.dbapi._ContentsSnapshot.clonefile", new=copyfile):
+                with ContentsSnapshot(contents, tempdir) as snapshot:
+                    self.assertEqual(len(snapshot), 2)
+                    self.assertEqual(snapshot.get(os.path.join(root, "usr")), None)
+                    snapshot_dir = os.path.dirname(snapshot.get(foo))
+
+                    # Modify the live file after the snapshot was taken.
+                    with open(foo, "w") as f:
+                        f.write("modified\n")
+
+                    output = io.BytesIO()
+                    with tarfile.open(fileobj=output, mode="w") as tar:
+                        tar_contents(contents, root, tar, snapshot=snapshot)
+
+            self.assertFalse(os.path.exists(snapshot_dir))
+            output.seek(0)
+            with tarfile.open(fileobj=output, mode="r") as tar:
+                self.assertEqual(tar.extractfile("./usr/bin/foo").read(), b"foo\n")
+                self.assertEqual(tar.extractfile("./usr/bin/bar").read(), b"bar\n")
+        finally:
+            shutil.rmtree(tempdir)
+
+    def testUnsupported(self):
+        tempdir = tempfile.mkdtemp()
+        calls = []
+
+        def clonefile(src, dst):
+            calls.append(src)
+            raise OSError(errno.EOPNOTSUPP, os.strerror(errno.EOPNOTSUPP))
+
+        try:
+            root, contents = self._create_root(tempdir)
+            with patch("portage.dbapi._ContentsSnapshot.clonefile", new=clonefile):
+                with ContentsSnapshot(contents, tempdir) as snapshot:
+                    self.assertEqual(len(snapshot), 0)
+                    self.assertEqual(
+                        snapshot.get(os.path.join(root, "usr/bin/foo")), None
+                    )
+            # Copying stops after the first unsupported error.
+            self.assertEqual(len(calls), 1)
+        finally:
+            shutil.rmtree(tempdir)
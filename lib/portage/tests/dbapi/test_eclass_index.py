@@ -0,0 +1,52 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import tempfile
+
+from portage import os, shutil
+from portage.cache.index.eclass_index import eclass_index
+from portage.tests import TestCase
+
+
+class EclassIndexTestCase(TestCase):
+    def testIndex(self):
+        index = eclass_index()
+        index.add("dev-libs/A-1", ("foo", "bar"))
+        index.add("dev-libs/A-2", ("foo",))
+        index.add("dev-libs/B-1", ())
+        self.assertEqual(index.dependents(("foo",)), {"dev-libs/A-1", "dev-libs/A-2"})
+        self.assertEqual(index.dependents(("bar", "baz")), {"dev-libs/A-1"})
+        self.assertEqual(sorted(index), ["dev-libs/A-1", "dev-libs/A-2"])
+
+        # Adding an entry again replaces the eclasses recorded before.
+        index.add("dev-libs/A-1", ("baz",))
+        self.assertEqual(index.dependents(("bar",)), set())
+        self.assertEqual(index.dependents(("baz",)), {"dev-libs/A-1"})
+
+        index.discard("dev-libs/A-2")
+        index.discard("dev-libs/C-1")
+        self.assertEqual(index.dependents(("foo",)), set())
+
+    def testWriteLoad(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tempdir, "metadata", "eclass-index")
+            self.assertIsNone(eclass_index.load(filename))
+
+            index = eclass_index()
+            index.add("dev-libs/A-1", ("foo", "bar"))
+            index.add("dev-libs/B-1", ("foo",))
+            index.write(filename)
+            with open(filename) as f:
+                self.assertEqual(
+                    f.read(), "bar dev-libs/A-1\nfoo dev-libs/A-1 dev-libs/B-1\n"
+                )
+
+            index = eclass_index.load(filename)
+            self.assertEqual(
+                index.dependents(("foo",)), {"dev-libs/A-1", "dev-libs/B-1"}
+            )
+            index.discard("dev-libs/A-1")
+            self.assertEqual(index.dependents(("bar",)), set())
+        finally:
+            shutil.rmtree(tempdir)
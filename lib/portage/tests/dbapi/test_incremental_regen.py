@@ -0,0 +1,234 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import subprocess
+
+import portage
+from portage import os
+from portage.const import PORTAGE_PYM_PATH
+from portage.process import find_binary
+from portage.repository._git_changes import (
+    affected_cps,
+    git_changed_paths,
+    inherits_foreign_eclasses,
+)
+from portage.tests import TestCase
+from portage.tests.resolver.ResolverPlayground import ResolverPlayground
+
+
+class IncrementalRegenTestCase(TestCase):
+    def testAffectedCps(self):
+        dependents = {"foo": {"dev-libs/A-1", "dev-libs/A-2"}, "bar": {"sys-apps/B-1"}}
+
+        def eclass_dependents(eclasses):
+            return set().union(*(dependents.get(x, ()) for x in eclasses))
+
+        self.assertEqual(
+            affected_cps(
+                [
+                    "app-misc/C/C-1.ebuild",
+                    "app-misc/D/metadata.xml",
+                    "app-misc/E/files/e.patch",
+                    "eclass/foo.eclass",
+                    "profiles/package.mask",
+                ],
+                eclass_dependents,
+            ),
+            {"app-misc/C", "dev-libs/A"},
+        )
+        self.assertEqual(affected_cps(["eclass/baz.eclass"], eclass_dependents), set())
+        self.assertIsNone(affected_cps(["eclass/foo.eclass"], None))
+        self.assertEqual(affected_cps(["app-misc/C/C-1.ebuild"], None), {"app-misc/C"})
+        self.assertIsNone(
+            affected_cps(["metadata/layout.conf"], eclass_dependents),
+        )
+
+    def _egencache(self, settings, repo, *args):
+        proc = subprocess.run(
+            (
+                portage._python_interpreter,
+                "-b",
+                "-Wd",
+                os.path.join(str(self.bindir), "egencache"),
+                "--repo",
+                repo,
+                "--repositories-configuration",
+                settings.repositories.config_string(),
+                "--update",
+            )
+            + args,
+            env={
+                "PATH": settings["PATH"],
+                "PORTAGE_OVERRIDE_EPREFIX": settings["EPREFIX"],
+                "PORTAGE_PYTHON": portage._python_interpreter,
+                "PORTAGE_REPOSITORIES": settings.repositories.config_string(),
+                "PYTHONDONTWRITEBYTECODE": os.environ.get(
+                    "PYTHONDONTWRITEBYTECODE", ""
+                ),
+                "PYTHONPATH": PORTAGE_PYM_PATH,
+            },
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        self.assertEqual(proc.returncode, os.EX_OK, proc.stdout)
+
+    def testEgencacheChangedSince(self):
+        git_binary = find_binary("git")
+        if git_binary is None:
+            self.skipTest("git: command not found")
+
+        ebuilds = {
+            "dev-libs/A-1": {"MISC_CONTENT": "inherit foo"},
+            "dev-libs/B-1": {},
+            "dev-libs/C-1": {},
+            "dev-libs/C-2": {},
+        }
+        eclasses = {"foo": ("DESCRIPTION=foo",)}
+
+        playground = ResolverPlayground(ebuilds=ebuilds, eclasses=eclasses)
+        settings = playground.settings
+        repo_location = settings.repositories["test_repo"].location
+        md5_cache_dir = os.path.join(repo_location, "metadata", "md5-cache")
+        eclass_index_file = os.path.join(repo_location, "metadata", "eclass-index")
+
+        env = dict(
+            os.environ,
+            GIT_AUTHOR_NAME="test",
+            GIT_AUTHOR_EMAIL="test@example.com",
+            GIT_COMMITTER_NAME="test",
+            GIT_COMMITTER_EMAIL="test@example.com",
+            GIT_CONFIG_NOSYSTEM="1",
+            HOME=settings["EPREFIX"],
+        )
+
+        def git(*args):
+            subprocess.run(
+                (git_binary,) + args,
+                cwd=repo_location,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                check=True,
+            )
+
+        def egencache(*args):
+            self._egencache(settings, "test_repo", *args)
+
+        def read_entry(cpv):
+            with open(os.path.join(md5_cache_dir, cpv)) as f:
+                return dict(line.rstrip("\n").split("=", 1) for line in f)
+
+        try:
+            egencache()
+            with open(eclass_index_file) as f:
+                self.assertEqual(f.read(), "foo dev-libs/A-1\n")
+            self.assertEqual(
+                settings.repositories["test_repo"].eclass_dependents("foo"),
+                frozenset(["dev-libs/A-1"]),
+            )
+
+            git("init", "--quiet")
+            git("add", ".")
+            git("commit", "--quiet", "-m", "initial")
+
+            self.assertEqual(git_changed_paths(repo_location, "HEAD"), [])
+            self.assertIsNone(git_changed_paths(repo_location, "no-such-commit"))
+
+            with open(os.path.join(repo_location, "eclass", "foo.eclass"), "a") as f:
+                f.write("HOMEPAGE=https://example.com/foo\n")
+            os.unlink(os.path.join(repo_location, "dev-libs", "C", "C-2.ebuild"))
+            git("commit", "--quiet", "-a", "-m", "update")
+
+            self.assertEqual(
+                sorted(git_changed_paths(repo_location, "HEAD~1")),
+                ["dev-libs/C/C-2.ebuild", "eclass/foo.eclass"],
+            )
+
+            # Invalidate an unaffected entry, in order to detect whether
+            # it is regenerated.
+            b_entry = read_entry("dev-libs/B-1")
+            with open(os.path.join(md5_cache_dir, "dev-libs", "B-1"), "w") as f:
+                f.write(f"SLOT=0\n_md5_={'0' * 32}\n")
+
+            egencache("--changed-since", "HEAD~1")
+
+            self.assertEqual(
+                read_entry("dev-libs/A-1")["HOMEPAGE"], "https://example.com/foo"
+            )
+            self.assertEqual(read_entry("dev-libs/B-1")["_md5_"], "0" * 32)
+            self.assertTrue(
+                os.path.exists(os.path.join(md5_cache_dir, "dev-libs", "C-1"))
+            )
+            self.assertFalse(
+                os.path.exists(os.path.join(md5_cache_dir, "dev-libs", "C-2"))
+            )
+            with open(eclass_index_file) as f:
+                self.assertEqual(f.read(), "foo dev-libs/A-1\n")
+
+            # An unknown commit causes a full update.
+            egencache("--changed-since", "no-such-commit")
+            self.assertEqual(read_entry("dev-libs/B-1"), b_entry)
+        finally:
+            playground.cleanup()
+
+    def testMasterEclasses(self):
+        git_binary = find_binary("git")
+        if git_binary is None:
+            self.skipTest("git: command not found")
+
+        ebuilds = {
+            "dev-libs/A-1": {},
+            "dev-libs/B-1::overlay": {"MISC_CONTENT": "inherit foo"},
+        }
+        eclasses = {"foo": ("DESCRIPTION=foo",)}
+        repo_configs = {"overlay": {"layout.conf": ("masters = test_repo",)}}
+
+        playground = ResolverPlayground(
+            ebuilds=ebuilds, eclasses=eclasses, repo_configs=repo_configs
+        )
+        settings = playground.settings
+        self.assertFalse(inherits_foreign_eclasses(settings.repositories["test_repo"]))
+        self.assertTrue(inherits_foreign_eclasses(settings.repositories["overlay"]))
+
+        repo_location = settings.repositories["overlay"].location
+        entry_path = os.path.join(
+            repo_location, "metadata", "md5-cache", "dev-libs", "B-1"
+        )
+
+        def git(*args):
+            subprocess.run(
+                (git_binary,) + args,
+                cwd=repo_location,
+                env=dict(
+                    os.environ,
+                    GIT_AUTHOR_NAME="test",
+                    GIT_AUTHOR_EMAIL="test@example.com",
+                    GIT_COMMITTER_NAME="test",
+                    GIT_COMMITTER_EMAIL="test@example.com",
+                    GIT_CONFIG_NOSYSTEM="1",
+                    HOME=settings["EPREFIX"],
+                ),
+                stdout=subprocess.DEVNULL,
+                check=True,
+            )
+
+        try:
+            # Inherit the eclass of the master.
+            os.unlink(os.path.join(repo_location, "eclass", "foo.eclass"))
+            self._egencache(settings, "overlay")
+            git("init", "--quiet")
+            git("add", ".")
+            git("commit", "--quiet", "-m", "initial")
+
+            # The eclass of the master changes without any change to the
+            # git history of the overlay.
+            master_eclass = os.path.join(
+                settings.repositories["test_repo"].location, "eclass", "foo.eclass"
+            )
+            with open(master_eclass, "a") as f:
+                f.write("HOMEPAGE=https://example.com/foo\n")
+
+            self._egencache(settings, "overlay", "--changed-since", "HEAD")
+            with open(entry_path) as f:
+                self.assertIn("HOMEPAGE=https://example.com/foo\n", f.readlines())
+        finally:
+            playground.cleanup()
@@ -0,0 +1,72 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+from portage import os
+from portage.cache.index.pkg_desc_index import pkg_desc_index_line_format
+from portage.dbapi.IndexedPortdb import IndexedPortdb
+from portage.tests import TestCase
+from portage.tests.resolver.ResolverPlayground import ResolverPlayground
+
+
+class IndexedPortdbTestCase(TestCase):
+    def testStreaming(self):
+        ebuilds = {
+            "dev-libs/A-1": {"DESCRIPTION": "A one"},
+            "dev-libs/A-2": {"DESCRIPTION": "A two"},
+            "dev-libs/B-1": {"DESCRIPTION": "B one"},
+            "sys-apps/C-1": {"DESCRIPTION": "C one"},
+            "dev-libs/A-3::repo1": {"DESCRIPTION": "A three"},
+            "dev-libs/D-1::repo1": {"DESCRIPTION": "D one"},
+        }
+        playground = ResolverPlayground(ebuilds=ebuilds)
+        try:
+            portdb = playground.trees[playground.eroot]["porttree"].dbapi
+            repo_location = portdb.getRepositoryPath("test_repo")
+            # Only test_repo has an index, so repo1 is read through portdb.
+            with open(
+                os.path.join(repo_location, "metadata", "pkg_desc_index"), "w"
+            ) as f:
+                for cp in portdb.cp_all(trees=[repo_location]):
+                    pkgs = portdb.cp_list(cp, mytree=repo_location)
+                    (desc,) = portdb.aux_get(pkgs[-1], ["DESCRIPTION"])
+                    f.write(pkg_desc_index_line_format(cp, pkgs, desc))
+
+            def results(db):
+                cps = list(db.cp_all())
+                matches = {}
+                descs = {}
+                for cp in cps + ["dev-libs/Z"]:
+                    matches[cp] = sorted(db.match(cp))
+                    for cpv in matches[cp]:
+                        (descs[cpv],) = db.aux_get(cpv, ["DESCRIPTION"])
+                return cps, matches, descs
+
+            expected = results(IndexedPortdb(portdb, streaming=False))
+            self.assertEqual(
+                expected[0], ["dev-libs/A", "dev-libs/B", "dev-libs/D", "sys-apps/C"]
+            )
+            self.assertEqual(
+                expected[1]["dev-libs/A"],
+                ["dev-libs/A-1", "dev-libs/A-2", "dev-libs/A-3"],
+            )
+            self.assertEqual(expected[1]["dev-libs/Z"], [])
+            self.assertEqual(expected[2]["dev-libs/A-2"], "A two")
+
+            streaming_db = IndexedPortdb(portdb, streaming=True, lru_size=2)
+            self.assertEqual(results(streaming_db), expected)
+            self.assertLessEqual(len(streaming_db._lru), 2)
+            self.assertIsNone(streaming_db._cp_map)
+
+            # Lookups also work before cp_all is called.
+            db = IndexedPortdb(portdb, streaming=True, lru_size=2)
+            self.assertEqual(sorted(db.match("=dev-libs/A-2")), ["dev-libs/A-2"])
+            self.assertEqual(db.aux_get("sys-apps/C-1", ["DESCRIPTION"]), ["C one"])
+
+            # The streaming mode is selected automatically for large indexes.
+            db = IndexedPortdb(portdb)
+            db._streaming_threshold = 0
+            list(db.cp_all())
+            self.assertTrue(db._streaming)
+            self.assertIsNone(db._cp_map)
+        finally:
+            playground.cleanup()
@@ -0,0 +1,85 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import tempfile
+import time
+
+from portage import os, shutil
+from portage.checksum import perform_md5
+from portage.eclass_cache import hashed_path, md5_memo
+from portage.exception import FileNotFound
+from portage.tests import TestCase
+
+
+class Md5MemoTestCase(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.memo_path = os.path.join(self.tempdir, "md5_memo.pickle")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def write(self, name, content, mtime_ns):
+        path = os.path.join(self.tempdir, name)
+        with open(path, "w") as f:
+            f.write(content)
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+        return path
+
+    def testMemo(self):
+        old_ns = time.time_ns() - 3600 * 1000000000
+        path = self.write("foo-1.ebuild", "EAPI=8\n", old_ns)
+        digest = perform_md5(path)
+
+        memo = md5_memo(self.memo_path)
+        self.assertEqual(hashed_path(path, md5_memo=memo).md5, digest)
+        memo.store()
+        self.assertTrue(os.path.exists(self.memo_path))
+
+        # Replace the content without changing the inode, size or mtime,
+        # in order to detect whether the file is hashed again.
+        self.write("foo-1.ebuild", "EAPI=7\n", old_ns)
+        memo = md5_memo(self.memo_path)
+        self.assertEqual(hashed_path(path, md5_memo=memo).md5, digest)
+
+        # A difference of one nanosecond invalidates the entry.
+        os.utime(path, ns=(old_ns + 1, old_ns + 1))
+        memo = md5_memo(self.memo_path)
+        self.assertEqual(hashed_path(path, md5_memo=memo).md5, perform_md5(path))
+
+    def testRecentlyModified(self):
+        path = self.write("foo-1.ebuild", "EAPI=8\n", time.time_ns())
+        memo = md5_memo(self.memo_path)
+        self.assertEqual(hashed_path(path, md5_memo=memo).md5, perform_md5(path))
+        memo.store()
+        self.assertFalse(os.path.exists(self.memo_path))
+
+    def testDiscard(self):
+        old_ns = time.time_ns() - 3600 * 1000000000
+        paths = [
+            self.write(f"foo-{i}.ebuild", f"EAPI={i}\n", old_ns) for i in (6, 7, 8)
+        ]
+        memo = md5_memo(self.memo_path)
+        for path in paths:
+            hashed_path(path, md5_memo=memo).md5
+        memo.store()
+
+        # Entries are discarded when files are found to be missing.
+        for path in paths[:2]:
+            os.unlink(path)
+        memo = md5_memo(self.memo_path)
+        with self.assertRaises(FileNotFound):
+            hashed_path(paths[0], md5_memo=memo).md5
+        memo.discard(paths[1])
+        memo.store()
+
+        memo = md5_memo(self.memo_path)
+        memo._load()
+        self.assertEqual(list(memo._digests), paths[2:])
+
+    def testCorruptMemo(self):
+        with open(self.memo_path, "wb") as f:
+            f.write(b"not a pickle")
+        path = self.write("foo-1.ebuild", "EAPI=8\n", 0)
+        memo = md5_memo(self.memo_path)
+        self.assertEqual(hashed_path(path, md5_memo=memo).md5, perform_md5(path))
@@ -0,0 +1,66 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import multiprocessing
+import os
+import threading
+
+from portage.tests import TestCase
+from portage.tests.resolver.ResolverPlayground import ResolverPlayground
+
+
+def _hold_claim(vardb, conn):
+    vardb._merge_claims.acquire("app-misc/A-1", ["usr/bin/a", "usr/bin/c"])
+    conn.send("claimed")
+    conn.recv()
+    vardb._merge_claims.release("app-misc/A-1")
+
+
+class MergeClaimsTestCase(TestCase):
+    def testMergeClaims(self):
+        playground = ResolverPlayground()
+        try:
+            eroot = playground.settings["EROOT"]
+            vardb = playground.trees[eroot]["vartree"].dbapi
+            claims = vardb._merge_claims
+
+            parent_conn, child_conn = multiprocessing.Pipe()
+            proc = multiprocessing.get_context("fork").Process(
+                target=_hold_claim, args=(vardb, child_conn)
+            )
+            proc.start()
+            try:
+                self.assertEqual(parent_conn.recv(), "claimed")
+
+                # Disjoint claims do not wait.
+                claims.acquire("app-misc/B-1", ["usr/bin/b"])
+                claims.release("app-misc/B-1")
+
+                # Overlapping claims wait for the other merge.
+                thread = threading.Thread(
+                    target=claims.acquire, args=("app-misc/C-1", ["usr/bin/c"])
+                )
+                thread.start()
+                thread.join(0.5)
+                self.assertTrue(thread.is_alive())
+                parent_conn.send("release")
+                thread.join(10)
+                self.assertFalse(thread.is_alive())
+                claims.release("app-misc/C-1")
+            finally:
+                proc.join(10)
+            self.assertEqual(proc.exitcode, os.EX_OK)
+
+            # A claim left over from a dead process is ignored and removed.
+            stale_claim = claims._claim_path("app-misc/D-1")
+            with open(stale_claim, "w") as f:
+                f.write("usr/bin/d\n")
+            claims.acquire("app-misc/E-1", ["usr/bin/d"])
+            self.assertFalse(os.path.exists(stale_claim))
+            claims.release("app-misc/E-1")
+            self.assertEqual(
+                [name for name in os.listdir(claims._dir) if not name.startswith(".")],
+                [],
+            )
+        finally:
+            playground.cleanup()
@@ -0,0 +1,254 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import stat
+
+import portage
+from portage import os
+from portage.checksum import perform_md5
+from portage.dbapi.vartree import dblink
+from portage.tests import TestCase
+from portage.tests.resolver.ResolverPlayground import ResolverPlayground
+
+
+class ParallelChecksumsTestCase(TestCase):
+    def setUp(self):
+        self.playground = ResolverPlayground()
+        self.settings = portage.config(clone=self.playground.settings)
+        self.settings.features.add("parallel-checksums")
+        eroot = self.settings["EROOT"]
+        self.pkg = dblink(
+            "app-misc",
+            "A-1",
+            settings=self.settings,
+            treetype="vartree",
+            vartree=self.playground.trees[eroot]["vartree"],
+        )
+        # Use threads regardless of the number of CPUs of this host.
+        self.pkg._md5_parallel_jobs = lambda: 4
+
+    def tearDown(self):
+        self.playground.cleanup()
+
+    def write(self, path, size):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(os.urandom(size))
+        return path
+
+    def md5(self, md5_cache, path):
+        """
+        Return the checksum of a file in the same way as the merge and
+        unmerge code.
+        """
+        digest = self.pkg._md5_lookup(md5_cache, path, os.lstat(path))
+        if digest is None:
+            digest = perform_md5(path)
+        return digest
+
+    def testPrecompute(self):
+        tmpdir = self.playground.eroot
+        min_size = self.pkg._md5_parallel_min_size
+        large = [
+            self.write(os.path.join(tmpdir, "precompute", f"large-{i}"), min_size + i)
+            for i in range(4)
+        ]
+        small = self.write(os.path.join(tmpdir, "precompute", "small"), 16)
+        link = os.path.join(tmpdir, "precompute", "link")
+        os.symlink("large-0", link)
+        paths = large + [small, link]
+
+        md5_cache = self.pkg._md5_precompute(paths)
+        self.assertEqual(set(md5_cache), set(large))
+        for path in large:
+            self.assertEqual(md5_cache[path][1], perform_md5(path))
+
+        # A file that changes after the checksums are computed is
+        # hashed again.
+        with open(large[1], "ab") as f:
+            f.write(b"\0")
+        for path in large + [small]:
+            self.assertEqual(self.md5(md5_cache, path), perform_md5(path))
+        self.assertEqual(md5_cache, {})
+
+        # lstat results given by the caller are used.
+        md5_cache = self.pkg._md5_precompute((path, os.lstat(path)) for path in paths)
+        self.assertEqual(set(md5_cache), set(large))
+
+        # Nothing is computed without parallel-checksums.
+        self.settings.features.discard("parallel-checksums")
+        del self.pkg._md5_parallel_jobs
+        self.assertEqual(self.pkg._md5_precompute(paths), {})
+
+    def testMergeFailure(self):
+        image = os.path.join(self.playground.eroot, "image")
+        min_size = self.pkg._md5_parallel_min_size
+        files = [
+            self.write(os.path.join(image, "usr", "share", "a", f"file-{i}"), size)
+            for i, size in enumerate((min_size, min_size * 2, 16))
+        ]
+        os.makedirs(self.pkg.dbtmpdir)
+        checksums = {}
+
+        def mergeme(srcroot, destroot, outfile, secondhand, stufftomerge, *args):
+            md5_cache = self.pkg._merge_md5_cache
+            self.assertEqual(len(md5_cache), 2)
+            for parent, dirs, names in os.walk(image):
+                for name in names:
+                    path = os.path.join(parent, name)
+                    if stat.S_ISREG(os.lstat(path).st_mode):
+                        checksums[path] = self.md5(md5_cache, path)
+            # Fail the merge.
+            return 1
+
+        self.pkg.mergeme = mergeme
+        umask = os.umask(0o022)
+        try:
+            self.assertEqual(
+                self.pkg._merge_contents(image, self.playground.eroot, {}), 1
+            )
+        finally:
+            # A failed merge does not restore the umask.
+            os.umask(umask)
+        self.assertEqual(checksums, {path: perform_md5(path) for path in files})
+        # The checksums of the failed merge are not kept.
+        self.assertEqual(self.pkg._merge_md5_cache, None)
+
+    def testUnmerge(self):
+        self.settings["CONFIG_PROTECT"] = "/etc"
+        self.settings["UNINSTALL_IGNORE"] = "/usr/share/a/ignored"
+        self.settings.features.discard("unmerge-orphans")
+        self.assertEqual(
+            self._unmerge(),
+            {
+                "conf": False,
+                "conf-modified": True,
+                "dir": True,
+                "dir-child": True,
+                "empty-dir": False,
+                "ignored": True,
+                "modified": True,
+                "mtime": True,
+                "symlink": False,
+                "unmodified": False,
+            },
+        )
+
+        # Without checksums, unmerge-orphans only keeps modified files
+        # that are protected.
+        self.settings.features.add("unmerge-orphans")
+        self.assertEqual(
+            self._unmerge(),
+            {
+                "conf": False,
+                "conf-modified": True,
+                "dir": True,
+                "dir-child": True,
+                "empty-dir": False,
+                "ignored": True,
+                "modified": False,
+                "mtime": False,
+                "symlink": False,
+                "unmodified": False,
+            },
+        )
+
+    def _unmerge(self):
+        """
+        Unmerge the same files with and without parallel checksums, check
+        that the same files are removed and kept, and return whether each
+        file still exists.
+        """
+        unmerge_orphans = "unmerge-orphans" in self.settings.features
+        results = {}
+        for jobs in (0, 4):
+            self.pkg._md5_parallel_jobs = lambda: jobs
+            candidates = []
+            md5_precompute = self.pkg._md5_precompute
+
+            def _md5_precompute(paths):
+                paths = list(paths)
+                candidates.extend(path for path, st in paths)
+                return md5_precompute(paths)
+
+            self.pkg._md5_precompute = _md5_precompute
+            files = self._unmerge_files()
+            self.pkg._unmerge_pkgfiles(None, [])
+            del self.pkg._md5_precompute
+            results[jobs] = {
+                name: os.path.lexists(path) for name, path in files.items()
+            }
+
+            if jobs and not unmerge_orphans:
+                # Files that are ignored or have a different mtime are
+                # not hashed.
+                self.assertEqual(
+                    sorted(candidates),
+                    sorted(
+                        files[name]
+                        for name in ("conf", "conf-modified", "modified", "unmodified")
+                    ),
+                )
+            else:
+                self.assertEqual(candidates, [])
+
+        self.assertEqual(results[0], results[4])
+        return results[4]
+
+    def _unmerge_files(self):
+        """
+        Install files for the unmerge test and write the CONTENTS of the
+        package, and return the installed paths by name.
+        """
+        eroot = self.settings["EROOT"]
+        min_size = self.pkg._md5_parallel_min_size
+        share = os.path.join(eroot, "usr", "share", "a")
+        files = {
+            "conf": os.path.join(eroot, "etc", "a.conf"),
+            "conf-modified": os.path.join(eroot, "etc", "b.conf"),
+            "dir": os.path.join(share, "dir"),
+            "dir-child": os.path.join(share, "dir", "other"),
+            "empty-dir": os.path.join(share, "empty-dir"),
+            "ignored": os.path.join(share, "ignored"),
+            "modified": os.path.join(share, "modified"),
+            "mtime": os.path.join(share, "mtime"),
+            "symlink": os.path.join(share, "symlink"),
+            "unmodified": os.path.join(share, "unmodified"),
+        }
+        contents = [f"dir {share}", f"dir {os.path.dirname(files['conf'])}"]
+        for name in (
+            "conf",
+            "conf-modified",
+            "ignored",
+            "modified",
+            "mtime",
+            "unmodified",
+        ):
+            path = self.write(files[name], min_size)
+            mtime = os.lstat(path).st_mtime_ns // 1000000000
+            contents.append(f"obj {path} {perform_md5(path)} {mtime}")
+        for name in ("conf-modified", "modified"):
+            # Change the content, but not the size and the mtime.
+            st = os.lstat(files[name])
+            with open(files[name], "r+b") as f:
+                f.write(b"modified")
+            os.utime(files[name], ns=(st.st_atime_ns, st.st_mtime_ns))
+        st = os.lstat(files["mtime"])
+        os.utime(files["mtime"], ns=(st.st_atime_ns, st.st_mtime_ns - 10**10))
+
+        os.symlink("unmodified", files["symlink"])
+        mtime = os.lstat(files["symlink"]).st_mtime_ns // 1000000000
+        contents.append(f"sym {files['symlink']} -> unmodified {mtime}")
+
+        # A directory that contains a file of another package is kept.
+        self.write(files["dir-child"], 16)
+        os.makedirs(files["empty-dir"])
+        contents.append(f"dir {files['dir']}")
+        contents.append(f"dir {files['empty-dir']}")
+
+        dbdir = self.pkg.dbdir
+        os.makedirs(dbdir, exist_ok=True)
+        with open(os.path.join(dbdir, "CONTENTS"), "w") as f:
+            f.write("".join(f"{line}\n" for line in contents))
+        self.pkg._clear_contents_cache()
+        return files
@@ -0,0 +1,203 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import subprocess
+import tempfile
+
+import portage
+from portage import os, shutil
+from portage.cache.index.pkg_search_index import (
+    pkg_search_index,
+    pkg_search_index_builder,
+)
+from portage.const import PORTAGE_PYM_PATH
+from portage.tests import TestCase
+from portage.tests.resolver.ResolverPlayground import ResolverPlayground
+from portage.util import atomic_ofstream
+from _emerge.search import search
+
+
+class PkgSearchIndexTestCase(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def write_index(self, builder):
+        filename = os.path.join(self.tempdir, "pkg_search_index")
+        with atomic_ofstream(filename) as f:
+            builder.write(f)
+        return pkg_search_index.load(filename)
+
+    def testSearch(self):
+        builder = pkg_search_index_builder()
+        builder.add(
+            "www-client/firefox",
+            description="Firefox Web Browser",
+            homepage="https://www.mozilla.com/firefox",
+        )
+        builder.add(
+            "www-servers/nginx",
+            description="Robust, small and high performance http and reverse proxy server",
+            use=[("http2", "Enable HTTP/2 support")],
+        )
+        builder.add(
+            "app-misc/browser-helper",
+            description="Helper tools",
+            longdescription=["Opens files in a web browser."],
+        )
+        index = self.write_index(builder)
+
+        self.assertEqual(
+            index.cps,
+            ["app-misc/browser-helper", "www-client/firefox", "www-servers/nginx"],
+        )
+        scores = index.search(["web", "browser"])
+        self.assertEqual(set(scores), {"app-misc/browser-helper", "www-client/firefox"})
+        self.assertGreater(scores["www-client/firefox"], 0)
+
+        # Names weigh more than descriptions.
+        scores = index.search(["browser"])
+        self.assertGreater(
+            scores["app-misc/browser-helper"], scores["www-client/firefox"]
+        )
+
+        # Long terms match token prefixes, and short ones only whole tokens.
+        self.assertEqual(set(index.search(["brows"])), set(scores))
+        self.assertEqual(index.search(["we"]), {})
+        self.assertEqual(set(index.search(["http2"])), {"www-servers/nginx"})
+        self.assertEqual(index.search(["mozilla", "proxy"]), {})
+        self.assertEqual(index.search(["com"]), {})
+
+    def testInvalid(self):
+        filename = os.path.join(self.tempdir, "pkg_search_index")
+        self.assertIsNone(pkg_search_index.load(filename))
+        for content in ("", "pkg_search_index 2 0 0\n", "pkg_search_index 1 1 100\n"):
+            with open(filename, "w") as f:
+                f.write(content)
+            self.assertIsNone(pkg_search_index.load(filename))
+
+        index = self.write_index(pkg_search_index_builder())
+        self.assertEqual(index.cps, [])
+        self.assertEqual(index.search(["foo"]), {})
+
+    def testEmergeSearch(self):
+        ebuilds = {
+            "dev-libs/A-1": {"DESCRIPTION": "A library to parse files"},
+            "dev-libs/libparse-2": {"DESCRIPTION": "Parser"},
+            "dev-libs/B-1": {"DESCRIPTION": "Something else"},
+            "app-editors/vim-9": {"DESCRIPTION": "Vi clone"},
+        }
+        playground = ResolverPlayground(ebuilds=ebuilds)
+        try:
+            root_config = playground.trees[playground.eroot]["root_config"]
+            portdb = root_config.trees["porttree"].dbapi
+            repo_location = portdb.getRepositoryPath("test_repo")
+
+            builder = pkg_search_index_builder()
+            for cp in portdb.cp_all():
+                (desc,) = portdb.aux_get(portdb.cp_list(cp)[-1], ["DESCRIPTION"])
+                builder.add(cp, description=desc)
+            # Drop dev-libs/B from the index, in order to check that
+            # packages that are missing from it are still searched.
+            builder._fields.pop("dev-libs/B")
+            with atomic_ofstream(
+                os.path.join(repo_location, "metadata", "pkg_search_index")
+            ) as f:
+                builder.write(f)
+
+            def results(searchkey, searchdesc=True, fulltext=True):
+                s = search(
+                    root_config,
+                    None,
+                    searchdesc,
+                    False,
+                    False,
+                    False,
+                    search_fulltext=fulltext,
+                )
+                s.execute(searchkey)
+                return [match for match in s._iter_search() if match[0] != "set"]
+
+            self.assertEqual(
+                results("parse"),
+                [("pkg", "dev-libs/libparse"), ("desc", "dev-libs/A")],
+            )
+            self.assertEqual(results("else"), [("desc", "dev-libs/B")])
+            self.assertEqual(results("libprase", False), [("pkg", "dev-libs/libparse")])
+            self.assertEqual(
+                results("vm", False, fulltext=False), [("pkg", "app-editors/vim")]
+            )
+
+            # Without --search-fulltext, DESCRIPTION is matched as before,
+            # and the results are not ranked.
+            self.assertEqual(
+                results("arse", fulltext=False),
+                [("desc", "dev-libs/A"), ("pkg", "dev-libs/libparse")],
+            )
+            self.assertEqual(results("arse"), [("pkg", "dev-libs/libparse")])
+            self.assertEqual(
+                results("libprase", False, fulltext=False),
+                [("pkg", "dev-libs/libparse")],
+            )
+        finally:
+            playground.cleanup()
+
+    def testEgencache(self):
+        ebuilds = {
+            "dev-libs/A-1": {
+                "DESCRIPTION": "Alpha library",
+                "HOMEPAGE": "https://example.org/alphahome",
+            },
+        }
+        playground = ResolverPlayground(ebuilds=ebuilds)
+        try:
+            settings = playground.settings
+            repo_location = settings.repositories["test_repo"].location
+            with open(
+                os.path.join(repo_location, "dev-libs", "A", "metadata.xml"), "w"
+            ) as f:
+                f.write(
+                    '<?xml version="1.0" encoding="UTF-8"?>\n'
+                    "<pkgmetadata>\n"
+                    "<longdescription>Longer words</longdescription>\n"
+                    '<use><flag name="zeta">Zeta support</flag></use>\n'
+                    "</pkgmetadata>\n"
+                )
+
+            proc = subprocess.run(
+                (
+                    portage._python_interpreter,
+                    "-b",
+                    "-Wd",
+                    os.path.join(str(self.bindir), "egencache"),
+                    "--repo",
+                    "test_repo",
+                    "--repositories-configuration",
+                    settings.repositories.config_string(),
+                    "--update-pkg-desc-index",
+                ),
+                env={
+                    "PATH": settings["PATH"],
+                    "PORTAGE_OVERRIDE_EPREFIX": settings["EPREFIX"],
+                    "PORTAGE_PYTHON": portage._python_interpreter,
+                    "PORTAGE_REPOSITORIES": settings.repositories.config_string(),
+                    "PYTHONDONTWRITEBYTECODE": os.environ.get(
+                        "PYTHONDONTWRITEBYTECODE", ""
+                    ),
+                    "PYTHONPATH": PORTAGE_PYM_PATH,
+                },
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            )
+            self.assertEqual(proc.returncode, os.EX_OK, proc.stdout)
+
+            index = pkg_search_index.load(
+                os.path.join(repo_location, "metadata", "pkg_search_index")
+            )
+            self.assertEqual(index.cps, ["dev-libs/A"])
+            for term in ("alpha", "alphahome", "longer", "zeta", "support"):
+                self.assertEqual(list(index.search([term])), ["dev-libs/A"])
+        finally:
+            playground.cleanup()
@@ -1,4 +1,4 @@
-# Copyright 2012-2025 Gentoo Authors
+# Copyright 2012-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 import shlex
@@ -45,6 +45,7 @@ class PortdbCacheTestCase(TestCase):
         user_config_dir = os.path.join(eprefix, USER_CONFIG_PATH)
         metadata_dir = os.path.join(test_repo_location, "metadata")
         md5_cache_dir = os.path.join(metadata_dir, "md5-cache")
+        md5_pack_path = os.path.join(metadata_dir, "md5-cache.pack")
         pms_cache_dir = os.path.join(metadata_dir, "cache")
         layout_conf_path = os.path.join(metadata_dir, "layout.conf")
 
@@ -274,6 +275,115 @@ class PortdbCacheTestCase(TestCase):
                     ),
                 ),
             ),
+            # Test the packed format, which is generated alongside md5-cache.
+            CommandStep(
+                returncode=os.EX_OK,
+                command=(BASH_BINARY,)
+                + (
+                    "-c",
+                    "echo %s > %s"
+                    % tuple(
+                        map(
+                            shlex.quote,
+                            (
+                                "cache-formats = md5-packed md5-dict",
+                                layout_conf_path,
+                            ),
+                        )
+                    ),
+                ),
+            ),
+            CommandStep(
+                returncode=os.EX_OK,
+                command=egencache_cmd + ("--update",),
+            ),
+            FunctionStep(
+                function=lambda i: self.assertTrue(
+                    os.path.isfile(md5_pack_path), f"step {i}"
+                )
+            ),
+            # Test that a stale entry of the pack does not hide the valid
+            # md5-cache entry.
+            CommandStep(
+                returncode=os.EX_OK,
+                command=python_cmd
+                + (
+                    textwrap.dedent(
+                        """
+					import os, sys, portage
+					from portage.cache.packed import md5_database
+					location = portage.portdb.repositories['test_repo'].location
+					cache = md5_database(location, "metadata/md5-cache.pack", portage.auxdbkeys, readonly=False)
+					entry = cache._getitem("sys-apps/C-1")
+					entry["_md5_"] = "0" * 32
+					cache._setitem("sys-apps/C-1", entry)
+					cache.commit()
+					"""
+                    ),
+                ),
+            ),
+            CommandStep(
+                returncode=os.EX_OK,
+                command=python_cmd
+                + (
+                    textwrap.dedent(
+                        """
+					import os, sys, portage
+					from portage.cache.packed import md5_database
+					location = portage.portdb.repositories['test_repo'].location
+					cache = portage.portdb._pregen_auxdb[location]
+					if not isinstance(cache, md5_database):
+						sys.exit(1)
+					if cache["sys-apps/C-1"]["_md5_"] != "0" * 32:
+						sys.exit(1)
+					ebuild_path = portage.portdb.findname("sys-apps/C-1")
+					# Only consider the pregenerated caches.
+					portage.portdb.auxdb = {location: {}}
+					if portage.portdb._pull_valid_cache("sys-apps/C-1", ebuild_path, location)[0] is None:
+						sys.exit(1)
+					"""
+                    ),
+                ),
+            ),
+            CommandStep(
+                returncode=os.EX_OK,
+                command=egencache_cmd + ("--update",),
+            ),
+            # Test auto-detection of the packed format, and that it does
+            # not depend on md5-cache.
+            CommandStep(
+                returncode=os.EX_OK,
+                command=(BASH_BINARY,)
+                + (
+                    "-c",
+                    "rm -r %s %s"
+                    % tuple(map(shlex.quote, (layout_conf_path, md5_cache_dir))),
+                ),
+            ),
+            CommandStep(
+                returncode=os.EX_OK,
+                command=python_cmd
+                + (
+                    textwrap.dedent(
+                        """
+					import os, sys, portage
+					from portage.cache.packed import md5_database
+					location = portage.portdb.repositories['test_repo'].location
+					cache = portage.portdb._pregen_auxdb[location]
+					if not isinstance(cache, md5_database):
+						sys.exit(1)
+					if sorted(cache) != sorted(portage.portdb.cpv_all()):
+						sys.exit(1)
+					if not cache["sys-apps/C-1"]['IDEPEND']:
+						sys.exit(1)
+					for cpv in cache:
+						ebuild_path = portage.portdb.findname(cpv)
+						if portage.portdb._pull_valid_cache(cpv, ebuild_path, location)[0] is None:
+							sys.exit(1)
+					"""
+                    ),
+                ),
+            ),
         )
 
         pythonpath = os.environ.get("PYTHONPATH")
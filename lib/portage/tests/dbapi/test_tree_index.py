@@ -0,0 +1,126 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import tempfile
+import time
+
+from portage import os, shutil
+from portage.dbapi._TreeIndex import TreeIndex
+from portage.tests import TestCase
+
+
+class TreeIndexTestCase(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.location = os.path.join(self.tempdir, "repo")
+        self.filename = os.path.join(self.tempdir, "tree_index", "test_repo.pickle")
+        self.old_ns = time.time_ns() - 3600 * 1000000000
+        for path in (
+            "dev-libs/A/A-1.ebuild",
+            "dev-libs/A/A-2.ebuild",
+            "dev-libs/A/metadata.xml",
+            "dev-libs/B/B-1.ebuild",
+            "dev-libs/metadata.xml",
+        ):
+            self.write(path)
+        os.makedirs(os.path.join(self.location, "dev-libs", "CVS"))
+        for path in ("dev-libs/A", "dev-libs/B", "dev-libs"):
+            self.touch(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def write(self, path):
+        path = os.path.join(self.location, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w"):
+            pass
+
+    def touch(self, path, mtime_ns=None):
+        if mtime_ns is None:
+            mtime_ns = self.old_ns
+        os.utime(os.path.join(self.location, path), ns=(mtime_ns, mtime_ns))
+
+    def testListings(self):
+        tree_index = TreeIndex(self.location, self.filename)
+        self.assertEqual(tree_index.category("dev-libs"), ("A", "B"))
+        self.assertEqual(tree_index.category("app-misc"), ())
+        self.assertEqual(tree_index.package("dev-libs/A"), ("A-1.ebuild", "A-2.ebuild"))
+        self.assertEqual(tree_index.package("dev-libs/C"), ())
+        tree_index.store()
+        self.assertTrue(os.path.exists(self.filename))
+
+        # Add an ebuild while preserving the directory mtime, in order to
+        # detect whether the stored listing is used.
+        self.write("dev-libs/A/A-3.ebuild")
+        self.touch("dev-libs/A")
+        tree_index = TreeIndex(self.location, self.filename)
+        self.assertEqual(tree_index.package("dev-libs/A"), ("A-1.ebuild", "A-2.ebuild"))
+
+        # A difference of one nanosecond invalidates the listing.
+        self.touch("dev-libs/A", self.old_ns + 1)
+        self.assertEqual(
+            tree_index.package("dev-libs/A"), ("A-1.ebuild", "A-2.ebuild", "A-3.ebuild")
+        )
+
+        # Listings of directories that were just modified are not stored.
+        self.write("dev-libs/B/B-2.ebuild")
+        tree_index = TreeIndex(self.location, self.filename)
+        self.assertEqual(tree_index.package("dev-libs/B"), ("B-1.ebuild", "B-2.ebuild"))
+        tree_index.store()
+        tree_index = TreeIndex(self.location, self.filename)
+        tree_index._load()
+        self.assertNotIn("dev-libs/B", tree_index._packages)
+
+    def testUpdate(self):
+        removed = []
+        tree_index = TreeIndex(self.location, self.filename, removed=removed.append)
+        tree_index.category("dev-libs")
+        tree_index.package("dev-libs/A")
+        tree_index.package("dev-libs/B")
+
+        shutil.rmtree(os.path.join(self.location, "dev-libs", "B"))
+        self.write("dev-libs/A/A-3.ebuild")
+        self.touch("dev-libs/A", self.old_ns + 1)
+        self.touch("dev-libs", self.old_ns + 1)
+        tree_index.update()
+        tree_index.store()
+        self.assertEqual(
+            removed, [os.path.join(self.location, "dev-libs/B/B-1.ebuild")]
+        )
+
+        tree_index = TreeIndex(self.location, self.filename)
+        tree_index._load()
+        self.assertEqual(
+            tree_index._categories, {"dev-libs": (self.old_ns + 1, ("A",))}
+        )
+        self.assertEqual(
+            tree_index._packages,
+            {
+                "dev-libs/A": (
+                    self.old_ns + 1,
+                    ("A-1.ebuild", "A-2.ebuild", "A-3.ebuild"),
+                )
+            },
+        )
+
+    def testRemoved(self):
+        removed = []
+        tree_index = TreeIndex(self.location, self.filename, removed=removed.append)
+        tree_index.package("dev-libs/A")
+        os.unlink(os.path.join(self.location, "dev-libs/A/A-1.ebuild"))
+        self.write("dev-libs/A/A-3.ebuild")
+        self.touch("dev-libs/A", self.old_ns + 1)
+        self.assertEqual(tree_index.package("dev-libs/A"), ("A-2.ebuild", "A-3.ebuild"))
+        self.assertEqual(
+            removed, [os.path.join(self.location, "dev-libs/A/A-1.ebuild")]
+        )
+
+    def testOtherLocation(self):
+        tree_index = TreeIndex(self.location, self.filename)
+        tree_index.category("dev-libs")
+        tree_index.store()
+
+        tree_index = TreeIndex(os.path.join(self.tempdir, "other"), self.filename)
+        tree_index._load()
+        self.assertEqual(tree_index._categories, {})
@@ -0,0 +1,143 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import signal
+import subprocess
+import textwrap
+
+from portage import os
+from portage import _python_interpreter
+from portage.package.ebuild.config import config
+from portage.package.ebuild.doebuild import doebuild_environment, prepare_build_dirs
+from portage.package.ebuild._ipc.QueryCommand import QueryCommand
+from portage.tests import TestCase
+from portage.tests.resolver.ResolverPlayground import ResolverPlayground
+from portage.util._async.SchedulerInterface import SchedulerInterface
+from portage.util._eventloop.global_event_loop import global_event_loop
+from _emerge.EbuildPhase import EbuildPhase
+from _emerge.EbuildServer import EbuildServer, _EbuildServerPhase
+
+
+class EbuildServerTestCase(TestCase):
+    def testEbuildServer(self):
+        ebuild_body = textwrap.dedent(
+            """
+            S=${WORKDIR}
+
+            src_compile() {
+                COMPILED="in ${EBUILD_PHASE_FUNC}"
+                echo "${BASHPID}" > "${T}/compile-pid"
+                # Pretend that sandbox caught an access violation.
+                [[ -e ${T}/violate ]] && echo "open_wr: /violation" >> "${SANDBOX_LOG}"
+            }
+
+            src_install() {
+                [[ ${COMPILED} == "in src_compile" ]] || die "COMPILED=${COMPILED}"
+                [[ -z ${__ebuild_server} ]] || die "__ebuild_server leaked"
+                echo "${BASHPID}" > "${T}/install-pid"
+                [[ -e ${T}/fail ]] && die "failed on request"
+                echo "output of ${EBUILD_PHASE_FUNC}"
+            }
+            """
+        )
+
+        ebuilds = {
+            "app-misc/A-1": {
+                "EAPI": "8",
+                "MISC_CONTENT": ebuild_body,
+            }
+        }
+
+        playground = ResolverPlayground(ebuilds=ebuilds)
+        server = None
+        try:
+            QueryCommand._db = playground.trees
+            settings = config(clone=playground.settings)
+            portdb = playground.trees[playground.eroot]["porttree"].dbapi
+            ebuild_path = portdb.findname("app-misc/A-1")
+            doebuild_environment(ebuild_path, "setup", settings=settings, db=portdb)
+            settings["PORTAGE_PYTHON"] = _python_interpreter
+            prepare_build_dirs(settings=settings, cleanup=True)
+
+            scheduler = SchedulerInterface(global_event_loop())
+            server = EbuildServer(scheduler=scheduler, settings=settings)
+
+            def run(phase, ebuild_server=server):
+                ebuild_phase = EbuildPhase(
+                    background=True,
+                    ebuild_server=ebuild_server,
+                    phase=phase,
+                    scheduler=scheduler,
+                    settings=settings,
+                )
+                ebuild_phase.start()
+                ebuild_phase.wait()
+                return ebuild_phase.returncode
+
+            def read_pid(name):
+                with open(os.path.join(settings["T"], name)) as f:
+                    return int(f.read())
+
+            self.assertEqual(run("setup", ebuild_server=None), os.EX_OK)
+            server_pids = set()
+            for phase in ("unpack", "prepare", "configure", "compile"):
+                self.assertEqual(run(phase), os.EX_OK, phase)
+                server_pids.add(server._proc.pid)
+
+            # A phase with sandbox violations fails, and the server exits
+            # so that sandbox reports them.
+            violate = os.path.join(settings["T"], "violate")
+            open(violate, "w").close()
+            compiled = os.path.join(settings["PORTAGE_BUILDDIR"], ".compiled")
+            os.unlink(compiled)
+            self.assertNotEqual(run("compile"), os.EX_OK)
+            with open(settings["PORTAGE_LOG_FILE"]) as f:
+                self.assertIn("ACCESS VIOLATION SUMMARY", f.read())
+            os.unlink(violate)
+            os.unlink(settings["SANDBOX_LOG"])
+            self.assertEqual(run("compile"), os.EX_OK)
+            self.assertNotIn(server._proc.pid, server_pids)
+            server_pids = {server._proc.pid}
+
+            fail = os.path.join(settings["T"], "fail")
+            open(fail, "w").close()
+            self.assertNotEqual(run("install"), os.EX_OK)
+            server_pids.add(server._proc.pid)
+
+            # A phase that fails does not affect the server.
+            os.unlink(fail)
+            self.assertEqual(run("install"), os.EX_OK)
+            server_pids.add(server._proc.pid)
+            self.assertEqual(len(server_pids), 1)
+
+            # Each phase runs in its own subshell of the server.
+            self.assertNotEqual(read_pid("compile-pid"), read_pid("install-pid"))
+
+            with open(settings["PORTAGE_LOG_FILE"]) as f:
+                self.assertIn("output of src_install", f.read())
+
+            proc = server._proc
+            server.stop()
+            self.assertEqual(server._proc, None)
+            self.assertEqual(scheduler.run_until_complete(proc.wait()), os.EX_OK)
+        finally:
+            if server is not None:
+                server.stop()
+            QueryCommand._db = None
+            playground.cleanup()
+
+    def testPendingSignal(self):
+        loop = global_event_loop()
+        phase = _EbuildServerPhase(loop.create_future(), loop.create_future())
+        # The signal is delivered when the pid is known.
+        phase.send_signal(signal.SIGTERM)
+        proc = subprocess.Popen(["sleep", "60"])
+        try:
+            phase._set_started(proc.pid)
+            self.assertTrue(phase.started.result())
+            self.assertEqual(proc.wait(timeout=10), -signal.SIGTERM)
+        finally:
+            proc.kill()
+            proc.wait()
+        phase._set_returncode(-signal.SIGTERM)
+        self.assertEqual(loop.run_until_complete(phase.wait()), -signal.SIGTERM)
@@ -0,0 +1,98 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import functools
+import types
+
+from portage import os
+from portage.tests import TestCase
+from portage.util._eventloop.global_event_loop import global_event_loop
+from _emerge.PackageMerge import PackageMerge
+from _emerge.Scheduler import Scheduler
+from _emerge.SequentialTaskQueue import SequentialTaskQueue
+
+
+class _Merge(PackageMerge):
+    """
+    A merge that records whether it may run concurrently with other
+    merges, and that runs until finish is called.
+    """
+
+    __slots__ = ("concurrent",)
+
+    def _start(self):
+        self.concurrent = self.concurrent_merges(self)
+
+    def finish(self):
+        self.returncode = os.EX_OK
+        self._async_wait()
+        self.scheduler.run_until_complete(self.async_wait())
+
+
+class ConcurrentMergesTestCase(TestCase):
+    def _scheduler(self, max_jobs, features=()):
+        queue = SequentialTaskQueue(max_jobs=max_jobs)
+        scheduler = types.SimpleNamespace(
+            _task_queues=types.SimpleNamespace(merge=queue),
+            settings=types.SimpleNamespace(features=set(features)),
+        )
+        concurrent_merges = functools.partial(Scheduler._concurrent_merges, scheduler)
+
+        def merge():
+            return _Merge(
+                concurrent_merges=concurrent_merges, scheduler=global_event_loop()
+            )
+
+        return queue, merge
+
+    def testConcurrentMerges(self):
+        queue, merge = self._scheduler(3)
+
+        # A merge that starts alone is not concurrent, and no other
+        # merge starts until it is done.
+        a = merge()
+        queue.add(a)
+        self.assertIs(a.concurrent, False)
+        b = merge()
+        c = merge()
+        queue.add(b)
+        queue.add(c)
+        self.assertEqual(queue.running_tasks, {a})
+
+        # Merges that start together are concurrent.
+        a.finish()
+        self.assertEqual(queue.running_tasks, {b, c})
+        self.assertIs(b.concurrent, True)
+        self.assertIs(c.concurrent, True)
+
+        # A merge that starts while another one runs is concurrent.
+        d = merge()
+        queue.add(d)
+        self.assertIs(d.concurrent, True)
+        self.assertEqual(queue.running_tasks, {b, c, d})
+
+        for task in (b, c, d):
+            task.finish()
+        self.assertFalse(queue)
+
+    def testSerialMerges(self):
+        queue, merge = self._scheduler(1)
+        a = merge()
+        b = merge()
+        queue.add(a)
+        queue.add(b)
+        self.assertIs(a.concurrent, False)
+        a.finish()
+        self.assertIs(b.concurrent, False)
+        b.finish()
+
+    def testParallelInstall(self):
+        queue, merge = self._scheduler(3, features=("parallel-install",))
+        a = merge()
+        queue.add(a)
+        self.assertIs(a.concurrent, True)
+        b = merge()
+        queue.add(b)
+        self.assertEqual(queue.running_tasks, {a, b})
+        a.finish()
+        b.finish()
@@ -0,0 +1,129 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import os
+import tempfile
+
+from _emerge.MemoryAdmission import MemoryAdmission
+from portage.tests import TestCase
+
+GiB = 1024 * 1024 * 1024
+
+
+class MemoryAdmissionTestCase(TestCase):
+    def _write_meminfo(self, path, available):
+        with open(path, "w") as f:
+            f.write(
+                f"MemTotal:       {64 * GiB // 1024} kB\n"
+                f"MemFree:        {available // 2048} kB\n"
+                f"MemAvailable:   {available // 1024} kB\n"
+            )
+
+    def testMeminfo(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            meminfo = os.path.join(tmpdir, "meminfo")
+            self._write_meminfo(meminfo, 16 * GiB)
+            admission = MemoryAdmission(
+                meminfo_path=meminfo, cgroup_path=os.path.join(tmpdir, "none")
+            )
+            self.assertEqual(admission.available(), 16 * GiB)
+
+            # The first job is always admitted.
+            self.assertTrue(admission.can_start(32 * GiB))
+            admission.job_started(1, 8 * GiB)
+
+            # The first job has not reached its peak yet, and only
+            # 8 GiB remain for others.
+            self.assertTrue(admission.can_start(6 * GiB))
+            self.assertFalse(admission.can_start(10 * GiB))
+            admission.job_started(2, 6 * GiB)
+
+            # The running jobs use more memory than expected.
+            self._write_meminfo(meminfo, 1 * GiB)
+            self.assertFalse(admission.can_start(2 * GiB))
+            self.assertTrue(admission.can_start(1 * GiB))
+
+            admission.job_exited(1)
+            self._write_meminfo(meminfo, 9 * GiB)
+            self.assertTrue(admission.can_start(8 * GiB))
+            self.assertFalse(admission.can_start(12 * GiB))
+
+            admission.job_exited(2)
+            self.assertTrue(admission.can_start(32 * GiB))
+
+            # Without information about available memory, jobs are
+            # always admitted.
+            os.unlink(meminfo)
+            admission.job_started(3, 8 * GiB)
+            self.assertEqual(admission.available(), None)
+            self.assertTrue(admission.can_start(32 * GiB))
+
+    def testCgroup(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cgroup_root = os.path.join(tmpdir, "cgroup")
+            meminfo = os.path.join(tmpdir, "meminfo")
+            self._write_meminfo(meminfo, 16 * GiB)
+            parent = os.path.join(cgroup_root, "build.slice")
+            cgroup = os.path.join(parent, "emerge.scope")
+            os.makedirs(cgroup)
+            for path, limit, current in (
+                (parent, str(6 * GiB), 2 * GiB),
+                (cgroup, "max", 1 * GiB),
+            ):
+                with open(os.path.join(path, "memory.max"), "w") as f:
+                    f.write(f"{limit}\n")
+                with open(os.path.join(path, "memory.current"), "w") as f:
+                    f.write(f"{current}\n")
+
+            admission = MemoryAdmission(
+                meminfo_path=meminfo, cgroup_path=cgroup, cgroup_root=cgroup_root
+            )
+            self.assertEqual(admission.available(), 4 * GiB)
+            admission.job_started(1, 1 * GiB)
+            self.assertTrue(admission.can_start(3 * GiB))
+            self.assertFalse(admission.can_start(4 * GiB))
+
+    def testMaxDeferrals(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            meminfo = os.path.join(tmpdir, "meminfo")
+            self._write_meminfo(meminfo, 16 * GiB)
+            admission = MemoryAdmission(
+                meminfo_path=meminfo,
+                cgroup_path=os.path.join(tmpdir, "none"),
+                max_deferrals=2,
+            )
+            admission.job_started(1, 4 * GiB)
+
+            # A big job waits while small jobs are admitted.
+            self._write_meminfo(meminfo, 6 * GiB)
+            self.assertFalse(admission.can_start(8 * GiB, "big"))
+            admission.defer("big")
+            self.assertTrue(admission.can_start(1 * GiB, "small-1"))
+            admission.admitted("small-1")
+            admission.job_started(2, 1 * GiB)
+            self.assertEqual(admission.reserved, None)
+
+            # After max_deferrals rounds, small jobs wait for the big one.
+            self.assertFalse(admission.can_start(8 * GiB, "big"))
+            admission.defer("big")
+            self.assertEqual(admission.reserved, "big")
+            self.assertFalse(admission.can_start(1 * GiB, "small-2"))
+            admission.defer("small-2")
+
+            admission.job_exited(1)
+            admission.job_exited(2)
+            self._write_meminfo(meminfo, 16 * GiB)
+            self.assertTrue(admission.can_start(8 * GiB, "big"))
+            admission.admitted("big")
+            admission.job_started(3, 8 * GiB)
+            self.assertEqual(admission.reserved, None)
+            self.assertTrue(admission.can_start(1 * GiB, "small-2"))
+
+            # The reservation of a job that is dropped is released.
+            self._write_meminfo(meminfo, 4 * GiB)
+            for i in range(2):
+                self.assertFalse(admission.can_start(6 * GiB, "dropped"))
+                admission.defer("dropped")
+            self.assertFalse(admission.can_start(1 * GiB, "small-3"))
+            admission.admitted("dropped")
+            self.assertTrue(admission.can_start(1 * GiB, "small-3"))
@@ -0,0 +1,73 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import os
+import tempfile
+
+from _emerge.MergeDurations import MergeDurations
+from _emerge.Package import Package
+from _emerge.Scheduler import Scheduler
+from portage.tests import TestCase
+from portage.tests.resolver.ResolverPlayground import ResolverPlayground
+from portage.util.build_stats import BuildStats
+
+
+class MergeDurationsTestCase(TestCase):
+    def testMergeDurations(self):
+        ebuilds = {
+            "app-misc/A-1": {"EAPI": "8", "DEPEND": "app-misc/B app-misc/C"},
+            "app-misc/B-1": {"EAPI": "8", "DEPEND": "app-misc/D"},
+            "app-misc/C-1": {"EAPI": "8"},
+            "app-misc/D-1": {"EAPI": "8"},
+        }
+
+        playground = ResolverPlayground(ebuilds=ebuilds)
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                path = os.path.join(tmpdir, BuildStats.filename)
+                stats = BuildStats(path)
+                self.assertFalse(MergeDurations({playground.eroot: stats}))
+
+                stats.add("app-misc/D-1", {"phases": {"compile": 10}})
+                stats.add("app-misc/C-0", {"phases": {"compile": 450, "install": 50}})
+                stats.add("app-misc/B-1", {"phases": {"compile": 80, "install": 10}})
+                # A record without phase durations is ignored.
+                stats.add("app-misc/E-1", {"max_rss": 1024})
+                durations = MergeDurations({playground.eroot: BuildStats(path)})
+            self.assertTrue(durations)
+
+            result = playground.run(["app-misc/A"])
+            self.assertTrue(result.success)
+            graph = result.depgraph.schedulerGraph().graph
+            pkgs = {pkg.cpv: pkg for pkg in graph if isinstance(pkg, Package)}
+
+            self.assertEqual(durations.estimate(pkgs["app-misc/B-1"]), 90)
+            # The build time of another version is used.
+            self.assertEqual(durations.estimate(pkgs["app-misc/C-1"]), 500)
+            self.assertEqual(durations.estimate(pkgs["app-misc/D-1"]), 10)
+            # A has no history, so the median is used.
+            self.assertEqual(durations.estimate(pkgs["app-misc/A-1"]), 90)
+
+            lengths = durations.critical_paths(graph, set())
+            self.assertEqual(lengths[pkgs["app-misc/A-1"]], 90)
+            self.assertEqual(lengths[pkgs["app-misc/B-1"]], 180)
+            self.assertEqual(lengths[pkgs["app-misc/C-1"]], 590)
+            self.assertEqual(lengths[pkgs["app-misc/D-1"]], 190)
+
+            # Completed merges do not count.
+            lengths = durations.critical_paths(graph, {pkgs["app-misc/A-1"]})
+            self.assertEqual(lengths[pkgs["app-misc/C-1"]], 500)
+        finally:
+            playground.cleanup()
+
+    def testLaterPkgs(self):
+        positions = {"A": 0, "B": 1, "C": 2, "D": 3}
+        later = Scheduler._later_pkgs_class(
+            positions=positions, position=1, queued={"A", "B", "D"}
+        )
+        self.assertNotIn("A", later)
+        self.assertNotIn("B", later)
+        # C is not queued, since it has been started already.
+        self.assertNotIn("C", later)
+        self.assertIn("D", later)
+        self.assertNotIn("E", later)
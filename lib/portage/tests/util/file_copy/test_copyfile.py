@@ -10,7 +10,7 @@ import pytest
 from portage import os
 from portage.tests import TestCase
 from portage.checksum import perform_md5
-from portage.util.file_copy import copyfile, _fastcopy
+from portage.util.file_copy import clonefile, copyfile, _fastcopy
 
 
 class CopyFileTestCase(TestCase):
@@ -77,3 +77,27 @@ class CopyFileSparseTestCase(TestCase):
                 pytest.xfail(reason="sparse copy is not implemented")
         finally:
             shutil.rmtree(tempdir)
+
+
+class CloneFileTestCase(TestCase):
+    def testCloneFile(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            src_path = os.path.join(tempdir, "src")
+            dest_path = os.path.join(tempdir, "dest")
+            content = b"foo"
+
+            with open(src_path, "wb") as f:
+                f.write(content)
+
+            try:
+                clonefile(src_path, dest_path)
+            except OSError:
+                # The destination must not be left behind when the
+                # filesystem does not support reflinks.
+                self.assertFalse(os.path.exists(dest_path))
+                pytest.skip("reflinks are not supported")
+
+            self.assertEqual(perform_md5(src_path), perform_md5(dest_path))
+        finally:
+            shutil.rmtree(tempdir)
@@ -0,0 +1,77 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import os
+import tempfile
+
+from portage.tests import TestCase
+from portage.util.build_stats import BuildStats, dir_usage, process_tree_rss
+
+
+class BuildStatsTestCase(TestCase):
+    def testBuildStats(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            stats = BuildStats.for_root(tmpdir)
+            self.assertEqual(len(stats), 0)
+            self.assertEqual(stats.lookup("dev-lang/rust-1.80.0"), None)
+            self.assertEqual(stats.percentile("tmpdir_usage", 0.9), None)
+
+            for i, (cpv, tmpdir_usage) in enumerate(
+                (
+                    ("dev-lang/rust-1.78.0", 15),
+                    ("dev-lang/rust-1.79.0", 16),
+                    ("dev-lang/rust-1.80.0", 17),
+                    ("dev-lang/rust-1.81.0", 18),
+                    ("app-misc/A-1", 1),
+                    ("app-misc/B-1", 2),
+                )
+            ):
+                stats.add(
+                    cpv,
+                    {
+                        "time": 1000 + i,
+                        "phases": {"compile": 3600, "install": 60},
+                        "tmpdir_usage": tmpdir_usage,
+                    },
+                )
+
+            # Another process sees the records, and only the most
+            # recent builds of each package are kept.
+            stats = BuildStats.for_root(tmpdir)
+            self.assertEqual(len(stats), 5)
+            self.assertFalse("dev-lang/rust-1.78.0" in stats)
+            self.assertEqual(stats.get("dev-lang/rust-1.80.0")["tmpdir_usage"], 17)
+            self.assertEqual(stats.latest("dev-lang/rust")["tmpdir_usage"], 18)
+            self.assertEqual(stats.lookup("dev-lang/rust-1.82.0")["tmpdir_usage"], 18)
+            self.assertEqual(stats.lookup("app-misc/C-1"), None)
+            self.assertEqual(stats.percentile("tmpdir_usage", 0), 1)
+            self.assertEqual(stats.percentile("tmpdir_usage", 0.9), 18)
+
+            # Values that are not numbers are ignored.
+            stats.add("app-misc/D-1", {"time": 2000, "tmpdir_usage": "x"})
+            stats.add("app-misc/E-1", {"time": 2001, "tmpdir_usage": [1]})
+            self.assertEqual(stats.latest("app-misc/D")["tmpdir_usage"], "x")
+            self.assertEqual(stats.percentile("tmpdir_usage", 0), 1)
+
+            # Corrupt files are ignored.
+            with open(stats.path, "w") as f:
+                f.write("{")
+            self.assertEqual(len(BuildStats(stats.path)), 0)
+
+    def testDirUsage(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            empty = dir_usage(tmpdir)
+            os.mkdir(os.path.join(tmpdir, "dir"))
+            with open(os.path.join(tmpdir, "dir", "file"), "wb") as f:
+                f.write(b"x" * 65536)
+            os.link(os.path.join(tmpdir, "dir", "file"), os.path.join(tmpdir, "link"))
+            usage = dir_usage(tmpdir)
+            self.assertTrue(usage >= empty + 65536)
+            self.assertTrue(usage < empty + 2 * 65536)
+
+    def testProcessTreeRss(self):
+        if not os.path.isdir("/proc/self"):
+            self.skipTest("/proc is not available")
+        rss = process_tree_rss(os.getpid(), max_age=0)
+        self.assertTrue(rss is not None and rss > 0)
+        self.assertEqual(process_tree_rss(-1, max_age=0), None)
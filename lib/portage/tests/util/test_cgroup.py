@@ -0,0 +1,127 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import os
+import signal
+import tempfile
+import time
+
+import portage
+from portage.tests import TestCase
+from portage.util._cgroup import JobCgroup, find_own, format_accounting
+from portage.util.futures import asyncio
+
+
+class CgroupTestCase(TestCase):
+    def testFakeCgroup(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+
+            class FakeJobCgroup(JobCgroup):
+                _parents = {}
+                _warned = set()
+
+                @classmethod
+                def _parent(cls):
+                    return tmpdir, frozenset(["cpu", "memory"])
+
+            # A cgroup of a process that does not exist any more, since
+            # the pid is greater than the maximum pid_max.
+            stale = os.path.join(tmpdir, "portage-job.4194305.app-misc:A-1")
+            os.mkdir(stale)
+
+            cgroup = FakeJobCgroup.create(
+                "app-misc/B-1", cpu_weight="50", io_weight="50", memory_high="max"
+            )
+            self.assertFalse(os.path.exists(stale))
+            self.assertEqual(
+                cgroup.path,
+                os.path.join(tmpdir, f"portage-job.{os.getpid()}.app-misc:B-1"),
+            )
+            with open(os.path.join(cgroup.path, "cpu.weight")) as f:
+                self.assertEqual(f.read(), "50")
+            with open(os.path.join(cgroup.path, "memory.high")) as f:
+                self.assertEqual(f.read(), "max")
+            # The io controller is not enabled.
+            self.assertFalse(os.path.exists(os.path.join(cgroup.path, "io.weight")))
+
+            for filename, content in (
+                ("cpu.stat", "usage_usec 2500000\nuser_usec 2000000\n"),
+                ("memory.peak", "1073741824\n"),
+                (
+                    "io.stat",
+                    "8:0 rbytes=1024 wbytes=2048 rios=1 wios=2\n"
+                    "8:16 rbytes=1024 wbytes=0 rios=1 wios=0\n",
+                ),
+                ("cgroup.events", "populated 0\nfrozen 0\n"),
+            ):
+                with open(os.path.join(cgroup.path, filename), "w") as f:
+                    f.write(content)
+
+            usage = cgroup.accounting()
+            self.assertEqual(
+                usage,
+                {
+                    "cpu_time": 2.5,
+                    "user_time": 2.0,
+                    "memory_peak": 1073741824,
+                    "io_read": 2048,
+                    "io_write": 2048,
+                },
+            )
+            self.assertEqual(
+                format_accounting(usage),
+                "Resource usage: CPU 2.5s, memory peak 1.00 GiB, "
+                "IO read 2.00 KiB, written 2.00 KiB",
+            )
+            self.assertEqual(format_accounting({}), None)
+
+            # The fake cgroup is not empty, so it is not removed.
+            cgroup.destroy()
+            self.assertTrue(os.path.isdir(cgroup.path))
+
+    def testLiveCgroup(self):
+        own = find_own()
+        if own is None:
+            self.skipTest("cgroup v2 is not available")
+        if not os.access(own, os.W_OK):
+            self.skipTest(f"cgroup '{own}' is not writable")
+
+        class LiveJobCgroup(JobCgroup):
+            # Do not enable controllers, since that could move this
+            # process into another cgroup.
+            _controllers = ()
+            _parents = {}
+            _warned = set()
+
+        cgroup = LiveJobCgroup.create("test/cgroup-1")
+        if cgroup is None:
+            self.skipTest(f"unable to create a cgroup below '{own}'")
+        try:
+            loop = asyncio.get_event_loop()
+            proc = portage.process.spawn(
+                ["sleep", "100"], returnproc=True, cgroup=cgroup.path
+            )
+            for i in range(100):
+                with open(os.path.join(cgroup.path, "cgroup.procs")) as f:
+                    if f.read().split() == [str(proc.pid)]:
+                        break
+                time.sleep(0.1)
+            else:
+                self.fail(f"process {proc.pid} did not join {cgroup.path}")
+            self.assertTrue(cgroup.populated())
+            self.assertTrue("cpu_time" in cgroup.accounting())
+
+            cgroup.destroy()
+            self.assertEqual(loop.run_until_complete(proc.wait()), -signal.SIGKILL)
+            for i in range(100):
+                if not os.path.exists(cgroup.path):
+                    break
+                time.sleep(0.1)
+                cgroup.destroy()
+            self.assertFalse(os.path.exists(cgroup.path))
+        finally:
+            cgroup.kill()
+            try:
+                os.rmdir(cgroup.path)
+            except OSError:
+                pass
@@ -1,14 +1,18 @@
 # Copyright 2010-2012 Gentoo Foundation
 # Distributed under the terms of the GNU General Public License v2
 
+import random
+
 from portage.tests import TestCase
-from portage.util.digraph import digraph
+from portage.util.digraph import digraph, incremental_digraph
 
 # ~ from portage.util import noiselimit
 import portage.util
 
 
 class DigraphTest(TestCase):
+    graph_class = digraph
+
     def _assertBFSEqual(self, result, expected):
         result_stack = list(result)
         result_stack.reverse()
@@ -45,7 +49,7 @@ class DigraphTest(TestCase):
             self.assertEqual(result_compared, expected_compared)
 
     def testBackwardCompatibility(self):
-        g = digraph()
+        g = self.graph_class()
         f = g.copy()
         g.addnode("A", None)
         self.assertEqual("A" in g, True)
@@ -55,7 +59,7 @@ class DigraphTest(TestCase):
         self.assertEqual(g.hasnode("A"), True)
 
     def testDigraphEmptyGraph(self):
-        g = digraph()
+        g = self.graph_class()
         f = g.clone()
         for x in g, f:
             self.assertEqual(bool(x), False)
@@ -82,14 +86,14 @@ class DigraphTest(TestCase):
             portage.util.noiselimit = 0
 
     def testDigraphCircle(self):
-        g = digraph()
+        g = self.graph_class()
         g.add("A", "B", -1)
         g.add("B", "C", 0)
         g.add("C", "D", 1)
         g.add("D", "A", 2)
 
         f = g.clone()
-        h = digraph()
+        h = self.graph_class()
         h.update(f)
         for x in g, f, h:
             self.assertEqual(bool(x), True)
@@ -137,7 +141,7 @@ class DigraphTest(TestCase):
             portage.util.noiselimit = 0
 
     def testDigraphTree(self):
-        g = digraph()
+        g = self.graph_class()
         g.add("B", "A", -1)
         g.add("C", "A", 0)
         g.add("D", "C", 1)
@@ -185,7 +189,7 @@ class DigraphTest(TestCase):
             self.assertRaises(KeyError, x.remove_edge, "A", "E")
 
     def testDigraphCompleteGraph(self):
-        g = digraph()
+        g = self.graph_class()
         g.add("A", "B", -1)
         g.add("B", "A", 1)
         g.add("A", "C", 1)
@@ -244,7 +248,7 @@ class DigraphTest(TestCase):
         def always_false(dummy):
             return False
 
-        g = digraph()
+        g = self.graph_class()
         g.add("A", "B")
 
         self.assertEqual(g.parent_nodes("A"), ["B"])
@@ -262,3 +266,75 @@ class DigraphTest(TestCase):
         self.assertEqual(g.root_nodes(), ["B"])
         self.assertEqual(g.root_nodes(ignore_priority=always_false), ["B"])
         self.assertEqual(g.root_nodes(ignore_priority=always_true), ["A", "B"])
+
+
+class IncrementalDigraphTest(DigraphTest):
+    graph_class = incremental_digraph
+
+    def testIncrementalDigraphOrder(self):
+        g = incremental_digraph()
+        for node in ("A", "B", "C"):
+            g.add(node, None)
+        with self.assertRaises(AttributeError):
+            g.order.sort(reverse=True)
+        g.order = sorted(g.order, reverse=True)
+        self.assertEqual(g.all_nodes(), ["C", "B", "A"])
+        self.assertEqual(g.root_nodes(), ["C", "B", "A"])
+
+    def testIncrementalDigraphConsistency(self):
+        """
+        Compare leaf_nodes and root_nodes with those of a digraph, while
+        the graphs are modified.
+        """
+
+        def ignore_odd(priority):
+            return priority % 2 == 1
+
+        rng = random.Random(0)
+        g = digraph()
+        for i in range(200):
+            g.add(i, None)
+        for i in range(600):
+            child, parent = rng.sample(range(200), 2)
+            g.add(child, parent, priority=rng.randrange(4))
+        x = incremental_digraph(g)
+        self.assertEqual(x.all_nodes(), g.all_nodes())
+        self.assertIsNot(x.nodes, g.nodes)
+
+        ignore_priorities = (None, 0, 1, 2, ignore_odd)
+        while g:
+            for ignore_priority in ignore_priorities:
+                self.assertEqual(
+                    x.leaf_nodes(ignore_priority=ignore_priority),
+                    g.leaf_nodes(ignore_priority=ignore_priority),
+                )
+                self.assertEqual(
+                    x.root_nodes(ignore_priority=ignore_priority),
+                    g.root_nodes(ignore_priority=ignore_priority),
+                )
+            op = rng.randrange(6)
+            if op == 0 and len(g.order) > 1:
+                child, parent = rng.sample(g.order, 2)
+                priority = rng.randrange(4)
+                g.add(child, parent, priority=priority)
+                x.add(child, parent, priority=priority)
+            elif op == 1:
+                node = rng.choice(g.order)
+                for parent in g.parent_nodes(node)[:1]:
+                    g.remove_edge(node, parent)
+                    x.remove_edge(node, parent)
+            elif op == 2:
+                nodes = rng.sample(g.order, min(3, len(g.order)))
+                g.difference_update(nodes)
+                x.difference_update(nodes)
+            elif op == 3:
+                node = len(g.order) + 1000
+                parent = rng.choice(g.order)
+                g.add(node, parent, priority=1)
+                x.add(node, parent, priority=1)
+            else:
+                nodes = g.leaf_nodes(ignore_priority=1) or g.order
+                g.remove(nodes[0])
+                x.remove(nodes[0])
+            self.assertEqual(x.all_nodes(), g.all_nodes())
+        self.assertEqual(x.leaf_nodes(), [])
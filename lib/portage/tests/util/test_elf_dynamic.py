@@ -0,0 +1,215 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import struct
+import tempfile
+
+from portage import os, shutil
+from portage.tests import TestCase
+from portage.util._dyn_libs.NeededEntry import NeededEntry
+from portage.util.elf.constants import (
+    DF_1_PIE,
+    DT_FLAGS_1,
+    DT_NEEDED,
+    DT_RPATH,
+    DT_RUNPATH,
+    DT_SONAME,
+    DT_STRSZ,
+    DT_STRTAB,
+    ELFCLASS32,
+    ELFCLASS64,
+    ELFDATA2LSB,
+    ELFDATA2MSB,
+    EM_386,
+    EM_MICROBLAZE,
+    EM_X86_64,
+    ET_DYN,
+    ET_EXEC,
+    PT_DYNAMIC,
+    PT_LOAD,
+)
+from portage.util.elf.dynamic import ELFDynamic
+
+
+def make_elf(ei_class, ei_data, e_type, e_machine, strings=(), dynamic=()):
+    """
+    Return the contents of a minimal ELF file with one PT_LOAD segment
+    and a dynamic section. The dynamic entries refer to strings by
+    their index in strings.
+    """
+    order = "<" if ei_data == ELFDATA2LSB else ">"
+    if ei_class == ELFCLASS64:
+        ehdr_size, phdr_fmt, dyn_fmt = 64, "IIQQQQQQ", "qQ"
+        ehdr_fmt = "HHIQQQIHHHHHH"
+    else:
+        ehdr_size, phdr_fmt, dyn_fmt = 52, "IIIIIIII", "iI"
+        ehdr_fmt = "HHIIIIIHHHHHH"
+    phdr_size = struct.calcsize(phdr_fmt)
+    vaddr = 0x10000
+
+    strtab = b"\0"
+    offsets = []
+    for s in strings:
+        offsets.append(len(strtab))
+        strtab += s + b"\0"
+    strtab_offset = ehdr_size + 2 * phdr_size
+    dyn_offset = strtab_offset + len(strtab)
+    entries = [
+        (tag, offsets[val] if tag != DT_FLAGS_1 else val) for tag, val in dynamic
+    ]
+    entries += [(DT_STRTAB, vaddr + strtab_offset), (DT_STRSZ, len(strtab)), (0, 0)]
+    dyn = b"".join(struct.pack(order + dyn_fmt, *x) for x in entries)
+    size = dyn_offset + len(dyn)
+
+    def phdr(p_type, offset, filesz):
+        if ei_class == ELFCLASS64:
+            fields = (p_type, 0, offset, vaddr + offset, 0, filesz, filesz, 0)
+        else:
+            fields = (p_type, offset, vaddr + offset, 0, filesz, filesz, 0, 0)
+        return struct.pack(order + phdr_fmt, *fields)
+
+    ident = b"\x7fELF" + bytes([ei_class, ei_data, 1]) + bytes(9)
+    ehdr = ident + struct.pack(
+        order + ehdr_fmt,
+        e_type,
+        e_machine,
+        1,
+        0,
+        ehdr_size,
+        0,
+        0,
+        ehdr_size,
+        phdr_size,
+        2,
+        0,
+        0,
+        0,
+    )
+    return (
+        ehdr
+        + phdr(PT_LOAD, 0, size)
+        + phdr(PT_DYNAMIC, dyn_offset, len(dyn))
+        + strtab
+        + dyn
+    )
+
+
+class ELFDynamicTestCase(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def read(self, name, data):
+        path = os.path.join(self.tempdir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        with open(path, "rb") as f:
+            return ELFDynamic.read(f)
+
+    def testNotELF(self):
+        self.assertIsNone(self.read("empty", b""))
+        self.assertIsNone(self.read("text", b"#!/bin/sh\n" * 10))
+
+    def testSharedLibrary(self):
+        elf = self.read(
+            "libfoo.so.1",
+            make_elf(
+                ELFCLASS64,
+                ELFDATA2LSB,
+                ET_DYN,
+                EM_X86_64,
+                strings=(b"libc.so.6", b"libfoo.so.1", b"$ORIGIN", b"libm.so.6"),
+                dynamic=(
+                    (DT_NEEDED, 0),
+                    (DT_SONAME, 1),
+                    (DT_RUNPATH, 2),
+                    (DT_NEEDED, 3),
+                ),
+            ),
+        )
+        self.assertEqual(elf.arch, "X86_64")
+        self.assertEqual(elf.needed, [b"libc.so.6", b"libm.so.6"])
+        self.assertEqual(elf.soname, b"libfoo.so.1")
+        self.assertEqual(elf.runpath, b"$ORIGIN")
+        self.assertIsNone(elf.rpath)
+        self.assertTrue(elf.is_shared_object)
+
+        entry = NeededEntry.from_elf("/usr/lib64/libfoo.so.1", elf)
+        self.assertEqual(
+            str(entry),
+            "X86_64;/usr/lib64/libfoo.so.1;libfoo.so.1;$ORIGIN;libc.so.6,libm.so.6;x86_64\n",
+        )
+
+    def testImplicitSoname(self):
+        elf = self.read(
+            "libbar.so",
+            make_elf(
+                ELFCLASS32,
+                ELFDATA2MSB,
+                ET_DYN,
+                EM_386,
+                strings=(b"libc.so.6", b"/opt/lib:/opt/lib2"),
+                dynamic=((DT_NEEDED, 0), (DT_RPATH, 1)),
+            ),
+        )
+        self.assertEqual(elf.arch, "386")
+        self.assertEqual(elf.rpath, b"/opt/lib:/opt/lib2")
+
+        # Infer the soname from the basename (bug 715162).
+        entry = NeededEntry.from_elf("/usr/lib/libbar.so", elf)
+        self.assertEqual(entry.soname, "libbar.so")
+        self.assertEqual(entry.runpaths, ("/opt/lib", "/opt/lib2"))
+        self.assertEqual(entry.needed, ("libc.so.6",))
+
+    def testExecutable(self):
+        for e_type, dynamic in (
+            (ET_EXEC, ()),
+            (ET_DYN, ((DT_FLAGS_1, DF_1_PIE),)),
+        ):
+            elf = self.read(
+                "foo",
+                make_elf(
+                    ELFCLASS64,
+                    ELFDATA2LSB,
+                    e_type,
+                    EM_X86_64,
+                    strings=(b"libc.so.6",),
+                    dynamic=((DT_NEEDED, 0),) + dynamic,
+                ),
+            )
+            self.assertFalse(elf.is_shared_object)
+            entry = NeededEntry.from_elf("/usr/bin/foo", elf)
+            self.assertEqual(str(entry), "X86_64;/usr/bin/foo;;;libc.so.6;x86_64\n")
+
+    def testTruncated(self):
+        data = make_elf(
+            ELFCLASS64,
+            ELFDATA2LSB,
+            ET_DYN,
+            EM_X86_64,
+            strings=(b"libc.so.6",),
+            dynamic=((DT_NEEDED, 0),),
+        )
+        elf = self.read("truncated", data[:100])
+        self.assertEqual(elf.arch, "X86_64")
+        self.assertEqual(elf.needed, [])
+
+    def testMachineNames(self):
+        for e_machine, arch in (
+            (EM_MICROBLAZE, "MICROBLAZE"),
+            (0x7FFF, "UNKNOWN_TYPE"),
+        ):
+            elf = self.read(
+                "foo",
+                make_elf(
+                    ELFCLASS32,
+                    ELFDATA2MSB,
+                    ET_DYN,
+                    e_machine,
+                    strings=(b"libc.so.6",),
+                    dynamic=((DT_NEEDED, 0),),
+                ),
+            )
+            self.assertEqual(elf.arch, arch)
@@ -0,0 +1,30 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import os
+import pickle
+import tempfile
+
+from portage.tests import TestCase
+from portage.util._pickle_cache import load_pickle, store_pickle
+
+
+class PickleCacheTestCase(TestCase):
+    def testPickleCache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "cache", "test.pickle")
+            self.assertEqual(load_pickle(filename, "1"), None)
+
+            data = {"version": "1", "md5": {"/a": ((1, 2, 3, 4), "x")}}
+            self.assertTrue(store_pickle(filename, data, ensure_parent=True))
+            self.assertEqual(load_pickle(filename, "1"), data)
+            self.assertEqual(load_pickle(filename, "2"), None)
+
+            # Anything but builtin types is rejected.
+            with open(filename, "wb") as f:
+                pickle.dump({"version": "1", "join": os.path.join}, f)
+            self.assertEqual(load_pickle(filename, "1"), None)
+
+            with open(filename, "wb") as f:
+                f.write(b"corrupt")
+            self.assertEqual(load_pickle(filename, "1"), None)
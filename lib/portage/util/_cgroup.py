@@ -0,0 +1,356 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import errno
+import logging
+import signal
+
+from portage import os
+from portage.localization import _
+from portage.util import writemsg_level
+from portage.util.human_readable import bytes_to_human
+
+
+def find_mount():
+    """
+    @rtype: str or None
+    @return: the mount point of the cgroup v2 hierarchy, or None
+    """
+    try:
+        with open("/proc/self/mounts") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) > 2 and fields[2] == "cgroup2":
+                    return fields[1]
+    except OSError:
+        pass
+    return None
+
+
+def find_own(mount=None):
+    """
+    @param mount: the mount point of the cgroup v2 hierarchy
+    @type mount: str
+    @rtype: str or None
+    @return: the path of the cgroup v2 that contains this process, or None
+    """
+    if mount is None:
+        mount = find_mount()
+        if mount is None:
+            return None
+    try:
+        with open("/proc/self/cgroup") as f:
+            for line in f:
+                hierarchy, controllers, path = line.rstrip("\n").split(":", 2)
+                if hierarchy == "0" and not controllers:
+                    return os.path.join(mount, path.lstrip("/"))
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def _write(path, value):
+    with open(path, "w") as f:
+        f.write(value)
+
+
+class JobCgroup:
+    """
+    A cgroup v2 for all processes of one build job, which is used to
+    apply resource controls, to collect resource usage, and to kill
+    any processes that are left over when the job is done.
+
+    Job cgroups are created below the cgroup of the emerge process,
+    which needs to be delegated (writable). Resource controls require
+    the cpu, io and memory controllers to be enabled in the
+    cgroup.subtree_control file of that cgroup, which is only possible
+    if it contains no processes. If emerge is the only process in its
+    cgroup, then it moves itself into a child cgroup named "emerge" to
+    make that possible. Otherwise, job cgroups are only used for CPU
+    accounting and for killing processes.
+    """
+
+    _controllers = ("cpu", "io", "memory")
+    _prefix = "portage-job."
+
+    # { own cgroup path : (parent path or None, enabled controllers) }
+    _parents = {}
+    _warned = set()
+
+    def __init__(self, path):
+        self.path = path
+
+    @classmethod
+    def _warn(cls, msg):
+        if msg not in cls._warned:
+            cls._warned.add(msg)
+            writemsg_level(f"!!! {msg}\n", level=logging.WARNING, noiselevel=-1)
+
+    @classmethod
+    def _setup_parent(cls, own):
+        if not (
+            os.access(own, os.W_OK)
+            and os.access(os.path.join(own, "cgroup.procs"), os.W_OK)
+        ):
+            cls._warn(_("FEATURES=cgroup: cgroup '%s' is not delegated") % own)
+            return None, frozenset()
+
+        try:
+            available = _read(os.path.join(own, "cgroup.controllers")).split()
+        except OSError:
+            available = []
+        wanted = [c for c in cls._controllers if c in available]
+        if not wanted:
+            return own, frozenset()
+
+        subtree_control = os.path.join(own, "cgroup.subtree_control")
+        value = " ".join(f"+{c}" for c in wanted)
+        try:
+            _write(subtree_control, value)
+        except OSError as e:
+            if e.errno != errno.EBUSY:
+                cls._warn(
+                    _("FEATURES=cgroup: unable to enable controllers in '%s': %s")
+                    % (own, e)
+                )
+                return own, frozenset()
+            # The cgroup contains processes, so controllers can only
+            # be enabled if emerge moves out of it.
+            try:
+                procs = _read(os.path.join(own, "cgroup.procs")).split()
+                if procs != [str(os.getpid())]:
+                    raise OSError(errno.EBUSY, os.strerror(errno.EBUSY))
+                leaf = os.path.join(own, "emerge")
+                os.makedirs(leaf, exist_ok=True)
+                _write(os.path.join(leaf, "cgroup.procs"), str(os.getpid()))
+                _write(subtree_control, value)
+            except OSError as e:
+                cls._warn(
+                    _(
+                        "FEATURES=cgroup: unable to enable controllers in '%s', "
+                        "resource controls are disabled: %s"
+                    )
+                    % (own, e)
+                )
+                return own, frozenset()
+        return own, frozenset(wanted)
+
+    @classmethod
+    def _parent(cls):
+        own = find_own()
+        if own is None:
+            cls._warn(_("FEATURES=cgroup: cgroup v2 is not available"))
+            return None, frozenset()
+        if os.path.basename(own) == "emerge" and os.path.dirname(own) in cls._parents:
+            # This process has moved itself.
+            own = os.path.dirname(own)
+        result = cls._parents.get(own)
+        if result is None:
+            result = cls._parents[own] = cls._setup_parent(own)
+        return result
+
+    @classmethod
+    def create(cls, name, cpu_weight=None, io_weight=None, memory_high=None):
+        """
+        Create a cgroup for a job, or return None if cgroup v2 is not
+        available or not delegated.
+
+        @param name: a name for the job, which is unique within this process
+        @type name: str
+        @param cpu_weight: a value for cpu.weight
+        @type cpu_weight: str
+        @param io_weight: a value for the default io.weight
+        @type io_weight: str
+        @param memory_high: a value for memory.high, in bytes or "max"
+        @type memory_high: str
+        @rtype: JobCgroup or None
+        """
+        parent, controllers = cls._parent()
+        if parent is None:
+            return None
+        cls._remove_stale(parent)
+
+        path = os.path.join(
+            parent, f"{cls._prefix}{os.getpid()}.{name.replace('/', ':')}"
+        )
+        try:
+            os.makedirs(path, exist_ok=True)
+        except OSError as e:
+            cls._warn(_("FEATURES=cgroup: unable to create '%s': %s") % (path, e))
+            return None
+
+        cgroup = cls(path)
+        for controller, filename, value in (
+            ("cpu", "cpu.weight", cpu_weight),
+            ("io", "io.weight", None if io_weight is None else f"default {io_weight}"),
+            ("memory", "memory.high", memory_high),
+        ):
+            if value is None:
+                continue
+            if controller not in controllers:
+                cls._warn(
+                    _("FEATURES=cgroup: the %s controller is not available")
+                    % controller
+                )
+                continue
+            try:
+                _write(os.path.join(path, filename), value)
+            except OSError as e:
+                cls._warn(
+                    _("FEATURES=cgroup: unable to write '%s' to %s: %s")
+                    % (value, filename, e)
+                )
+        return cgroup
+
+    @classmethod
+    def _remove_stale(cls, parent):
+        """
+        Remove job cgroups of processes that no longer exist.
+        """
+        try:
+            names = os.listdir(parent)
+        except OSError:
+            return
+        for name in names:
+            if not name.startswith(cls._prefix):
+                continue
+            try:
+                pid = int(name[len(cls._prefix) :].split(".", 1)[0])
+            except ValueError:
+                continue
+            if pid == os.getpid():
+                continue
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                cls(os.path.join(parent, name)).destroy()
+            except OSError:
+                pass
+
+    def accounting(self):
+        """
+        Return resource usage of the job, as a dict with any of the
+        following keys:
+
+            cpu_time, user_time, system_time: CPU time in seconds
+            memory_peak: peak memory usage in bytes
+            io_read, io_write: bytes read and written by block IO
+
+        @rtype: dict
+        """
+        result = {}
+        try:
+            for line in _read(os.path.join(self.path, "cpu.stat")).splitlines():
+                key, _sep, value = line.partition(" ")
+                for stat_key, result_key in (
+                    ("usage_usec", "cpu_time"),
+                    ("user_usec", "user_time"),
+                    ("system_usec", "system_time"),
+                ):
+                    if key == stat_key:
+                        result[result_key] = int(value) / 1000000
+        except (OSError, ValueError):
+            pass
+
+        try:
+            result["memory_peak"] = int(
+                _read(os.path.join(self.path, "memory.peak")).strip()
+            )
+        except (OSError, ValueError):
+            pass
+
+        try:
+            io_stat = _read(os.path.join(self.path, "io.stat"))
+        except OSError:
+            pass
+        else:
+            io_read = io_write = 0
+            for line in io_stat.splitlines():
+                for field in line.split()[1:]:
+                    key, _sep, value = field.partition("=")
+                    if key == "rbytes":
+                        io_read += int(value)
+                    elif key == "wbytes":
+                        io_write += int(value)
+            result["io_read"] = io_read
+            result["io_write"] = io_write
+
+        return result
+
+    def kill(self):
+        """
+        Kill all processes in the cgroup.
+        """
+        try:
+            _write(os.path.join(self.path, "cgroup.kill"), "1")
+            return
+        except OSError:
+            # cgroup.kill requires Linux 5.14
+            pass
+        try:
+            pids = _read(os.path.join(self.path, "cgroup.procs")).split()
+        except OSError:
+            return
+        for pid in pids:
+            try:
+                os.kill(int(pid), signal.SIGKILL)
+            except (OSError, ValueError):
+                pass
+
+    def populated(self):
+        try:
+            for line in _read(os.path.join(self.path, "cgroup.events")).splitlines():
+                if line.startswith("populated "):
+                    return line.split()[1] != "0"
+        except OSError:
+            pass
+        return False
+
+    def destroy(self):
+        """
+        Kill any remaining processes, and remove the cgroup if it is
+        empty. A cgroup that is still busy will be removed later, when
+        the next job cgroup is created.
+        """
+        if self.populated():
+            self.kill()
+        try:
+            os.rmdir(self.path)
+        except OSError as e:
+            if e.errno not in (errno.EBUSY, errno.ENOENT, errno.ENOTEMPTY):
+                self._warn(
+                    _("FEATURES=cgroup: unable to remove '%s': %s") % (self.path, e)
+                )
+
+
+def format_accounting(usage):
+    """
+    Format the result of JobCgroup.accounting for a build log.
+
+    @rtype: str or None
+    @return: a line without trailing newline, or None if usage is empty
+    """
+    parts = []
+    if "cpu_time" in usage:
+        part = f"CPU {usage['cpu_time']:.1f}s"
+        if "user_time" in usage and "system_time" in usage:
+            part += (
+                f" (user {usage['user_time']:.1f}s, "
+                f"system {usage['system_time']:.1f}s)"
+            )
+        parts.append(part)
+    if "memory_peak" in usage:
+        parts.append(f"memory peak {bytes_to_human(usage['memory_peak'])}")
+    if "io_read" in usage:
+        parts.append(
+            f"IO read {bytes_to_human(usage['io_read'])}, "
+            f"written {bytes_to_human(usage.get('io_write', 0))}"
+        )
+    if not parts:
+        return None
+    return "Resource usage: " + ", ".join(parts)
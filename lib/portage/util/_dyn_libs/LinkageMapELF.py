@@ -1,22 +1,18 @@
-# Copyright 1998-2020 Gentoo Authors
+# Copyright 1998-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
 import collections
 import errno
 import itertools
 import logging
-import subprocess
 
 import portage
 from portage import _encodings
 from portage import _os_merge
-from portage import _unicode_decode
 from portage import _unicode_encode
 from portage.cache.mappings import slot_dict_class
-from portage.const import EPREFIX
-from portage.dep.soname.multilib_category import compute_multilib_category
 from portage.dep.soname.SonameAtom import SonameAtom
-from portage.exception import CommandNotFound, InvalidData
+from portage.exception import InvalidData
 from portage.localization import _
 from portage.util import getlibpaths
 from portage.util import grabfile
@@ -24,7 +20,7 @@ from portage.util import normalize_path
 from portage.util import varexpand
 from portage.util import writemsg_level
 from portage.util._dyn_libs.NeededEntry import NeededEntry
-from portage.util.elf.header import ELFHeader
+from portage.util.elf.dynamic import ELFDynamic
 
 
 # Map ELF e_machine values from NEEDED.ELF.2 to approximate multilib
@@ -197,9 +193,6 @@ class LinkageMapELF:
 
     def rebuild(self, exclude_pkgs=None, include_file=None, preserve_paths=None):
         """
-        Raises CommandNotFound if there are preserved libs
-        and the scanelf binary is not available.
-
         @param exclude_pkgs: A set of packages that should be excluded from
                 the LinkageMap, since they are being unmerged and their NEEDED
                 entries are therefore irrelevant and would only serve to corrupt
@@ -249,7 +242,7 @@ class LinkageMapELF:
             if can_lock:
                 self._dbapi.unlock()
 
-        # have to call scanelf for preserved libs here as they aren't
+        # have to parse preserved libs here as they aren't
         # registered in NEEDED.ELF.2 files
         plibs = {}
         if preserve_paths is not None:
@@ -264,97 +257,30 @@ class LinkageMapELF:
                     # parameter.
                     continue
                 plibs.update((x, cpv) for x in items)
-        if plibs:
-            # We don't use scanelf -q, since that would omit libraries like
-            # musl's /usr/lib/libc.so which do not have any DT_NEEDED or
-            # DT_SONAME settings.
-            args = [
-                os.path.join(EPREFIX or "/", "usr/bin/scanelf"),
-                "-BF",
-                "%a;%F;%S;%r;%n",
-            ]
-            args.extend(os.path.join(root, x.lstrip("." + os.sep)) for x in plibs)
+        for x in list(plibs):
+            filename = os.path.join(root, x.lstrip("." + os.sep))
             try:
-                proc = subprocess.Popen(args, stdout=subprocess.PIPE)
+                with open(
+                    _unicode_encode(
+                        filename, encoding=_encodings["fs"], errors="strict"
+                    ),
+                    "rb",
+                ) as f:
+                    elf = ELFDynamic.read(f)
             except OSError as e:
                 if e.errno != errno.ENOENT:
                     raise
-                raise CommandNotFound(args[0])
-            else:
-                for l in proc.stdout:
-                    try:
-                        l = _unicode_decode(
-                            l, encoding=_encodings["content"], errors="strict"
-                        )
-                    except UnicodeDecodeError:
-                        l = _unicode_decode(
-                            l, encoding=_encodings["content"], errors="replace"
-                        )
-                        writemsg_level(
-                            _(
-                                "\nError decoding characters "
-                                "returned from scanelf: %s\n\n"
-                            )
-                            % (l,),
-                            level=logging.ERROR,
-                            noiselevel=-1,
-                        )
-                    l = l[3:].rstrip("\n")
-                    if not l:
-                        continue
-                    try:
-                        entry = NeededEntry.parse("scanelf", l)
-                    except InvalidData as e:
-                        writemsg_level(f"\n{e}\n\n", level=logging.ERROR, noiselevel=-1)
-                        continue
-                    try:
-                        with open(
-                            _unicode_encode(
-                                entry.filename,
-                                encoding=_encodings["fs"],
-                                errors="strict",
-                            ),
-                            "rb",
-                        ) as f:
-                            elf_header = ELFHeader.read(f)
-                    except OSError as e:
-                        if e.errno != errno.ENOENT:
-                            raise
-                        # File removed concurrently.
-                        continue
-
-                    # Infer implicit soname from basename (bug 715162).
-                    if not entry.soname:
-                        try:
-                            proc = subprocess.Popen(
-                                [
-                                    b"file",
-                                    _unicode_encode(
-                                        entry.filename,
-                                        encoding=_encodings["fs"],
-                                        errors="strict",
-                                    ),
-                                ],
-                                stdout=subprocess.PIPE,
-                            )
-                            out, err = proc.communicate()
-                            proc.wait()
-                        except OSError:
-                            pass
-                        else:
-                            if b"SB shared object" in out:
-                                entry.soname = os.path.basename(entry.filename)
-
-                    entry.multilib_category = compute_multilib_category(elf_header)
-                    entry.filename = entry.filename[root_len:]
-                    owner = plibs.pop(entry.filename, None)
-                    lines.append((owner, "scanelf", str(entry)))
-                proc.wait()
-                proc.stdout.close()
+                # File removed concurrently.
+                continue
+            if elf is None:
+                continue
+            entry = NeededEntry.from_elf(filename[root_len:], elf)
+            owner = plibs.pop(entry.filename, None)
+            lines.append((owner, "plibs", str(entry)))
 
         if plibs:
-            # Preserved libraries that did not appear in the scanelf output.
-            # This is known to happen with statically linked libraries.
+            # Preserved libraries that are not ELF files. This is known
+            # to happen with statically linked libraries.
             # Generate dummy lines for these, so we can assume that every
             # preserved library has an entry in self._obj_properties. This
             # is important in order to prevent findConsumers from raising
@@ -1,6 +1,8 @@
-# Copyright 2015-2020 Gentoo Authors
+# Copyright 2015-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
+from portage import _encodings, _unicode_decode, os
+from portage.dep.soname.multilib_category import compute_multilib_category
 from portage.exception import InvalidData
 from portage.localization import _
 
@@ -64,6 +66,45 @@ class NeededEntry:
 
         return obj
 
+    @classmethod
+    def from_elf(cls, filename, elf):
+        """
+        Create an entry from the dynamic section of an ELF file.
+
+        @param filename: file name for the entry
+        @type filename: str
+        @param elf: the parsed ELF file
+        @type elf: portage.util.elf.dynamic.ELFDynamic
+        @rtype: NeededEntry
+        @return: A new NeededEntry instance containing data from elf
+        """
+
+        def decode(value):
+            return _unicode_decode(
+                value, encoding=_encodings["content"], errors="replace"
+            )
+
+        obj = cls()
+        obj.arch = elf.arch
+        obj.filename = filename
+        if elf.soname is not None:
+            obj.soname = decode(elf.soname)
+        elif elf.is_shared_object:
+            # Infer implicit soname from basename (bug 715162).
+            obj.soname = os.path.basename(filename)
+        else:
+            obj.soname = ""
+        obj.runpaths = tuple(
+            runpath
+            for value in (elf.rpath, elf.runpath)
+            if value is not None
+            for runpath in decode(value).split(":")
+            if runpath
+        )
+        obj.needed = tuple(decode(x) for x in elf.needed)
+        obj.multilib_category = compute_multilib_category(elf.header)
+        return obj
+
     def __str__(self):
         """
         Format this entry for writing to a NEEDED.ELF.2 file.
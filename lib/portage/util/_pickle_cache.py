@@ -0,0 +1,83 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+"""
+Storage for caches of data that is derived from files and directories,
+such as checksums and directory listings, as pickles of builtin types.
+"""
+
+__all__ = ["RACY_NS", "load_pickle", "store_pickle"]
+
+import pickle
+
+from portage import _encodings, _unicode_encode, os
+from portage.exception import PortageException
+
+# Data that is derived from a file or directory is cached only if its
+# st_mtime_ns is older than this when it is read, since otherwise it
+# could be modified again without any change to st_mtime_ns, depending
+# on the timestamp granularity of the filesystem.
+RACY_NS = 2 * 1000000000
+
+
+class _Unpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        # The caches only contain builtin types.
+        raise pickle.UnpicklingError(f"global '{module}.{name}' is forbidden")
+
+
+def load_pickle(filename, version):
+    """
+    Load a cache that was stored by store_pickle.
+
+    @param filename: path of the cache
+    @type filename: str
+    @param version: the version of the format of the cache
+    @type version: str
+    @rtype: dict
+    @return: the cache, or None if it is missing, unreadable, corrupt
+            or of another version
+    """
+    try:
+        with open(
+            _unicode_encode(filename, encoding=_encodings["fs"], errors="strict"),
+            mode="rb",
+        ) as f:
+            data = _Unpickler(f).load()
+    except (SystemExit, KeyboardInterrupt):
+        raise
+    except Exception:
+        return None
+    if not isinstance(data, dict) or data.get("version") != version:
+        return None
+    return data
+
+
+def store_pickle(filename, data, ensure_parent=False):
+    """
+    Atomically store a cache, and make it writable for the portage group.
+
+    @param filename: path of the cache
+    @type filename: str
+    @param data: the cache, including a "version" key
+    @type data: dict
+    @param ensure_parent: create the parent directory if necessary
+    @type ensure_parent: bool
+    @rtype: bool
+    @return: True if the cache was stored, or False if the current user
+            does not have permission
+    """
+    from portage.data import portage_gid
+    from portage.util import apply_secpass_permissions, atomic_ofstream, ensure_dirs
+
+    try:
+        if ensure_parent:
+            ensure_dirs(
+                os.path.dirname(filename), gid=portage_gid, mode=0o2070, mask=0o2
+            )
+        with atomic_ofstream(filename, "wb") as f:
+            pickle.dump(data, f, protocol=4)
+        apply_secpass_permissions(filename, gid=portage_gid, mode=0o664)
+    except (OSError, PortageException):
+        return False
+    return True
@@ -0,0 +1,327 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+__all__ = ["BuildStats", "dir_usage", "process_tree_rss"]
+
+import errno
+import json
+import stat
+import time
+
+from portage import _encodings, _unicode_decode, _unicode_encode, os
+from portage.const import CACHE_PATH
+from portage.data import portage_gid, uid
+from portage.exception import InvalidData, PortageException
+from portage.locks import lockfile, unlockfile
+from portage.util import (
+    apply_secpass_permissions,
+    atomic_ofstream,
+    ensure_dirs,
+    writemsg,
+)
+from portage.versions import cpv_getkey
+
+
+class BuildStats:
+    """
+    A persistent record of the resources used by previous builds, stored
+    as JSON in CACHE_PATH/build_stats.json of an EROOT. Each record is a
+    dict with the following keys, any of which may be missing:
+
+        time: the time when the build completed, in seconds since the epoch
+        phases: a dict of ebuild phase durations in seconds
+        max_rss: the peak RSS of the process tree of any phase, in bytes
+        tmpdir_usage: disk usage of PORTAGE_BUILDDIR after src_install,
+                in bytes (only with FEATURES=tmpdir-usage)
+        log_size: the size of the build log, in bytes
+
+    With FEATURES=cgroup, the following keys are taken from the cgroup of
+    the build job:
+
+        memory_peak: the peak memory usage of the job, in bytes
+        cpu_time: the CPU time used by the job, in seconds
+        io_read, io_write: bytes read and written by block IO
+
+    Only records for the most recent builds of each package are kept, so
+    that the file remains small.
+    """
+
+    filename = "build_stats.json"
+
+    _json_write_opts = {"ensure_ascii": False, "separators": (",", ":")}
+    _max_per_cp = 3
+
+    def __init__(self, path):
+        self.path = path
+        self._set_records(self._read(path))
+
+    @classmethod
+    def for_root(cls, eroot):
+        return cls(os.path.join(eroot, CACHE_PATH, cls.filename))
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(
+                _unicode_encode(path, encoding=_encodings["fs"], errors="strict"),
+                "rb",
+            ) as f:
+                content = f.read()
+        except OSError as e:
+            if e.errno not in (errno.ENOENT, errno.ESTALE, errno.EACCES):
+                writemsg(f"!!! Error loading '{path}': {e}\n", noiselevel=-1)
+            return {}
+
+        try:
+            d = json.loads(
+                _unicode_decode(content, encoding=_encodings["repo.content"])
+            )
+        except ValueError as e:
+            writemsg(f"!!! Error loading '{path}': {e}\n", noiselevel=-1)
+            return {}
+
+        records = d.get("packages") if isinstance(d, dict) else None
+        if not isinstance(records, dict):
+            return {}
+        return {
+            cpv: record for cpv, record in records.items() if isinstance(record, dict)
+        }
+
+    def _set_records(self, records):
+        self._records = records
+        # The most recent record of each cp, so that lookups of versions
+        # without a record do not need to scan all records.
+        latest = {}
+        for cpv, record in records.items():
+            cp = _cp(cpv)
+            if cp is None:
+                continue
+            other = latest.get(cp)
+            if other is None or _time(record) > _time(other):
+                latest[cp] = record
+        self._latest = latest
+
+    def __contains__(self, cpv):
+        return cpv in self._records
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, cpv):
+        """
+        @rtype: dict or None
+        @return: the record of the most recent build of the given cpv
+        """
+        return self._records.get(str(cpv))
+
+    def latest(self, cp):
+        """
+        @rtype: dict or None
+        @return: the record of the most recent build of any version of
+                the given cp
+        """
+        return self._latest.get(cp)
+
+    def lookup(self, cpv):
+        """
+        Return the record of the given cpv if there is one, and otherwise
+        the record of the most recent build of another version, since
+        resource usage usually changes little between versions.
+
+        @rtype: dict or None
+        """
+        record = self.get(cpv)
+        if record is None:
+            cp = _cp(str(cpv))
+            if cp is not None:
+                record = self.latest(cp)
+        return record
+
+    def percentile(self, key, fraction):
+        """
+        Return the given percentile of the values of key over the most
+        recent records of all packages, or None if there are no values.
+        Values that are not numbers are ignored.
+
+        @param key: a record key with a numeric value, or a function that
+                returns a numeric value for a record, or None if the record
+                has no value
+        @type key: str or callable
+        @param fraction: the percentile, between 0 and 1
+        @type fraction: float
+        @rtype: int or float or None
+        """
+        value = key if callable(key) else lambda record: record.get(key)
+        latest = {}
+        for cpv, record in self._records.items():
+            v = value(record)
+            if not _is_number(v):
+                continue
+            cp = _cp(cpv)
+            if cp not in latest or _time(record) > latest[cp][0]:
+                latest[cp] = (_time(record), v)
+        values = sorted(v for t, v in latest.values())
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(len(values) * fraction))]
+
+    def add(self, cpv, record):
+        """
+        Add a record for a build of the given cpv and write it to disk,
+        merging it with records that other processes may have written
+        since this instance was loaded. Errors are reported and ignored,
+        since statistics are not essential.
+
+        @param cpv: the package that was built
+        @type cpv: str
+        @param record: the statistics of the build
+        @type record: dict
+        """
+        cpv = str(cpv)
+        record = dict(record)
+        record.setdefault("time", int(time.time()))
+        lock = None
+        try:
+            ensure_dirs(os.path.dirname(self.path))
+            lock = lockfile(self.path, wantnewlockfile=True)
+            records = self._read(self.path)
+            records[cpv] = record
+
+            cp = _cp(cpv)
+            versions = sorted(
+                (other for other in records if _cp(other) == cp),
+                key=lambda other: _time(records[other]),
+                reverse=True,
+            )
+            for other in versions[self._max_per_cp :]:
+                del records[other]
+
+            f = atomic_ofstream(self.path, mode="wb")
+            f.write(
+                _unicode_encode(
+                    json.dumps({"packages": records}, **self._json_write_opts),
+                    encoding=_encodings["repo.content"],
+                    errors="strict",
+                )
+            )
+            f.close()
+            apply_secpass_permissions(self.path, uid=uid, gid=portage_gid, mode=0o664)
+            self._set_records(records)
+        except (OSError, PortageException) as e:
+            writemsg(f"!!! Error writing '{self.path}': {e}\n", noiselevel=-1)
+        finally:
+            if lock is not None:
+                unlockfile(lock)
+
+
+def _cp(cpv):
+    try:
+        return cpv_getkey(cpv)
+    except InvalidData:
+        return None
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _time(record):
+    t = record.get("time", 0)
+    return t if _is_number(t) else 0
+
+
+def dir_usage(path):
+    """
+    Return the disk usage of the given directory tree in bytes. Files
+    with multiple hardlinks are counted once.
+
+    @rtype: int
+    """
+    usage = 0
+    seen = set()
+    for parent, dirs, files in os.walk(path):
+        for name in dirs + files:
+            try:
+                st = os.lstat(os.path.join(parent, name))
+            except OSError:
+                continue
+            if st.st_nlink > 1 and not stat.S_ISDIR(st.st_mode):
+                if (st.st_dev, st.st_ino) in seen:
+                    continue
+                seen.add((st.st_dev, st.st_ino))
+            usage += st.st_blocks * 512
+    return usage
+
+
+# The process table is shared by concurrent callers of process_tree_rss,
+# so that the cost of sampling does not grow with the number of jobs.
+_proc_table_cache = [None, None]
+
+
+def _proc_table(max_age):
+    """
+    Return a dict mapping each pid to a tuple of its parent pid and its
+    RSS in bytes, or None if /proc is not available.
+    """
+    now = time.monotonic()
+    timestamp, table = _proc_table_cache
+    if timestamp is not None and now - timestamp < max_age:
+        return table
+
+    table = None
+    try:
+        names = os.listdir("/proc")
+    except OSError:
+        names = ()
+    page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+    for name in names:
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "rb") as f:
+                content = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces and parentheses.
+        fields = content[content.rfind(b")") + 2 :].split()
+        try:
+            ppid = int(fields[1])
+            rss = int(fields[21]) * page_size
+        except (IndexError, ValueError):
+            continue
+        if table is None:
+            table = {}
+        table[int(name)] = (ppid, rss)
+
+    _proc_table_cache[:] = [now, table]
+    return table
+
+
+def process_tree_rss(pid, max_age=1):
+    """
+    Return the sum of the RSS of the given process and all of its
+    descendants in bytes, or None if it is not known. Shared memory is
+    counted once per process, so the result is an upper bound.
+
+    @param pid: the root of the process tree
+    @type pid: int
+    @param max_age: the maximum age in seconds of a cached process table
+            that may be used instead of reading /proc again
+    @type max_age: float
+    @rtype: int or None
+    """
+    table = _proc_table(max_age)
+    if table is None or pid not in table:
+        return None
+
+    children = {}
+    for child, (ppid, rss) in table.items():
+        children.setdefault(ppid, []).append(child)
+
+    total = 0
+    stack = [pid]
+    while stack:
+        node = stack.pop()
+        total += table[node][1]
+        stack.extend(children.get(node, ()))
+    return total
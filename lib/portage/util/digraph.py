@@ -1,7 +1,7 @@
 # Copyright 2010-2014 Gentoo Foundation
 # Distributed under the terms of the GNU General Public License v2
 
-__all__ = ["digraph"]
+__all__ = ["digraph", "incremental_digraph"]
 
 import bisect
 from collections import deque
@@ -270,8 +270,13 @@ class digraph:
         return len(self.nodes) == 0
 
     def clone(self):
-        clone = digraph()
-        clone.nodes = {}
+        clone = self.__class__()
+        clone.nodes = self._clone_nodes()
+        clone.order = self.order[:]
+        return clone
+
+    def _clone_nodes(self):
+        nodes = {}
         memo = {}
         for children, parents, node in self.nodes.values():
             children_clone = {}
@@ -288,9 +293,8 @@ class digraph:
                     priorities_clone = priorities[:]
                     memo[id(priorities)] = priorities_clone
                 parents_clone[parent] = priorities_clone
-            clone.nodes[node] = (children_clone, parents_clone, node)
-        clone.order = self.order[:]
-        return clone
+            nodes[node] = (children_clone, parents_clone, node)
+        return nodes
 
     def delnode(self, node):
         try:
@@ -378,3 +382,226 @@ class digraph:
     __contains__ = contains
     empty = is_empty
     copy = clone
+
+
+class incremental_digraph(digraph):
+    """
+    A digraph which maintains the results of leaf_nodes() and root_nodes()
+    incrementally, for graphs that are consumed by repeatedly removing
+    leaf or root nodes. Nodes are removed from the insertion order in
+    constant time.
+
+    For each ignore_priority value that leaf_nodes() or root_nodes() is
+    called with, the number of edges to children (or parents) that are
+    not ignored is tracked for every node, along with a sorted list of the
+    sequence numbers of the nodes for which that number is zero, so that
+    the result can be produced in insertion order without sorting or
+    scanning all nodes. Callables are only tracked if they do not have
+    any closure cells, since the result of a closure may change between
+    calls. Other callables and unhashable values fall back to a scan of
+    all nodes.
+
+    The order attribute is a property which returns a tuple, so it must
+    be assigned in order to change the order of the nodes, and attempts
+    to modify it in place fail instead of being silently lost.
+    """
+
+    _max_trackers = 32
+
+    def __init__(self, graph=None):
+        """
+        @param graph: optional digraph whose nodes and edges are copied
+        @type graph: digraph
+        """
+        # { (is_leaf, ignore_priority) : ( { node : count } , [ seq ] ) }
+        self._trackers = {}
+        digraph.__init__(self)
+        if graph is not None:
+            self.nodes = graph._clone_nodes()
+            self.order = graph.order
+
+    @property
+    def order(self):
+        return tuple(self._order)
+
+    @order.setter
+    def order(self, order):
+        # { node : sequence number }
+        self._order = {node: i for i, node in enumerate(order)}
+        # { sequence number : node }
+        self._seq_nodes = {i: node for node, i in self._order.items()}
+        self._next_seq = len(self._order)
+        self._trackers.clear()
+
+    @staticmethod
+    def _counted(ignore_priority, priorities):
+        if ignore_priority is None:
+            return True
+        if hasattr(ignore_priority, "__call__"):
+            for priority in reversed(priorities):
+                if not ignore_priority(priority):
+                    return True
+            return False
+        return ignore_priority < priorities[-1]
+
+    def _tracker(self, is_leaf, ignore_priority):
+        if ignore_priority is not None and (
+            getattr(ignore_priority, "__closure__", None) is not None
+        ):
+            return None
+        key = (is_leaf, ignore_priority)
+        try:
+            tracker = self._trackers.get(key)
+        except TypeError:
+            return None
+        if tracker is not None:
+            return tracker
+
+        counted = self._counted
+        edges = 0 if is_leaf else 1
+        counts = {}
+        zeros = []
+        for node, seq in self._order.items():
+            if ignore_priority is None:
+                count = len(self.nodes[node][edges])
+            else:
+                count = 0
+                for priorities in self.nodes[node][edges].values():
+                    if counted(ignore_priority, priorities):
+                        count += 1
+            counts[node] = count
+            if not count:
+                zeros.append(seq)
+
+        if len(self._trackers) >= self._max_trackers:
+            del self._trackers[next(iter(self._trackers))]
+        tracker = self._trackers[key] = (counts, zeros)
+        return tracker
+
+    def _adjust(self, is_leaf, node, priorities, delta):
+        """
+        Adjust the counts of the given node in all trackers of the given
+        kind, for an edge with the given priorities which is added
+        (delta 1) or removed (delta -1).
+        """
+        counted = self._counted
+        for (tracker_is_leaf, ignore_priority), (
+            counts,
+            zeros,
+        ) in self._trackers.items():
+            if tracker_is_leaf is not is_leaf or not counted(
+                ignore_priority, priorities
+            ):
+                continue
+            count = counts[node] + delta
+            counts[node] = count
+            if not count:
+                bisect.insort(zeros, self._order[node])
+            elif count == delta:
+                del zeros[bisect.bisect_left(zeros, self._order[node])]
+
+    def _add_node(self, node):
+        seq = self._next_seq
+        self._next_seq += 1
+        self.nodes[node] = ({}, {}, node)
+        self._order[node] = seq
+        self._seq_nodes[seq] = node
+        for counts, zeros in self._trackers.values():
+            counts[node] = 0
+            zeros.append(seq)
+
+    def add(self, node, parent, priority=0):
+        if node not in self.nodes:
+            self._add_node(node)
+
+        if not parent:
+            return
+
+        if parent not in self.nodes:
+            self._add_node(parent)
+
+        priorities = self.nodes[node][1].get(parent)
+        if priorities is not None:
+            if priorities[-1] is priority:
+                return
+            # The edge is counted again below, with its new priorities.
+            self._adjust(True, parent, priorities, -1)
+            self._adjust(False, node, priorities, -1)
+
+        digraph.add(self, node, parent, priority=priority)
+        priorities = self.nodes[node][1][parent]
+        self._adjust(True, parent, priorities, 1)
+        self._adjust(False, node, priorities, 1)
+
+    def remove(self, node):
+        if node not in self.nodes:
+            raise KeyError(node)
+
+        children, parents, node = self.nodes[node]
+        for parent, priorities in parents.items():
+            del self.nodes[parent][0][node]
+            self._adjust(True, parent, priorities, -1)
+        for child, priorities in children.items():
+            del self.nodes[child][1][node]
+            self._adjust(False, child, priorities, -1)
+
+        del self.nodes[node]
+        seq = self._order.pop(node)
+        del self._seq_nodes[seq]
+        for counts, zeros in self._trackers.values():
+            if not counts.pop(node):
+                del zeros[bisect.bisect_left(zeros, seq)]
+
+    def clear(self):
+        self.nodes.clear()
+        self.order = []
+
+    def difference_update(self, t):
+        if isinstance(t, (list, tuple)) or not hasattr(t, "__contains__"):
+            t = frozenset(t)
+        if len(t) > len(self.nodes):
+            t = [node for node in self._order if node in t]
+        for node in t:
+            if node in self.nodes:
+                self.remove(node)
+
+    def remove_edge(self, child, parent):
+        for k in parent, child:
+            if k not in self.nodes:
+                raise KeyError(k)
+        priorities = self.nodes[child][1].get(parent)
+        digraph.remove_edge(self, child, parent)
+        self._adjust(True, parent, priorities, -1)
+        self._adjust(False, child, priorities, -1)
+
+    def __iter__(self):
+        return iter(self._order)
+
+    def all_nodes(self):
+        return list(self._order)
+
+    def _zero_nodes(self, is_leaf, ignore_priority):
+        tracker = self._tracker(is_leaf, ignore_priority)
+        if tracker is None:
+            return None
+        seq_nodes = self._seq_nodes
+        return [seq_nodes[seq] for seq in tracker[1]]
+
+    def leaf_nodes(self, ignore_priority=None):
+        nodes = self._zero_nodes(True, ignore_priority)
+        if nodes is None:
+            nodes = digraph.leaf_nodes(self, ignore_priority=ignore_priority)
+        return nodes
+
+    def root_nodes(self, ignore_priority=None):
+        nodes = self._zero_nodes(False, ignore_priority)
+        if nodes is None:
+            nodes = digraph.root_nodes(self, ignore_priority=ignore_priority)
+        return nodes
+
+    def hasallzeros(self, ignore_priority=None):
+        return len(self.leaf_nodes(ignore_priority=ignore_priority)) == len(self.nodes)
+
+    addnode = add
+    allnodes = all_nodes
+    allzeros = leaf_nodes
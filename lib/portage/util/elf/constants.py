@@ -1,9 +1,11 @@
-# Copyright 2015-2024 Gentoo Authors
+# Copyright 2015-2026 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 #
 # These constants are available from elfutils:
 # https://sourceware.org/git/?p=elfutils.git;a=blob;f=libelf/elf.h;hb=HEAD
 
+ELFMAG = b"\x7fELF"
+
 EI_CLASS = 4
 ELFCLASS32 = 1
 ELFCLASS64 = 2
@@ -19,33 +21,114 @@ ET_DYN = 3
 ET_CORE = 4
 
 E_MACHINE = 18
+EM_NONE = 0
+EM_M32 = 1
 EM_SPARC = 2
 EM_386 = 3
 EM_68K = 4
+EM_88K = 5
+EM_IAMCU = 6
+EM_860 = 7
 EM_MIPS = 8
+EM_S370 = 9
+EM_MIPS_RS3_LE = 10
 EM_PARISC = 15
+EM_VPP500 = 17
 EM_SPARC32PLUS = 18
+EM_960 = 19
 EM_PPC = 20
 EM_PPC64 = 21
 EM_S390 = 22
+EM_SPU = 23
+EM_V800 = 36
+EM_FR20 = 37
+EM_RH32 = 38
+EM_RCE = 39
 EM_ARM = 40
+EM_FAKE_ALPHA = 41
 EM_SH = 42
 EM_SPARCV9 = 43
+EM_TRICORE = 44
 EM_ARC = 45
+EM_H8_300 = 46
+EM_H8_300H = 47
+EM_H8S = 48
+EM_H8_500 = 49
 EM_IA_64 = 50
+EM_MIPS_X = 51
+EM_COLDFIRE = 52
+EM_68HC12 = 53
+EM_MMA = 54
+EM_PCP = 55
+EM_NCPU = 56
+EM_NDR1 = 57
+EM_STARCORE = 58
+EM_ME16 = 59
+EM_ST100 = 60
+EM_TINYJ = 61
 EM_X86_64 = 62
+EM_PDSP = 63
+EM_FX66 = 66
+EM_ST9PLUS = 67
+EM_ST7 = 68
+EM_68HC16 = 69
+EM_68HC11 = 70
+EM_68HC08 = 71
+EM_68HC05 = 72
+EM_SVX = 73
+EM_ST19 = 74
+EM_VAX = 75
+EM_CRIS = 76
+EM_JAVELIN = 77
+EM_FIREPATH = 78
+EM_ZSP = 79
+EM_MMIX = 80
+EM_HUANY = 81
+EM_PRISM = 82
+EM_AVR = 83
+EM_FR30 = 84
+EM_D10V = 85
+EM_D30V = 86
+EM_V850 = 87
+EM_M32R = 88
+EM_MN10300 = 89
+EM_MN10200 = 90
+EM_PJ = 91
+EM_OPENRISC = 92
 EM_ARC_COMPACT = 93
+EM_XTENSA = 94
+EM_BLACKFIN = 106
 EM_ALTERA_NIOS2 = 113
+EM_QDSP6 = 164
+EM_MCST_ELBRUS = 175
 EM_AARCH64 = 183
+EM_TILEPRO = 188
+EM_MICROBLAZE = 189
+EM_TILEGX = 191
 EM_ARC_COMPACT2 = 195
 EM_AMDGPU = 224
 EM_RISCV = 243
 EM_BPF = 247
+EM_CSKY = 252
 EM_ARC_COMPACT3_64 = 253
 EM_ARC_COMPACT3 = 255
 EM_LOONGARCH = 258
 EM_ALPHA = 0x9026
-EM_MCST_ELBRUS = 175
+
+PN_XNUM = 0xFFFF
+
+PT_LOAD = 1
+PT_DYNAMIC = 2
+
+DT_NULL = 0
+DT_NEEDED = 1
+DT_STRTAB = 5
+DT_STRSZ = 10
+DT_SONAME = 14
+DT_RPATH = 15
+DT_RUNPATH = 29
+DT_FLAGS_1 = 0x6FFFFFFB
+DF_1_PIE = 0x08000000
 
 E_ENTRY = 24
 EF_MIPS_ABI = 0x0000F000
@@ -0,0 +1,218 @@
+# Copyright 2026 Gentoo Authors
+# Distributed under the terms of the GNU General Public License v2
+
+import mmap
+import struct
+
+from portage.util.elf import constants
+from portage.util.elf.constants import (
+    DF_1_PIE,
+    DT_FLAGS_1,
+    DT_NEEDED,
+    DT_NULL,
+    DT_RPATH,
+    DT_RUNPATH,
+    DT_SONAME,
+    DT_STRSZ,
+    DT_STRTAB,
+    EI_CLASS,
+    EI_DATA,
+    ELFCLASS32,
+    ELFCLASS64,
+    ELFDATA2LSB,
+    ELFDATA2MSB,
+    ELFMAG,
+    ET_DYN,
+    PN_XNUM,
+    PT_DYNAMIC,
+    PT_LOAD,
+)
+from portage.util.elf.header import ELFHeader
+
+# The names that scanelf uses for e_machine values, without the EM_ prefix.
+_machine_names = {
+    v: k[len("EM_") :]
+    for k, v in vars(constants).items()
+    if k.startswith("EM_") and isinstance(v, int)
+}
+
+# struct formats for the fields of the ELF header that follow e_ident,
+# program headers, the first section header and dynamic entries.
+_formats = {
+    ELFCLASS32: ("HHIIIIIHHHHHH", "IIIIIIII", "IIIIIIII", "iI"),
+    ELFCLASS64: ("HHIQQQIHHHHHH", "IIQQQQQQ", "IIQQQQII", "qQ"),
+}
+
+
+class ELFDynamic:
+    """
+    The ELF header and the dynamic section of an ELF file, as needed for
+    NEEDED.ELF.2 entries. The file is accessed through mmap, so that
+    only the pages containing the headers, the dynamic section and
+    the referenced strings are read.
+    """
+
+    __slots__ = (
+        "header",
+        "flags_1",
+        "needed",
+        "rpath",
+        "runpath",
+        "soname",
+    )
+
+    @classmethod
+    def read(cls, f):
+        """
+        @param f: an open file
+        @type f: file
+        @rtype: ELFDynamic or None
+        @return: A new ELFDynamic instance containing data from f,
+                or None if f is not an ELF file
+        """
+        try:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file.
+            return None
+        try:
+            return cls._parse(m)
+        finally:
+            m.close()
+
+    @classmethod
+    def _parse(cls, m):
+        if len(m) < 52 or m[: len(ELFMAG)] != ELFMAG:
+            return None
+
+        ei_class = m[EI_CLASS]
+        ei_data = m[EI_DATA]
+        formats = _formats.get(ei_class)
+        if ei_data == ELFDATA2LSB:
+            order = "<"
+        elif ei_data == ELFDATA2MSB:
+            order = ">"
+        else:
+            order = None
+
+        obj = cls()
+        obj.header = header = ELFHeader()
+        header.ei_class = ei_class
+        header.ei_data = ei_data
+        header.e_flags = header.e_machine = header.e_type = None
+        obj.flags_1 = 0
+        obj.needed = []
+        obj.rpath = None
+        obj.runpath = None
+        obj.soname = None
+        if formats is None or order is None:
+            return obj
+
+        ehdr_fmt, phdr_fmt, shdr_fmt, dyn_fmt = (order + x for x in formats)
+        try:
+            (
+                header.e_type,
+                header.e_machine,
+                _e_version,
+                _e_entry,
+                e_phoff,
+                e_shoff,
+                header.e_flags,
+                _e_ehsize,
+                e_phentsize,
+                e_phnum,
+                _e_shentsize,
+                _e_shnum,
+                _e_shstrndx,
+            ) = struct.unpack_from(ehdr_fmt, m, 16)
+
+            if e_phnum == PN_XNUM and e_shoff:
+                # The real number is in sh_info of the first section header.
+                e_phnum = struct.unpack_from(shdr_fmt, m, e_shoff)[7]
+
+            loads = []
+            dynamic = None
+            for i in range(e_phnum):
+                p_type, *fields = struct.unpack_from(
+                    phdr_fmt, m, e_phoff + i * e_phentsize
+                )
+                if ei_class == ELFCLASS32:
+                    p_offset, p_vaddr, _p_paddr, p_filesz = fields[:4]
+                else:
+                    p_offset, p_vaddr, _p_paddr, p_filesz = fields[1:5]
+                if p_type == PT_LOAD:
+                    loads.append((p_vaddr, p_filesz, p_offset))
+                elif p_type == PT_DYNAMIC:
+                    dynamic = (p_offset, p_filesz)
+
+            if dynamic is not None:
+                obj._parse_dynamic(m, dyn_fmt, dynamic, loads)
+        except struct.error:
+            # Truncated or corrupt file. Keep what has been parsed so far.
+            pass
+
+        return obj
+
+    def _parse_dynamic(self, m, dyn_fmt, dynamic, loads):
+        offset, size = dynamic
+        dyn_size = struct.calcsize(dyn_fmt)
+        strtab = None
+        strsz = None
+        entries = []
+        for d_tag, d_val in struct.iter_unpack(
+            dyn_fmt, m[offset : offset + size - size % dyn_size]
+        ):
+            if d_tag == DT_NULL:
+                break
+            if d_tag == DT_STRTAB:
+                strtab = d_val
+            elif d_tag == DT_STRSZ:
+                strsz = d_val
+            elif d_tag == DT_FLAGS_1:
+                self.flags_1 = d_val
+            elif d_tag in (DT_NEEDED, DT_SONAME, DT_RPATH, DT_RUNPATH):
+                entries.append((d_tag, d_val))
+
+        if strtab is None or not entries:
+            return
+
+        # DT_STRTAB is an address, which is translated to a file offset
+        # via the PT_LOAD segment that contains it.
+        for p_vaddr, p_filesz, p_offset in loads:
+            if p_vaddr <= strtab < p_vaddr + p_filesz:
+                strtab = strtab - p_vaddr + p_offset
+                break
+        else:
+            return
+        end = len(m) if strsz is None else min(len(m), strtab + strsz)
+
+        for d_tag, d_val in entries:
+            start = strtab + d_val
+            if start >= end:
+                continue
+            stop = m.find(b"\0", start, end)
+            value = m[start : end if stop == -1 else stop]
+            if d_tag == DT_NEEDED:
+                self.needed.append(value)
+            elif d_tag == DT_SONAME:
+                self.soname = value
+            elif d_tag == DT_RPATH:
+                self.rpath = value
+            else:
+                self.runpath = value
+
+    @property
+    def arch(self):
+        """
+        The name of the machine like in NEEDED.ELF.2 (for example
+        X86_64), or UNKNOWN_TYPE.
+        """
+        return _machine_names.get(self.header.e_machine, "UNKNOWN_TYPE")
+
+    @property
+    def is_shared_object(self):
+        """
+        True if this is a shared library rather than a position-independent
+        executable, which file(1) reports as "shared object".
+        """
+        return self.header.e_type == ET_DYN and not self.flags_1 & DF_1_PIE
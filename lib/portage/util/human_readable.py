@@ -1,7 +1,7 @@
 # Copyright 2025 Gentoo Authors
 # Distributed under the terms of the GNU General Public License v2
 
-__all__ = ["bytes_to_human"]
+__all__ = ["bytes_to_human", "human_to_bytes"]
 
 
 def bytes_to_human(size: int, decimal_places: int = 2) -> str:
@@ -21,3 +21,34 @@ def bytes_to_human(size: int, decimal_places: int = 2) -> str:
         size /= 1024.0
 
     return f"{size:.{decimal_places}f} {unit}"
+
+
+def human_to_bytes(size: str) -> int:
+    """
+    Converts a size with an optional K, M, G or T suffix, optionally
+    followed by "iB" or "B", to bytes. Suffixes are powers of 1024.
+
+    Args:
+        size (str): The size, for example "512M", "1.5GiB" or "4096".
+
+    Returns:
+        int: The size in bytes.
+
+    Raises:
+        ValueError: If the size is invalid.
+    """
+    value = size.strip().upper()
+    for suffix in ("IB", "B"):
+        if value.endswith(suffix) and len(value) > len(suffix):
+            value = value[: -len(suffix)]
+            break
+    multiplier = 1
+    for exponent, unit in enumerate("KMGT", 1):
+        if value.endswith(unit):
+            value = value[:-1]
+            multiplier = 1024**exponent
+            break
+    number = float(value)
+    if number < 0:
+        raise ValueError(f"negative size: '{size}'")
+    return int(number * multiplier)
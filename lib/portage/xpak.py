@@ -116,8 +116,8 @@ def xpak(rootdir, outfile=None):
     mylist.sort()
     mydata = {}
     for x in mylist:
-        if x == "CONTENTS":
-            # CONTENTS is generated during the merge process.
+        if x in ("CONTENTS", "CONTENTS.idx"):
+            # CONTENTS and its index are generated during the merge process.
             continue
         x = _unicode_encode(x, encoding=_encodings["fs"], errors="strict")
         with open(os.path.join(rootdir, x), "rb") as f: